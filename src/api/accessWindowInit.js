@@ -1,8 +1,9 @@
 // src/api/accessWindowInit.js
 const { Client } = require('pg');
 const { InfluxDB, Point } = require('@influxdata/influxdb-client');
-const { spawn } = require('child_process');
-const path = require('path');
+const redis = require('redis');
+const { getAccessWindowPool, COMPUTE_WORKERS } = require('./pythonWorkerPool');
+const { invalidateAccessWindowCache } = require('./accessWindowCompat');
 
 // Database configuration
 const dbConfig = {
@@ -22,6 +23,81 @@ const influxConfig = {
   bucket: process.env.INFLUXDB_BUCKET || 'accesswindows'
 };
 
+// Redis hash holding the per-pair incremental state ("computed through" watermark + input fingerprint)
+const ACCESS_WINDOW_STATE_KEY = 'access_window_state';
+
+// Change-driven runs leave unchanged pairs alone until their stored events end within this margin
+// of the horizon, so they are extended in slices of about this size instead of every run
+const ACCESS_WINDOW_REFRESH_MARGIN_HOURS = parseFloat(process.env.ACCESS_WINDOW_REFRESH_MARGIN_HOURS || '24');
+
+// Far end of the range used when deleting stored future events
+const DELETE_HORIZON_MS = 365 * 24 * 60 * 60 * 1000;
+
+let stateClient = null;
+let incrementalRun = null;
+
+async function getStateClient() {
+  if (!stateClient) {
+    stateClient = redis.createClient({
+      socket: {
+        host: process.env.REDIS_HOST || 'redis',
+        port: process.env.REDIS_PORT || 6379
+      },
+      database: process.env.REDIS_DB || 0
+    });
+    stateClient.on('error', (error) => console.error('Access window state Redis error:', error.message));
+    await stateClient.connect();
+  }
+  return stateClient;
+}
+
+async function loadAccessWindowState() {
+  const fields = await (await getStateClient()).hGetAll(ACCESS_WINDOW_STATE_KEY);
+  const state = {};
+  for (const [key, value] of Object.entries(fields)) {
+    state[key] = JSON.parse(value);
+  }
+  return state;
+}
+
+async function saveAccessWindowState(state) {
+  const fields = Object.entries(state).map(([key, value]) => [key, JSON.stringify(value)]);
+  // Replace the whole hash atomically so pairs that no longer exist are dropped
+  const transaction = (await getStateClient()).multi().del(ACCESS_WINDOW_STATE_KEY);
+  if (fields.length > 0) {
+    transaction.hSet(ACCESS_WINDOW_STATE_KEY, Object.fromEntries(fields));
+  }
+  await transaction.exec();
+}
+
+/**
+ * Delete stored access events from startTime onwards through the InfluxDB delete API
+ * @param {Date} startTime - Start of the deleted range
+ * @param {Object} [tags] - Tag values every deleted point must match (default: all access events)
+ */
+async function deleteAccessEvents(startTime, tags = {}) {
+  const predicate = ['_measurement="access_event"',
+    ...Object.entries(tags).map(([tag, value]) => `${tag}="${value}"`)].join(' AND ');
+  const url = `${influxConfig.url}/api/v2/delete?org=${encodeURIComponent(influxConfig.org)}` +
+    `&bucket=${encodeURIComponent(influxConfig.bucket)}`;
+
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: {
+      Authorization: `Token ${influxConfig.token}`,
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify({
+      start: startTime.toISOString(),
+      stop: new Date(startTime.getTime() + DELETE_HORIZON_MS).toISOString(),
+      predicate
+    })
+  });
+  if (!response.ok) {
+    throw new Error(`InfluxDB delete failed (${response.status}): ${await response.text()}`);
+  }
+}
+
 async function getDatabaseConnection() {
   const maxRetries = 30;
   const retryDelay = 2000;
@@ -60,7 +136,7 @@ async function getInfluxDBClient() {
 
 async function fetchGroundStations(client) {
   const result = await client.query(`
-    SELECT gs_id, name, latitude, longitude, altitude 
+    SELECT gs_id, name, latitude, longitude, altitude, horizon_mask
     FROM ground_station 
     ORDER BY name
   `);
@@ -69,7 +145,7 @@ async function fetchGroundStations(client) {
 
 async function fetchTargets(client) {
   const result = await client.query(`
-    SELECT target_id, name, coordinate1 as latitude, coordinate2 as longitude, target_type, priority, status
+    SELECT target_id, name, coordinate1 as latitude, coordinate2 as longitude, altitude, target_type, priority, status
     FROM targets 
     WHERE target_type IN ('geographic', 'objective')
     ORDER BY name
@@ -86,111 +162,192 @@ async function fetchSatellites(client) {
   return result.rows;
 }
 
-function computeAccessWindows(lat, lon, tleLines, startUtc, endUtc, elevationDeg = 10.0, stepSeconds = 30) {
-  return new Promise((resolve, reject) => {
-    const scriptPath = path.join(__dirname, 'satellite', 'accesswindow.py');
-    const args = [
-      '--lat', lat.toString(),
-      '--lon', lon.toString(),
-      '--tle1', tleLines[0],
-      '--tle2', tleLines[1],
-      '--start_utc', startUtc.toISOString(),
-      '--end_utc', endUtc.toISOString(),
-      '--elevation_deg', elevationDeg.toString(),
-      '--step_seconds', stepSeconds.toString(),
-      '--output_format', 'legacy'  // Use legacy format for backward compatibility
-    ];
-
-    const py = spawn('python3', [scriptPath, ...args]);
-
-    let output = '';
-    let errorOutput = '';
+async function computeAccessWindows(lat, lon, tleLines, startUtc, endUtc, elevationDeg = 10.0, stepSeconds = 30) {
+  const windows = await getAccessWindowPool().request('legacy', {
+    lat,
+    lon,
+    tle_lines: tleLines,
+    start_utc: startUtc.toISOString(),
+    end_utc: endUtc.toISOString(),
+    elevation_deg: elevationDeg,
+    step_seconds: stepSeconds
+  });
 
-    py.stdout.on('data', (data) => {
-      output += data.toString();
-    });
+  // Each window is a [start, end] pair of ISO strings
+  return windows.map(([start, end]) => ({
+    start: new Date(start),
+    end: new Date(end)
+  }));
+}
 
-    py.stderr.on('data', (data) => {
-      errorOutput += data.toString();
-    });
+async function computeAccessEvents(lat, lon, tleLines, startUtc, endUtc, satelliteId, locationId, locationType, elevationDeg = 10.0, stepSeconds = 30) {
+  const events = await getAccessWindowPool().request('events', {
+    lat,
+    lon,
+    tle_lines: tleLines,
+    start_utc: startUtc.toISOString(),
+    end_utc: endUtc.toISOString(),
+    satellite_id: satelliteId.toString(),
+    location_id: locationId.toString(),
+    location_type: locationType,
+    elevation_deg: elevationDeg,
+    step_seconds: stepSeconds
+  });
 
-    py.on('close', (code) => {
-      if (code !== 0) {
-        reject(new Error(`Python script error: ${errorOutput}`));
-        return;
-      }
-      
-      // Parse output: each line is "start -> end"
-      const windows = output
-        .split('\n')
-        .filter(line => line.includes('->'))
-        .map(line => {
-          const [start, end] = line.split('->').map(s => s.trim());
-          return { 
-            start: new Date(start), 
-            end: new Date(end) 
-          };
-        });
-      
-      resolve(windows);
-    });
+  // Convert ISO strings back to Date objects
+  events.forEach(event => {
+    event.time = new Date(event.time);
   });
+  return events;
 }
 
-function computeAccessEvents(lat, lon, tleLines, startUtc, endUtc, satelliteId, locationId, locationType, elevationDeg = 10.0, stepSeconds = 30) {
-  return new Promise((resolve, reject) => {
-    const scriptPath = path.join(__dirname, 'satellite', 'accesswindow.py');
-    const args = [
-      '--lat', lat.toString(),
-      '--lon', lon.toString(),
-      '--tle1', tleLines[0],
-      '--tle2', tleLines[1],
-      '--start_utc', startUtc.toISOString(),
-      '--end_utc', endUtc.toISOString(),
-      '--elevation_deg', elevationDeg.toString(),
-      '--step_seconds', stepSeconds.toString(),
-      '--output_format', 'events',
-      '--satellite_id', satelliteId.toString(),
-      '--location_id', locationId.toString(),
-      '--location_type', locationType
-    ];
-
-    const py = spawn('python3', [scriptPath, ...args]);
+async function computeAccessEventsBatch(locations, satellites, startUtc, endUtc, elevationDeg = 10.0, stepSeconds = 30) {
+  const events = await getAccessWindowPool().request('batch_events', {
+    locations,
+    satellites: satellites.map(sat => ({
+      satellite_id: sat.satellite_id.toString(),
+      tle_1: sat.tle_1,
+      tle_2: sat.tle_2
+    })),
+    start_utc: startUtc.toISOString(),
+    end_utc: endUtc.toISOString(),
+    elevation_deg: elevationDeg,
+    step_seconds: stepSeconds,
+    workers: COMPUTE_WORKERS
+  });
 
-    let output = '';
-    let errorOutput = '';
+  // Convert ISO strings back to Date objects
+  events.forEach(event => {
+    event.time = new Date(event.time);
+  });
+  return events;
+}
 
-    py.stdout.on('data', (data) => {
-      output += data.toString();
-    });
+async function computeAccessEventsIncremental(locations, satellites, startUtc, endUtc, state, elevationDeg = 10.0, stepSeconds = 30, refreshMarginSeconds = null) {
+  const result = await getAccessWindowPool().request('incremental_events', {
+    locations,
+    satellites: satellites.map(sat => ({
+      satellite_id: sat.satellite_id.toString(),
+      tle_1: sat.tle_1,
+      tle_2: sat.tle_2
+    })),
+    start_utc: startUtc.toISOString(),
+    end_utc: endUtc.toISOString(),
+    state,
+    elevation_deg: elevationDeg,
+    step_seconds: stepSeconds,
+    workers: COMPUTE_WORKERS,
+    refresh_margin_seconds: refreshMarginSeconds
+  });
 
-    py.stderr.on('data', (data) => {
-      errorOutput += data.toString();
-    });
+  // Convert ISO strings back to Date objects
+  result.events.forEach(event => {
+    event.time = new Date(event.time);
+  });
+  return result;
+}
 
-    py.on('close', (code) => {
-      if (code !== 0) {
-        reject(new Error(`Python script error: ${errorOutput}`));
-        return;
-      }
-      
-      try {
-        // Parse JSON output
-        const events = JSON.parse(output);
-        // Convert ISO strings back to Date objects
-        events.forEach(event => {
+/**
+ * Run a streamed accesswindow.py method, handing its chunks to an async handler one at a time
+ * @param {string} method - Streamed worker method
+ * @param {Object} params - Keyword arguments for the method
+ * @param {Function} onChunk - Async handler called with each chunk, in order
+ * @returns {Promise<*>} Final result of the method, once every chunk has been handled
+ */
+async function requestAccessEventStream(method, params, onChunk) {
+  let handled = Promise.resolve();
+  const result = await getAccessWindowPool().request(method, params, {
+    onChunk: (chunk) => {
+      if (chunk.events) {
+        chunk.events.forEach(event => {
           event.time = new Date(event.time);
         });
-        resolve(events);
-      } catch (parseError) {
-        reject(new Error(`Failed to parse JSON output: ${parseError.message}`));
       }
-    });
+      handled = handled.then(() => onChunk(chunk));
+      // A failed handler is reported when the stream is awaited below
+      handled.catch(() => {});
+    }
   });
+  await handled;
+  return result;
+}
+
+/**
+ * Stream the events of every location x satellite pair, one satellite at a time
+ * @param {Function} onEvents - Async handler called with the events of each satellite as they are computed
+ * @returns {Promise<Object>} Summary with event_count
+ */
+async function streamAccessEventsBatch(locations, satellites, startUtc, endUtc, onEvents, elevationDeg = 10.0, stepSeconds = 30) {
+  return requestAccessEventStream('batch_events_stream', {
+    locations,
+    satellites: satellites.map(sat => ({
+      satellite_id: sat.satellite_id.toString(),
+      tle_1: sat.tle_1,
+      tle_2: sat.tle_2
+    })),
+    start_utc: startUtc.toISOString(),
+    end_utc: endUtc.toISOString(),
+    elevation_deg: elevationDeg,
+    step_seconds: stepSeconds,
+    workers: COMPUTE_WORKERS
+  }, ({ events }) => onEvents(events));
+}
+
+/**
+ * Stream an incremental run (see computeAccessEventsIncremental), one satellite at a time
+ * @param {Object} handlers
+ * @param {Function} handlers.onRecomputedPairs - Async handler called with the keys of the new or changed
+ *   pairs before any event, so their stored events can be dropped first
+ * @param {Function} handlers.onEvents - Async handler called with the events of each satellite
+ * @returns {Promise<Object>} Incremental result without events (state, recomputed_pairs, pairs_computed, pairs_skipped, pairs_failed)
+ */
+async function streamAccessEventsIncremental(locations, satellites, startUtc, endUtc, state, { onRecomputedPairs, onEvents }, elevationDeg = 10.0, stepSeconds = 30, refreshMarginSeconds = null) {
+  return requestAccessEventStream('incremental_events_stream', {
+    locations,
+    satellites: satellites.map(sat => ({
+      satellite_id: sat.satellite_id.toString(),
+      tle_1: sat.tle_1,
+      tle_2: sat.tle_2
+    })),
+    start_utc: startUtc.toISOString(),
+    end_utc: endUtc.toISOString(),
+    state,
+    elevation_deg: elevationDeg,
+    step_seconds: stepSeconds,
+    workers: COMPUTE_WORKERS,
+    refresh_margin_seconds: refreshMarginSeconds
+  }, (chunk) => (chunk.recomputed_pairs ? onRecomputedPairs(chunk.recomputed_pairs) : onEvents(chunk.events)));
+}
+
+/**
+ * Compute access windows for every location x satellite pair and store their events in InfluxDB
+ * @param {Object} [options]
+ * @param {boolean} [options.incremental=false] - Only compute the horizon not covered by the previous
+ *   run for unchanged pairs; pairs with a changed TLE or location are recomputed in full and their
+ *   stored future events replaced
+ * @param {boolean} [options.changedOnly=false] - With incremental, only extend unchanged pairs whose
+ *   stored events end within ACCESS_WINDOW_REFRESH_MARGIN_HOURS of the horizon (for frequent runs
+ *   triggered by TLE or location changes)
+ * @returns {Promise<Object>} Summary of the run
+ */
+async function calculateAndStoreAccessWindows({ incremental = false, changedOnly = false } = {}) {
+  // Overlapping incremental runs would read the same watermarks and store the same slice twice
+  if (incremental && incrementalRun) {
+    console.log('Incremental access window calculation already running, waiting for it');
+    return incrementalRun;
+  }
+  const run = storeAccessWindows(incremental, changedOnly);
+  if (incremental) {
+    incrementalRun = run.finally(() => {
+      incrementalRun = null;
+    });
+    return incrementalRun;
+  }
+  return run;
 }
 
-async function calculateAndStoreAccessWindows() {
-  console.log('Starting access window calculation...');
+async function storeAccessWindows(incremental, changedOnly) {
+  console.log(`Starting ${incremental ? 'incremental ' : ''}access window calculation...`);
   
   let pgClient;
   let influxClient;
@@ -216,140 +373,127 @@ async function calculateAndStoreAccessWindows() {
     console.log(`Calculating access windows from ${startTime} to ${endTime}`);
     
     const totalCombinations = (groundStations.length + targets.length) * satellites.length;
-    let processed = 0;
     
-    // Process each ground station - satellite combination
-    for (const gs of groundStations) {
-      for (const sat of satellites) {
-        try {
-          console.log(`Processing GS ${gs.name} -> ${sat.name} (${processed + 1}/${totalCombinations})`);
-          
-          // Calculate access events
-          const tleLines = [sat.tle_1, sat.tle_2];
-          const accessEvents = await computeAccessEvents(
-            parseFloat(gs.latitude),
-            parseFloat(gs.longitude),
-            tleLines,
-            startTime,
-            endTime,
-            sat.satellite_id,
-            gs.gs_id,
-            'ground_station',
-            10.0,
-            30
-          );
-          
-          // Store each access event in InfluxDB
-          for (const event of accessEvents) {
-            const point = new Point("access_event")
-              .tag("satellite_id", event.satellite_id)
-              .tag("satellite_name", sat.name)
-              .tag("satellite_mission", sat.mission)
-              .tag("location_id", event.location_id)
-              .tag("location_name", gs.name)
-              .tag("location_type", event.location_type)
-              .tag("event_type", event.event_type)
-              .floatField("elevation", event.elevation)
-              .floatField("azimuth", event.azimuth)
-              .floatField("ground_station_lat", parseFloat(gs.latitude))
-              .floatField("ground_station_lon", parseFloat(gs.longitude))
-              .floatField("ground_station_alt", parseFloat(gs.altitude))
-              .booleanField("planned", true) // Default to true for new access windows
-              .timestamp(event.time);
-            
-            // Add window-level fields for access_start events
-            if (event.event_type === 'access_start') {
-              point.floatField("window_duration_minutes", event.window_duration_minutes);
-              point.floatField("max_elevation", event.max_elevation);
-            }
-            
-            writeApi.writePoint(point);
-          }
-          
-          const windowCount = accessEvents.filter(e => e.event_type === 'access_start').length;
-          console.log(`  Found ${accessEvents.length} events (${windowCount} windows)`);
-          processed++;
-          
-        } catch (error) {
-          console.error(`Error processing GS ${gs.name} -> ${sat.name}: ${error.message}`);
-          processed++;
-          continue;
+    // Compute every location x satellite pair in one batch so each satellite is propagated once
+    const locations = [
+      ...groundStations.map(gs => ({
+        location_id: gs.gs_id.toString(),
+        location_type: 'ground_station',
+        latitude: parseFloat(gs.latitude),
+        longitude: parseFloat(gs.longitude),
+        altitude: parseFloat(gs.altitude) || 0.0,
+        horizon_mask: gs.horizon_mask
+      })),
+      ...targets.map(target => ({
+        location_id: target.target_id.toString(),
+        location_type: 'target',
+        latitude: parseFloat(target.latitude),
+        longitude: parseFloat(target.longitude),
+        altitude: parseFloat(target.altitude) || 0.0
+      }))
+    ];
+    const satellitesById = new Map(satellites.map(sat => [sat.satellite_id.toString(), sat]));
+    const groundStationsById = new Map(groundStations.map(gs => [gs.gs_id.toString(), gs]));
+    const targetsById = new Map(targets.map(target => [target.target_id.toString(), target]));
+    const pairsWithWindows = new Set();
+    let eventCount = 0;
+    let windowCount = 0;
+    
+    // Store each access event in InfluxDB as the worker streams them, one satellite at a time
+    const storeEvents = (accessEvents) => {
+      for (const event of accessEvents) {
+        const sat = satellitesById.get(event.satellite_id);
+        const point = new Point("access_event")
+          .tag("satellite_id", event.satellite_id)
+          .tag("satellite_name", sat.name)
+          .tag("satellite_mission", sat.mission)
+          .tag("location_id", event.location_id)
+          .tag("location_type", event.location_type)
+          .tag("event_type", event.event_type)
+          .floatField("elevation", event.elevation)
+          .floatField("azimuth", event.azimuth)
+          .booleanField("planned", true) // Default to true for new access windows
+          .timestamp(event.time);
+        
+        if (event.location_type === 'ground_station') {
+          const gs = groundStationsById.get(event.location_id);
+          point.tag("location_name", gs.name)
+            .floatField("ground_station_lat", parseFloat(gs.latitude))
+            .floatField("ground_station_lon", parseFloat(gs.longitude))
+            .floatField("ground_station_alt", parseFloat(gs.altitude));
+        } else {
+          const target = targetsById.get(event.location_id);
+          point.tag("location_name", target.name)
+            .tag("target_type", target.target_type)
+            .tag("target_priority", target.priority)
+            .tag("target_status", target.status)
+            .floatField("target_lat", parseFloat(target.latitude))
+            .floatField("target_lon", parseFloat(target.longitude));
         }
+        
+        // Add window-level fields for access_start events
+        if (event.event_type === 'access_start') {
+          point.floatField("window_duration_minutes", event.window_duration_minutes);
+          point.floatField("max_elevation", event.max_elevation);
+          pairsWithWindows.add(`${event.location_type}:${event.location_id}:${event.satellite_id}`);
+          windowCount++;
+        }
+        
+        writeApi.writePoint(point);
       }
-    }
+      eventCount += accessEvents.length;
+    };
     
-    // Process each target - satellite combination
-    for (const target of targets) {
-      for (const sat of satellites) {
-        try {
-          console.log(`Processing Target ${target.name} -> ${sat.name} (${processed + 1}/${totalCombinations})`);
-          
-          // Calculate access events
-          const tleLines = [sat.tle_1, sat.tle_2];
-          const accessEvents = await computeAccessEvents(
-            parseFloat(target.latitude),
-            parseFloat(target.longitude),
-            tleLines,
-            startTime,
-            endTime,
-            sat.satellite_id,
-            target.target_id,
-            'target',
-            10.0,
-            30
-          );
-          
-          // Store each access event in InfluxDB
-          for (const event of accessEvents) {
-            const point = new Point("access_event")
-              .tag("satellite_id", event.satellite_id)
-              .tag("satellite_name", sat.name)
-              .tag("satellite_mission", sat.mission)
-              .tag("location_id", event.location_id)
-              .tag("location_name", target.name)
-              .tag("location_type", event.location_type)
-              .tag("event_type", event.event_type)
-              .tag("target_type", target.target_type)
-              .tag("target_priority", target.priority)
-              .tag("target_status", target.status)
-              .floatField("elevation", event.elevation)
-              .floatField("azimuth", event.azimuth)
-              .floatField("target_lat", parseFloat(target.latitude))
-              .floatField("target_lon", parseFloat(target.longitude))
-              .booleanField("planned", true) // Default to true for new access windows
-              .timestamp(event.time);
-            
-            // Add window-level fields for access_start events
-            if (event.event_type === 'access_start') {
-              point.floatField("window_duration_minutes", event.window_duration_minutes);
-              point.floatField("max_elevation", event.max_elevation);
-            }
-            
-            writeApi.writePoint(point);
+    let incrementalResult = null;
+    if (incremental) {
+      const previousState = await loadAccessWindowState();
+      const refreshMarginSeconds = changedOnly ? ACCESS_WINDOW_REFRESH_MARGIN_HOURS * 3600 : null;
+      incrementalResult = await streamAccessEventsIncremental(locations, satellites, startTime, endTime, previousState, {
+        // Stored future events of new or changed pairs are replaced by the full recompute,
+        // so they are deleted before the first new event is written
+        onRecomputedPairs: async (recomputedPairs) => {
+          if (Object.keys(previousState).length === 0) {
+            await deleteAccessEvents(startTime);
+            return;
           }
-          
-          const windowCount = accessEvents.filter(e => e.event_type === 'access_start').length;
-          console.log(`  Found ${accessEvents.length} events (${windowCount} windows)`);
-          processed++;
-          
-        } catch (error) {
-          console.error(`Error processing Target ${target.name} -> ${sat.name}: ${error.message}`);
-          processed++;
-          continue;
-        }
-      }
+          for (const key of recomputedPairs) {
+            const [locationType, locationId, satelliteId] = key.split(':');
+            await deleteAccessEvents(startTime, {
+              location_type: locationType,
+              location_id: locationId,
+              satellite_id: satelliteId
+            });
+            await invalidateAccessWindowCache(satelliteId, locationId);
+          }
+        },
+        onEvents: storeEvents
+      }, 10.0, 30, refreshMarginSeconds);
+      
+      console.log(`Incremental run: ${incrementalResult.pairs_computed} pairs computed ` +
+        `(${incrementalResult.recomputed_pairs.length} in full), ${incrementalResult.pairs_skipped} up to date, ` +
+        `${incrementalResult.pairs_failed} failed`);
+    } else {
+      await streamAccessEventsBatch(locations, satellites, startTime, endTime, storeEvents, 10.0, 30);
     }
     
+    console.log(`Found ${eventCount} events (${windowCount} windows) across ${pairsWithWindows.size} pairs`);
+    
     // Flush all writes
     await writeApi.close();
     
-    console.log(`Completed processing ${processed}/${totalCombinations} combinations`);
+    // Advance the watermarks only once the events are stored
+    if (incrementalResult) {
+      await saveAccessWindowState(incrementalResult.state);
+    }
+    
+    console.log(`Completed processing ${totalCombinations} combinations`);
     console.log('Access window calculation completed successfully!');
     
     return {
       status: 'completed',
-      combinations_processed: processed,
-      total_combinations: totalCombinations
+      combinations_processed: incrementalResult ? incrementalResult.pairs_computed : totalCombinations,
+      total_combinations: totalCombinations,
+      recomputed_combinations: incrementalResult ? incrementalResult.recomputed_pairs.length : totalCombinations
     };
     
   } catch (error) {
@@ -366,5 +510,9 @@ async function calculateAndStoreAccessWindows() {
 module.exports = {
   calculateAndStoreAccessWindows,
   computeAccessEvents,
-  computeAccessWindows
+  computeAccessEventsBatch,
+  computeAccessEventsIncremental,
+  computeAccessWindows,
+  streamAccessEventsBatch,
+  streamAccessEventsIncremental
 };
\ No newline at end of file
@@ -7,6 +7,7 @@ const {
   getAccessWindowsForGroundStation,
   invalidateAccessWindowCache 
 } = require('./accessWindowCompat');
+const { calculateAndStoreAccessWindows } = require('./accessWindowInit');
 const { 
   broadcastCacheWarmingComplete,
   getConnectedClientsCount 
@@ -105,6 +106,20 @@ async function warmAccessWindowCache() {
   }
 }
 
+/**
+ * Extend the stored access windows to the full horizon
+ * Incremental and change-driven: pairs with a changed TLE or location are recomputed in full,
+ * unchanged pairs are only extended once their stored events near the end of the horizon
+ */
+async function refreshAccessWindows() {
+  try {
+    const results = await calculateAndStoreAccessWindows({ incremental: true, changedOnly: true });
+    console.log(`✅ Access windows refreshed: ${results.combinations_processed}/${results.total_combinations} pairs computed, ${results.recomputed_combinations} in full`);
+  } catch (error) {
+    console.error('❌ Error during access window refresh:', error);
+  }
+}
+
 /**
  * Clean up expired cache entries
  * Removes stale access window cache entries older than the current time
@@ -130,7 +145,8 @@ function startBackgroundJobs() {
   
   // Cache warming job - runs every 15 minutes
   const cacheWarmingJob = cron.schedule('*/15 * * * *', async () => {
-    console.log('⏰ Triggered: Access window cache warming');
+    console.log('⏰ Triggered: Access window refresh and cache warming');
+    await refreshAccessWindows();
     await warmAccessWindowCache();
   }, {
     scheduled: true,
@@ -147,7 +163,7 @@ function startBackgroundJobs() {
   });
   
   console.log('📅 Scheduled jobs:');
-  console.log('   - Cache warming: Every 15 minutes');
+  console.log('   - Access window refresh + cache warming: Every 15 minutes');
   console.log('   - Cache cleanup: Every hour at :30');
   
   // Run initial cache warming after a 30-second delay
@@ -183,5 +199,6 @@ module.exports = {
   startBackgroundJobs,
   stopBackgroundJobs,
   warmAccessWindowCache,
+  refreshAccessWindows,
   cleanupExpiredCache
 };
\ No newline at end of file
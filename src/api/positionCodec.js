@@ -0,0 +1,186 @@
+// Position Codec for Mission Planner API
+// Reads satellite_positions:{id} values written by satellite/positions.py in either the
+// compact binary format (see encode_positions there) or the legacy JSON format
+
+const POSITIONS_MAGIC = 'SPOS';
+const POSITIONS_FORMAT_VERSION = 1;
+// magic(4) version(1) flags(1) reserved(2) count(4) start_epoch(8) step(8) metadata_length(4)
+const HEADER_SIZE = 32;
+
+/**
+ * Check whether a Redis value uses the binary position format
+ * @param {Buffer} buffer - Raw Redis value
+ * @returns {boolean} True for binary-encoded positions
+ */
+function isEncodedPositions(buffer) {
+  return Buffer.isBuffer(buffer) && buffer.length >= HEADER_SIZE &&
+    buffer.toString('latin1', 0, 4) === POSITIONS_MAGIC;
+}
+
+/**
+ * Decode a binary positions value into its header, metadata and float32 columns
+ * @param {Buffer} buffer - Raw Redis value
+ * @returns {Object} Metadata plus startEpoch, stepSeconds, count and latitude/longitude/altitude arrays
+ */
+function decodePositionArrays(buffer) {
+  const version = buffer.readUInt8(4);
+  if (version !== POSITIONS_FORMAT_VERSION) {
+    throw new Error(`Unsupported positions format version ${version}`);
+  }
+
+  const count = buffer.readUInt32LE(8);
+  const metadataLength = buffer.readUInt32LE(28);
+  const metadata = JSON.parse(buffer.toString('utf8', HEADER_SIZE, HEADER_SIZE + metadataLength));
+
+  // Copy the columns so the Float32Array is aligned regardless of the metadata length
+  const columnBytes = buffer.subarray(HEADER_SIZE + metadataLength, HEADER_SIZE + metadataLength + 12 * count);
+  const columns = new Float32Array(new Uint8Array(columnBytes).buffer);
+
+  return {
+    ...metadata,
+    startEpoch: buffer.readDoubleLE(12),
+    stepSeconds: buffer.readDoubleLE(20),
+    count,
+    latitude: columns.subarray(0, count),
+    longitude: columns.subarray(count, 2 * count),
+    altitude: columns.subarray(2 * count, 3 * count)
+  };
+}
+
+/**
+ * Format a time as the naive UTC ISO string Python's datetime.isoformat() writes, so binary
+ * and JSON positions carry identical timestamps (no fraction for whole seconds, microseconds otherwise).
+ * Works from epoch seconds rather than a Date, which would cut the fraction to milliseconds
+ * @param {number} epoch - Unix time in seconds
+ * @returns {string} ISO string without time zone
+ */
+function naiveIsoformat(epoch) {
+  let seconds = Math.floor(epoch);
+  let micros = Math.round((epoch - seconds) * 1e6);
+  if (micros === 1e6) {
+    seconds += 1;
+    micros = 0;
+  }
+  const iso = new Date(seconds * 1000).toISOString().slice(0, 19);
+  return micros ? `${iso}.${String(micros).padStart(6, '0')}` : iso;
+}
+
+/**
+ * Build the position record for one sample, matching the legacy JSON layout
+ * @param {Object} arrays - Output of decodePositionArrays
+ * @param {number} index - Sample index
+ * @returns {Object} Position record
+ */
+function positionAt(arrays, index) {
+  const epoch = arrays.startEpoch + index * arrays.stepSeconds;
+  const valid = !Number.isNaN(arrays.latitude[index]);
+  const position = {
+    timestamp: naiveIsoformat(epoch),
+    latitude: valid ? arrays.latitude[index] : null,
+    longitude: valid ? arrays.longitude[index] : null,
+    altitude_km: valid ? arrays.altitude[index] : null,
+    unix_timestamp: Math.floor(epoch)
+  };
+  if (arrays.errors && arrays.errors[index] !== undefined) {
+    position.error = arrays.errors[index];
+  }
+  return position;
+}
+
+/**
+ * Column arrays for either storage format, as returned by decodePositionArrays
+ * @param {Buffer} buffer - Raw Redis value (binary or JSON)
+ * @returns {Object} Position arrays
+ */
+function positionArrays(buffer) {
+  if (isEncodedPositions(buffer)) {
+    return decodePositionArrays(buffer);
+  }
+
+  const { positions, ...metadata } = JSON.parse(buffer.toString('utf8'));
+  const epoch = (position) => Date.parse(`${position.timestamp}Z`) / 1000;
+  const column = (key) => Float64Array.from(positions, (position) => (position[key] === null ? NaN : position[key]));
+  return {
+    ...metadata,
+    startEpoch: positions.length ? epoch(positions[0]) : 0,
+    stepSeconds: positions.length > 1 ? epoch(positions[1]) - epoch(positions[0]) : 0,
+    count: positions.length,
+    latitude: column('latitude'),
+    longitude: column('longitude'),
+    altitude: column('altitude_km')
+  };
+}
+
+/**
+ * Interpolate the position at any time inside the cached window. The bracketing
+ * samples come from index arithmetic on startEpoch/stepSeconds and are interpolated
+ * along the great circle between them (mirrors interpolate_position in positions.py)
+ * @param {Object} arrays - Output of positionArrays
+ * @param {Date} [when] - Requested time (default: now)
+ * @returns {Object|null} Position record, or null outside the window or next to a failed sample
+ */
+function interpolatePosition(arrays, when = new Date()) {
+  const epoch = when.getTime() / 1000;
+  const offset = arrays.stepSeconds ? (epoch - arrays.startEpoch) / arrays.stepSeconds : 0;
+  if (arrays.count === 0 || offset < 0 || offset > arrays.count - 1) {
+    return null;
+  }
+
+  const index = Math.min(Math.floor(offset), Math.max(arrays.count - 2, 0));
+  const next = Math.min(index + 1, arrays.count - 1);
+  const fraction = offset - index;
+  if (Number.isNaN(arrays.latitude[index]) || Number.isNaN(arrays.latitude[next])) {
+    return null;
+  }
+
+  const toVector = (i) => {
+    const lat = arrays.latitude[i] * Math.PI / 180;
+    const lon = arrays.longitude[i] * Math.PI / 180;
+    return [Math.cos(lat) * Math.cos(lon), Math.cos(lat) * Math.sin(lon), Math.sin(lat)];
+  };
+  const a = toVector(index);
+  const b = toVector(next);
+  const [x, y, z] = a.map((value, axis) => value + fraction * (b[axis] - value));
+
+  return {
+    timestamp: naiveIsoformat(epoch),
+    latitude: Math.atan2(z, Math.hypot(x, y)) * 180 / Math.PI,
+    longitude: Math.atan2(y, x) * 180 / Math.PI,
+    altitude_km: arrays.altitude[index] + fraction * (arrays.altitude[next] - arrays.altitude[index]),
+    unix_timestamp: Math.floor(epoch)
+  };
+}
+
+/**
+ * Decode a satellite_positions value into the legacy JSON response shape
+ * @param {Buffer} buffer - Raw Redis value (binary or JSON)
+ * @returns {Object} { satellite_id, satellite_name, positions, calculated_at, total_positions }
+ */
+function decodePositions(buffer) {
+  if (!isEncodedPositions(buffer)) {
+    return JSON.parse(buffer.toString('utf8'));
+  }
+
+  const arrays = decodePositionArrays(buffer);
+  const positions = [];
+  for (let i = 0; i < arrays.count; i++) {
+    positions.push(positionAt(arrays, i));
+  }
+
+  return {
+    satellite_id: arrays.satellite_id,
+    satellite_name: arrays.satellite_name,
+    positions,
+    calculated_at: arrays.calculated_at,
+    total_positions: arrays.count
+  };
+}
+
+module.exports = {
+  isEncodedPositions,
+  decodePositionArrays,
+  decodePositions,
+  positionArrays,
+  positionAt,
+  interpolatePosition
+};
@@ -0,0 +1,232 @@
+// Python Worker Pool for Mission Planner API
+// Keeps long-lived satellite/*.py --worker processes warm and dispatches JSON-line requests to them
+
+const { spawn } = require('child_process');
+const path = require('path');
+const os = require('os');
+const readline = require('readline');
+
+const DEFAULT_POOL_SIZE = parseInt(process.env.PYTHON_WORKER_POOL_SIZE, 10) || Math.min(4, os.cpus().length);
+
+// Processes a single batch request may shard its satellites across inside Python; every pool
+// worker may be sharding at once, so by default they share the cores between them
+const COMPUTE_WORKERS = parseInt(process.env.SATELLITE_COMPUTE_WORKERS, 10) ||
+  Math.max(1, Math.floor(os.cpus().length / DEFAULT_POOL_SIZE));
+
+/**
+ * Pool of persistent Python worker processes speaking the JSON-lines protocol
+ * implemented in satellite/worker.py
+ */
+class PythonWorkerPool {
+  /**
+   * @param {string} scriptPath - Python script started with --worker
+   * @param {Object} options - Pool options
+   * @param {number} options.size - Number of worker processes
+   * @param {string} options.pythonPath - Python interpreter to use
+   */
+  constructor(scriptPath, { size = DEFAULT_POOL_SIZE, pythonPath = 'python3' } = {}) {
+    this.scriptPath = scriptPath;
+    this.pythonPath = pythonPath;
+    this.name = path.basename(scriptPath);
+    this.workers = new Array(size).fill(null);
+    this.nextRequestId = 1;
+    this.closed = false;
+  }
+
+  /**
+   * Start a worker process in the given slot
+   * @param {number} slot - Index in the pool
+   * @returns {Object} Worker state
+   */
+  spawnWorker(slot) {
+    const child = spawn(this.pythonPath, [this.scriptPath, '--worker']);
+    const worker = { child, pending: new Map(), stderr: '' };
+
+    readline.createInterface({ input: child.stdout }).on('line', (line) => {
+      let response;
+      try {
+        response = JSON.parse(line);
+      } catch (parseError) {
+        console.error(`${this.name} worker emitted invalid JSON: ${line}`);
+        return;
+      }
+
+      const request = worker.pending.get(response.id);
+      if (!request) {
+        return;
+      }
+      // Streamed methods send their result in chunks ahead of the final reply
+      if ('chunk' in response) {
+        if (request.onChunk) {
+          request.onChunk(response.chunk);
+        }
+        return;
+      }
+      worker.pending.delete(response.id);
+
+      if (response.error) {
+        request.reject(new Error(`Python worker error: ${response.error}`));
+      } else {
+        request.resolve(response.result);
+      }
+    });
+
+    child.stderr.on('data', (data) => {
+      // Keep only the tail of stderr for error reporting
+      worker.stderr = (worker.stderr + data.toString()).slice(-4096);
+    });
+
+    const fail = (reason) => {
+      if (this.workers[slot] === worker) {
+        this.workers[slot] = null;
+      }
+      for (const request of worker.pending.values()) {
+        request.reject(new Error(`${this.name} worker ${reason}: ${worker.stderr}`));
+      }
+      worker.pending.clear();
+    };
+
+    child.on('exit', (code) => fail(`exited with code ${code}`));
+    child.on('error', (error) => fail(`failed to start (${error.message})`));
+
+    this.workers[slot] = worker;
+    return worker;
+  }
+
+  /**
+   * Pick the worker with the fewest outstanding requests, starting it if needed
+   * @returns {Object} Worker state
+   */
+  acquireWorker() {
+    let bestSlot = 0;
+    for (let slot = 0; slot < this.workers.length; slot++) {
+      const worker = this.workers[slot];
+      if (!worker) {
+        return this.spawnWorker(slot);
+      }
+      if (worker.pending.size < this.workers[bestSlot].pending.size) {
+        bestSlot = slot;
+      }
+    }
+    return this.workers[bestSlot];
+  }
+
+  /**
+   * Send a request to a worker
+   * @param {string} method - Worker method name
+   * @param {Object} params - Keyword arguments for the method
+   * @param {Object} [options]
+   * @param {Function} [options.onChunk] - Called with every chunk of a streamed method, in order
+   * @returns {Promise<*>} Method result
+   */
+  request(method, params, { onChunk = null } = {}) {
+    if (this.closed) {
+      return Promise.reject(new Error(`${this.name} worker pool is closed`));
+    }
+
+    const worker = this.acquireWorker();
+    const id = this.nextRequestId++;
+
+    return new Promise((resolve, reject) => {
+      worker.pending.set(id, { resolve, reject, onChunk });
+      worker.child.stdin.write(JSON.stringify({ id, method, params }) + '\n');
+    });
+  }
+
+  /**
+   * Send a request to every running worker (e.g. to collect their metrics)
+   * @param {string} method - Worker method name
+   * @param {Object} params - Keyword arguments for the method
+   * @returns {Promise<Array>} Results of the running workers, in slot order
+   */
+  requestAll(method, params) {
+    if (this.closed) {
+      return Promise.reject(new Error(`${this.name} worker pool is closed`));
+    }
+
+    return Promise.all(this.workers.filter((worker) => worker).map((worker) => {
+      const id = this.nextRequestId++;
+      return new Promise((resolve, reject) => {
+        worker.pending.set(id, { resolve, reject });
+        worker.child.stdin.write(JSON.stringify({ id, method, params }) + '\n');
+      });
+    }));
+  }
+
+  /**
+   * Stop all worker processes
+   */
+  close() {
+    this.closed = true;
+    for (const worker of this.workers) {
+      if (worker) {
+        worker.child.stdin.end();
+      }
+    }
+  }
+}
+
+let accessWindowPool = null;
+let positionsPool = null;
+
+/**
+ * Get the shared pool of accesswindow.py workers
+ * @returns {PythonWorkerPool} Worker pool
+ */
+function getAccessWindowPool() {
+  if (!accessWindowPool) {
+    accessWindowPool = new PythonWorkerPool(path.join(__dirname, 'satellite', 'accesswindow.py'));
+  }
+  return accessWindowPool;
+}
+
+/**
+ * Get the shared positions.py worker (one process; the refresh is a single batched request)
+ * @returns {PythonWorkerPool} Worker pool
+ */
+function getPositionsPool() {
+  if (!positionsPool) {
+    positionsPool = new PythonWorkerPool(path.join(__dirname, 'satellite', 'positions.py'), {
+      size: 1,
+      pythonPath: '/opt/venv/bin/python'
+    });
+  }
+  return positionsPool;
+}
+
+/**
+ * Prometheus text of the per-stage metrics of every running satellite worker
+ * @returns {Promise<string>} Concatenated exposition text (empty if no worker has started)
+ */
+async function getWorkerMetricsText() {
+  const texts = [];
+  for (const pool of [accessWindowPool, positionsPool]) {
+    if (pool && !pool.closed) {
+      const results = await pool.requestAll('metrics', { format: 'prometheus' });
+      texts.push(...results.map((result) => result.text));
+    }
+  }
+  return texts.join('');
+}
+
+/**
+ * Stop all shared worker pools
+ */
+function closeWorkerPools() {
+  for (const pool of [accessWindowPool, positionsPool]) {
+    if (pool) {
+      pool.close();
+    }
+  }
+  accessWindowPool = null;
+  positionsPool = null;
+}
+
+module.exports = {
+  COMPUTE_WORKERS,
+  PythonWorkerPool,
+  getAccessWindowPool,
+  getPositionsPool,
+  getWorkerMetricsText,
+  closeWorkerPools
+};
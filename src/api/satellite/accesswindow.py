@@ -4,13 +4,740 @@ This script computes access windows for a satellite over a given ground location
 Can be used as a command-line tool or imported as a module.
 """
 import argparse
+import functools
+import hashlib
+import os
 import sys
 import json
-from skyfield.api import EarthSatellite, load, wgs84
+import numpy as np
 from datetime import datetime, timedelta
 
+import metrics
+from passcache import PASS_CACHE_ENABLED, get_pass_cache
+from tlecache import get_timescale, load_satellite
 
-def compute_access_windows(lat, lon, tle_lines, start_utc, end_utc, elevation_deg=10.0, step_seconds=30):
+
+# Golden-section ratio used to refine culminations
+GOLDEN_RATIO = (np.sqrt(5.0) - 1.0) / 2.0
+
+# Output formats written one event per line by write_event_stream
+STREAM_FORMATS = ('ndjson', 'line_protocol')
+
+# Pre-filter constants: visibility is checked per block of samples before any fine propagation
+PREFILTER_BLOCK_SECONDS = 600.0
+PREFILTER_MARGIN_DEG = 0.5  # covers geodetic vs geocentric vertical (< 0.2 deg)
+EARTH_POLAR_RADIUS_KM = 6356.752
+EARTH_ROTATION_RAD_PER_S = 7.2921159e-5
+
+# Farthest a location can be from the Earth's center (equatorial radius plus the highest sites), km
+MAX_LOCATION_RADIUS_KM = 6378.137 + 9.0
+
+def _time_grid(start_utc, end_utc, step_seconds):
+    """
+    Build the sample grid for [start_utc, end_utc].
+    
+    Returns:
+        (start of grid as datetime, offsets in seconds from it as NumPy array)
+    """
+    grid_start = start_utc.replace(microsecond=0)
+    span_seconds = (end_utc - start_utc).total_seconds()
+    if span_seconds < 0:
+        return grid_start, np.empty(0)
+    offsets = np.arange(int(span_seconds // step_seconds) + 1) * float(step_seconds)
+    return grid_start, offsets
+
+
+def _grid_step(offsets):
+    """Spacing of a time grid in seconds (0 for a single sample)."""
+    return float(offsets[1] - offsets[0]) if offsets.size > 1 else 0.0
+
+
+def _location_frame(lat, lon, altitude_m=0.0):
+    """
+    Return the ITRS position (km) of a ground location and the rotation from ITRS into its
+    local east/north/up frame.
+    """
+    from skyfield.toposlib import wgs84
+    
+    lat_rad, lon_rad = np.radians(lat), np.radians(lon)
+    sin_lat, cos_lat = np.sin(lat_rad), np.cos(lat_rad)
+    sin_lon, cos_lon = np.sin(lon_rad), np.cos(lon_rad)
+    rotation = np.array([
+        [-sin_lon, cos_lon, 0.0],
+        [-sin_lat * cos_lon, -sin_lat * sin_lon, cos_lat],
+        [cos_lat * cos_lon, cos_lat * sin_lon, sin_lat]
+    ])
+    return wgs84.latlon(lat, lon, elevation_m=altitude_m).itrs_xyz.km, rotation
+
+
+def _horizon_visibility(horizon_mask, elevation_deg):
+    """
+    Build the visibility test for an azimuth-dependent horizon mask.
+    
+    Args:
+        horizon_mask: [[azimuth_deg, min_elevation_deg], ...] points, linearly
+            interpolated in azimuth (wrapping at 360 deg); None or empty for no mask
+        elevation_deg: Global minimum elevation, applied wherever the mask is lower
+    
+    Returns:
+        None without a mask, otherwise a function mapping (elevation, azimuth) arrays to an
+        effective elevation that is >= elevation_deg exactly where the satellite clears
+        both the mask and elevation_deg
+    """
+    if not horizon_mask:
+        return None
+    points = np.asarray(horizon_mask, dtype=float).reshape(-1, 2)
+    azimuths, limits = points[:, 0] % 360.0, points[:, 1]
+    
+    def visibility(elevation, azimuth):
+        mask = np.interp(azimuth, azimuths, limits, period=360.0)
+        return elevation - np.maximum(mask - elevation_deg, 0.0)
+    return visibility
+
+
+def _location_inputs(location):
+    """Altitude (m) and horizon mask of a batch location dictionary."""
+    return float(location.get('altitude') or 0.0), location.get('horizon_mask')
+
+
+def _satellite_itrs(ts, satellite, grid_start, offsets):
+    """Propagate a satellite to every offset (seconds from grid_start) in one call; returns ITRS km, shape (3, n)."""
+    from skyfield.framelib import itrs
+    
+    with metrics.stage('propagation'):
+        times = ts.utc(grid_start.year, grid_start.month, grid_start.day,
+                       grid_start.hour, grid_start.minute, grid_start.second + offsets)
+        satellite_itrs = satellite.at(times).frame_xyz(itrs).km
+    metrics.count('propagations', len(offsets))
+    return satellite_itrs
+
+
+def _altaz_from_itrs(satellite_itrs, frame):
+    """Elevation and azimuth (degrees) of ITRS satellite positions as seen from a location frame."""
+    with metrics.stage('altaz'):
+        location_itrs, rotation = frame
+        east, north, up = rotation @ (satellite_itrs - location_itrs[:, None])
+        elevation = np.degrees(np.arctan2(up, np.hypot(east, north)))
+        azimuth = np.degrees(np.arctan2(east, north)) % 360.0
+    return elevation, azimuth
+
+
+def _altaz_evaluator(ts, satellite, frames, grid_start):
+    """
+    Build a function mapping offsets (seconds from grid_start) and, per offset, the index of
+    the location frame it is seen from to (elevation, azimuth) arrays.
+    
+    Every call propagates all requested offsets as one Skyfield Time array, whatever the
+    number of locations involved.
+    """
+    def evaluate(offsets, frame_indices):
+        elevation = np.empty(offsets.size)
+        azimuth = np.empty(offsets.size)
+        if not offsets.size:
+            return elevation, azimuth
+        satellite_itrs = _satellite_itrs(ts, satellite, grid_start, offsets)
+        for index in np.unique(frame_indices).tolist():
+            selected = frame_indices == index
+            elevation[selected], azimuth[selected] = _altaz_from_itrs(satellite_itrs[:, selected], frames[index])
+        return elevation, azimuth
+    return evaluate
+
+
+def _visibility_bounds(satrec, elevation_deg):
+    """
+    Conservative visibility limits for one satellite, derived from its mean elements.
+    
+    Returns:
+        (maximum Earth-central angle between sub-satellite point and a location that can
+        see it at elevation_deg, maximum angular rate of the sub-satellite point in rad/s,
+        maximum sub-satellite latitude in radians)
+    """
+    apogee_km = (satrec.alta + 1.0) * satrec.radiusearthkm * 1.02
+    min_elevation = np.radians(elevation_deg - PREFILTER_MARGIN_DEG)
+    # Spherical-Earth visibility cone; the polar radius gives the widest cone for any location
+    ground_range = np.arccos(np.clip(EARTH_POLAR_RADIUS_KM / apogee_km * np.cos(min_elevation), -1.0, 1.0))
+    ground_range -= min_elevation
+    
+    # Angular rate peaks at perigee; Earth rotation adds to it in the Earth-fixed frame
+    mean_motion = satrec.no_kozai / 60.0
+    eccentricity = satrec.ecco
+    rate = mean_motion * (1.0 + eccentricity) ** 2 / (1.0 - eccentricity ** 2) ** 1.5
+    rate = 1.1 * (rate + EARTH_ROTATION_RAD_PER_S)
+    
+    max_latitude = min(satrec.inclo, np.pi - satrec.inclo)
+    return ground_range, rate, max_latitude
+
+
+def _mask_bounds(horizon_mask, elevation_deg):
+    """
+    Highest threshold and steepest slope of a horizon mask, for _climb_time.
+    
+    Returns:
+        (highest elevation at which the satellite can still be hidden, in degrees; largest
+        change of the mask per degree of azimuth)
+    """
+    if not horizon_mask:
+        return elevation_deg, 0.0
+    points = np.asarray(horizon_mask, dtype=float).reshape(-1, 2)
+    order = np.argsort(points[:, 0] % 360.0, kind='stable')
+    azimuths, limits = points[order, 0] % 360.0, points[order, 1]
+    widths = np.diff(np.append(azimuths, azimuths[0] + 360.0))
+    changes = np.abs(np.diff(np.append(limits, limits[0])))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = float(np.max(np.where(changes > 0, changes / widths, 0.0)))
+    return max(elevation_deg, float(limits.max())), slope
+
+
+def _climb_time(satrec, elevation_deg, mask_bounds):
+    """
+    Lower bound on the time a satellite needs to climb from an effective elevation to elevation_deg.
+    
+    Below the threshold the line of sight turns at most at the satellite's speed relative
+    to the ground over its slant range, and the range grows as the elevation drops, so
+    the climb from elevation e takes at least the integral of range over speed from e up
+    to the threshold (the same holds for the descent after a pass). The bound is
+    conservative: perigee speed plus Earth rotation, the lowest perigee and the largest
+    location radius, with margins. With a horizon mask (mask_bounds, see _mask_bounds)
+    the range is taken at the highest elevation the mask can hide and the azimuth motion
+    across the steepest slope of the mask is added.
+    
+    Returns:
+        Function mapping effective elevations (degrees) to seconds
+    """
+    ceiling, slope = mask_bounds
+    radius_earth = satrec.radiusearthkm
+    eccentricity = satrec.ecco
+    perigee_km = (satrec.altp + 1.0) * radius_earth / 1.02
+    speed = satrec.no_kozai / 60.0 * satrec.a * radius_earth * np.sqrt((1.0 + eccentricity) / (1.0 - eccentricity))
+    speed = 1.1 * (speed + EARTH_ROTATION_RAD_PER_S * perigee_km)
+    cos_ceiling = np.cos(np.radians(ceiling))
+    if perigee_km <= MAX_LOCATION_RADIUS_KM or cos_ceiling <= 1e-3:
+        return lambda effective: np.zeros(np.shape(effective))
+    
+    grid = np.linspace(-90.0, elevation_deg, 1024)
+    elevation = np.radians(np.minimum(grid + (ceiling - elevation_deg), ceiling) + PREFILTER_MARGIN_DEG)
+    slant_range = (np.sqrt(perigee_km ** 2 - (MAX_LOCATION_RADIUS_KM * np.cos(elevation)) ** 2)
+                   - MAX_LOCATION_RADIUS_KM * np.sin(elevation))
+    seconds_per_radian = slant_range / (speed * (1.0 + slope / cos_ceiling))
+    # Cumulative from the threshold down (trapezoidal)
+    climb = np.append(np.cumsum((0.5 * (seconds_per_radian[1:] + seconds_per_radian[:-1])
+                                 * np.radians(np.diff(grid)))[::-1])[::-1], 0.0)
+    
+    def climb_time(effective):
+        # Value at the next grid point up, so the bound is never overestimated
+        return climb[np.clip(np.searchsorted(grid, effective), 0, grid.size - 1)]
+    return climb_time
+
+
+def _candidate_masks(ts, satellite, frames, grid_start, offsets, elevation_deg):
+    """
+    Mark the grid samples at which a satellite could possibly be visible from each location.
+    
+    Samples outside the masks are provably below elevation_deg. Whole pairs are ruled out
+    when the location lies beyond the satellite's latitude band plus its visibility cone;
+    otherwise the satellite is propagated only at block boundaries and a block is ruled out
+    when the sub-satellite point cannot get close enough within the block, given the
+    maximum angular rate.
+    """
+    ground_range, rate, max_latitude = _visibility_bounds(satellite.model, elevation_deg)
+    count = offsets.size
+    step = offsets[1] - offsets[0] if count > 1 else 0.0
+    block = max(1, int(round(PREFILTER_BLOCK_SECONDS / step))) if step else 1
+    boundaries = np.arange(0, count, block)
+    if boundaries[-1] != count - 1:
+        boundaries = np.append(boundaries, count - 1)
+    spans = np.diff(offsets[boundaries])
+    sample_block = np.minimum(np.arange(count) // block, max(spans.size - 1, 0))
+    
+    satellite_directions = None
+    masks = []
+    for location_itrs, _ in frames:
+        location_direction = location_itrs / np.linalg.norm(location_itrs)
+        if abs(np.arcsin(location_direction[2])) - max_latitude > ground_range:
+            masks.append(np.zeros(count, dtype=bool))
+            continue
+        if not spans.size:
+            masks.append(np.ones(count, dtype=bool))
+            continue
+        
+        if satellite_directions is None:
+            boundary_itrs = _satellite_itrs(ts, satellite, grid_start, offsets[boundaries])
+            satellite_directions = boundary_itrs / np.linalg.norm(boundary_itrs, axis=0)
+        angles = np.arccos(np.clip(location_direction @ satellite_directions, -1.0, 1.0))
+        
+        # Lower bound on the central angle anywhere inside each block
+        possible = 0.5 * (angles[:-1] + angles[1:] - rate * spans) <= ground_range
+        mask = possible[sample_block]
+        mask[boundaries[1:][possible]] = True
+        masks.append(mask)
+    
+    return masks
+
+
+def _location_series(ts, satellite, frames, grid_start, offsets, elevation_deg, prefilter=True):
+    """
+    Sample one satellite's elevation/azimuth over the grid for every location frame.
+    
+    The satellite is propagated once for all locations. With prefilter, only samples that
+    may be visible from some location are propagated; the others are reported at -90 deg.
+    
+    Returns:
+        List with an (elevation, azimuth) pair of arrays per frame, or None for pairs
+        that can never be visible
+    """
+    if not prefilter:
+        satellite_itrs = _satellite_itrs(ts, satellite, grid_start, offsets)
+        return [_altaz_from_itrs(satellite_itrs, frame) for frame in frames]
+    
+    with metrics.stage('prefilter'):
+        masks = _candidate_masks(ts, satellite, frames, grid_start, offsets, elevation_deg)
+    sampled = np.flatnonzero(np.logical_or.reduce(masks))
+    if not sampled.size:
+        return [None] * len(frames)
+    satellite_itrs = _satellite_itrs(ts, satellite, grid_start, offsets[sampled])
+    
+    series = []
+    for frame, mask in zip(frames, masks):
+        if not mask.any():
+            series.append(None)
+            continue
+        elevation = np.full(offsets.size, -90.0)
+        azimuth = np.zeros(offsets.size)
+        elevation[mask], azimuth[mask] = _altaz_from_itrs(satellite_itrs[:, mask[sampled]], frame)
+        series.append((elevation, azimuth))
+    return series
+
+
+def _find_access_segments(above):
+    """
+    Find contiguous runs of True in a boolean array.
+    
+    Returns:
+        (start indices, end indices) of each run, both inclusive
+    """
+    edges = np.diff(above.astype(np.int8))
+    starts = np.flatnonzero(edges == 1) + 1
+    ends = np.flatnonzero(edges == -1)
+    if above.size and above[0]:
+        starts = np.insert(starts, 0, 0)
+    if above.size and above[-1]:
+        ends = np.append(ends, above.size - 1)
+    return starts, ends
+
+
+def _segment_peaks(elevation, starts, ends):
+    """Index of the highest sample within each [start, end] segment."""
+    return np.array([start + int(np.argmax(elevation[start:end + 1]))
+                     for start, end in zip(starts.tolist(), ends.tolist())], dtype=np.int64)
+
+
+def _build_access_windows(grid_start, start_offsets, culmination_offsets, end_offsets, elevation, azimuth):
+    """
+    Assemble access window dictionaries from event offsets.
+    
+    elevation and azimuth hold the values at the start, culmination and end
+    offsets concatenated in that order.
+    """
+    count = len(start_offsets)
+    access_windows = []
+    for i in range(count):
+        events = [
+            {
+                'time': grid_start + timedelta(seconds=float(offsets[i])),
+                'event_type': event_type,
+                'elevation': float(elevation[k * count + i]),
+                'azimuth': float(azimuth[k * count + i])
+            }
+            for k, (event_type, offsets) in enumerate((('access_start', start_offsets),
+                                                        ('culmination', culmination_offsets),
+                                                        ('access_end', end_offsets)))
+        ]
+        access_windows.append({
+            'access_start': events[0]['time'],
+            'access_end': events[2]['time'],
+            'culmination': events[1]['time'],
+            'max_elevation': events[1]['elevation'],
+            'events': events
+        })
+    return access_windows
+
+
+def _windows_from_series(grid_start, offsets, elevation, azimuth, elevation_deg, visibility=None):
+    """Turn sampled elevation/azimuth series into access windows snapped to the grid."""
+    effective = visibility(elevation, azimuth) if visibility else elevation
+    starts, ends = _find_access_segments(effective >= elevation_deg)
+    peaks = _segment_peaks(elevation, starts, ends)
+    indices = np.concatenate([starts, peaks, ends]).astype(np.int64)
+    return _build_access_windows(grid_start, offsets[starts], offsets[peaks], offsets[ends],
+                                 elevation[indices], azimuth[indices])
+
+
+def _refine_crossings(evaluate, lo, hi, lo_above, elevation_deg, tolerance_seconds, lo_values, hi_values):
+    """
+    Narrow every [lo, hi] bracket straddling elevation_deg until no wider than tolerance_seconds.
+    
+    Each round probes two times tolerance_seconds apart around an estimate of the
+    crossing, so an estimate within half a tolerance closes the bracket at once. The
+    estimate interpolates the (effective) elevations at the bracket ends linearly; after
+    a round that did not halve a bracket its midpoint is used instead, so convergence is
+    never slower than bisection. All open brackets are probed together, one propagation
+    call per round.
+    
+    Args:
+        evaluate: Function mapping (times, bracket indices) to a tuple whose first
+            element holds the values compared with elevation_deg
+        lo_values, hi_values: Values at the bracket ends
+    
+    Returns:
+        The bracket end on the visible side, so events never fall below elevation_deg
+    """
+    lo = np.asarray(lo, dtype=float).copy()
+    hi = np.asarray(hi, dtype=float).copy()
+    lo_values = np.asarray(lo_values, dtype=float) - elevation_deg
+    hi_values = np.asarray(hi_values, dtype=float) - elevation_deg
+    half = 0.5 * tolerance_seconds
+    interpolate = np.ones(lo.size, dtype=bool)
+    open_ = hi - lo > tolerance_seconds
+    
+    while True:
+        brackets = np.flatnonzero(open_)
+        if not brackets.size:
+            return np.where(lo_above, lo, hi)
+        a, b, fa, fb = lo[brackets], hi[brackets], lo_values[brackets], hi_values[brackets]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            estimate = np.where(interpolate[brackets] & (fa != fb), a + (b - a) * fa / (fa - fb), 0.5 * (a + b))
+        estimate = np.clip(np.nan_to_num(estimate, nan=0.5 * (a + b)), a + half, b - half)
+        
+        values = evaluate(np.concatenate([estimate - half, estimate + half]),
+                          np.concatenate([brackets, brackets]))[0] - elevation_deg
+        left, right = values[:brackets.size], values[brackets.size:]
+        above = lo_above[brackets]
+        # The crossing lies in [a, left probe], between the probes, or in [right probe, b]
+        first = (left >= 0) != above
+        middle = ~first & ((right >= 0) != above)
+        new_lo = np.select([first, middle], [a, estimate - half], estimate + half)
+        new_hi = np.select([first, middle], [estimate - half, estimate + half], b)
+        lo_values[brackets] = np.select([first, middle], [fa, left], right)
+        hi_values[brackets] = np.select([first, middle], [left, right], fb)
+        interpolate[brackets] = new_hi - new_lo <= 0.5 * (b - a)
+        lo[brackets], hi[brackets] = new_lo, new_hi
+        # Closing the probe bracket explicitly keeps rounding from reopening it forever
+        open_[brackets] = ~middle & (new_hi - new_lo > tolerance_seconds)
+
+
+def _parabola_vertex(center, spacing, left, middle, right):
+    """Time of the vertex of the parabola through three equally spaced samples (NaN unless concave)."""
+    curvature = left - 2.0 * middle + right
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(curvature < 0, center + 0.5 * spacing * (left - right) / curvature, np.nan)
+
+
+def _refine_maxima(evaluate, lo, hi, tolerance_seconds, estimates):
+    """
+    Locate the maximum inside every unimodal [lo, hi] bracket to within half of tolerance_seconds.
+    
+    Each round evaluates an estimate of the maximum and the times half a tolerance either
+    side of it: if the estimate is the highest of the three, the maximum lies within half
+    a tolerance of it; otherwise the bracket is cut at the estimate. Estimates start from
+    estimates (e.g. a parabola through coarse samples) and continue with the vertex of
+    the parabola through the three probes, or the midpoint after a round that did not
+    halve a bracket. All open brackets are probed together, one propagation call per round.
+    
+    Args:
+        evaluate: Function mapping (times, bracket indices) to a tuple whose first
+            element holds the values to maximize
+        estimates: First estimate per bracket (NaN for the midpoint)
+    """
+    lo = np.asarray(lo, dtype=float).copy()
+    hi = np.asarray(hi, dtype=float).copy()
+    estimates = np.asarray(estimates, dtype=float).copy()
+    maxima = 0.5 * (lo + hi)
+    half = 0.5 * tolerance_seconds
+    open_ = hi - lo > tolerance_seconds
+    
+    while True:
+        brackets = np.flatnonzero(open_)
+        if not brackets.size:
+            return maxima
+        a, b = lo[brackets], hi[brackets]
+        estimate = np.clip(np.where(np.isnan(estimates[brackets]), 0.5 * (a + b), estimates[brackets]),
+                           a + half, b - half)
+        
+        values = evaluate(np.concatenate([estimate - half, estimate, estimate + half]),
+                          np.concatenate([brackets, brackets, brackets]))[0]
+        left, middle, right = np.split(values, 3)
+        found = (middle >= left) & (middle >= right)
+        maxima[brackets[found]] = estimate[found]
+        
+        new_lo = np.where(~found & (right > middle), estimate, a)
+        new_hi = np.where(~found & (right <= middle), estimate, b)
+        halved = new_hi - new_lo <= 0.5 * (b - a)
+        vertex = _parabola_vertex(estimate, half, left, middle, right)
+        estimates[brackets] = np.where(halved & (vertex > new_lo) & (vertex < new_hi), vertex, np.nan)
+        lo[brackets], hi[brackets] = new_lo, new_hi
+        
+        narrow = ~found & (new_hi - new_lo <= tolerance_seconds)
+        maxima[brackets[narrow]] = 0.5 * (new_lo[narrow] + new_hi[narrow])
+        open_[brackets[found | narrow]] = False
+
+
+def _find_hidden_passes(evaluate, climb, lo, hi, lo_values, hi_values, elevation_deg, tolerance_seconds):
+    """
+    Search [lo, hi] intervals whose ends are below elevation_deg for passes falling entirely inside them.
+    
+    A pass inside an interval must climb from its start to elevation_deg and descend to
+    its end, so an interval narrower than the two climb times (see _climb_time) cannot
+    hold one and is dropped. The others are split at their midpoint until a midpoint
+    reaches elevation_deg or the interval is no wider than tolerance_seconds; unlike a
+    local maximum search this does not assume a single peak, which a horizon mask breaks.
+    All open intervals are evaluated together, one propagation call per round.
+    
+    Args:
+        evaluate: Function mapping (times, interval indices) to a tuple whose first
+            element holds the values compared with elevation_deg
+        climb: Function mapping (values, interval indices) to climb times in seconds
+        lo_values, hi_values: Values at the interval ends
+    
+    Returns:
+        (interval indices, times, values) arrays for every pass found, where times and
+        values are (last time below, a time at or above, next time below) columns
+    """
+    origin = np.arange(np.size(lo))
+    lo, hi = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)
+    lo_values, hi_values = np.asarray(lo_values, dtype=float), np.asarray(hi_values, dtype=float)
+    found = []
+    
+    while True:
+        open_ = ((hi - lo > tolerance_seconds) &
+                 (climb(lo_values, origin) + climb(hi_values, origin) <= hi - lo))
+        if not open_.any():
+            break
+        origin, lo, hi, lo_values, hi_values = (x[open_] for x in (origin, lo, hi, lo_values, hi_values))
+        middle = 0.5 * (lo + hi)
+        middle_values = evaluate(middle, origin)[0]
+        above = middle_values >= elevation_deg
+        found.append((origin[above], np.stack([lo, middle, hi], axis=1)[above],
+                      np.stack([lo_values, middle_values, hi_values], axis=1)[above]))
+        below = ~above
+        origin = np.concatenate([origin[below], origin[below]])
+        lo, hi = np.concatenate([lo[below], middle[below]]), np.concatenate([middle[below], hi[below]])
+        lo_values, hi_values = (np.concatenate([lo_values[below], middle_values[below]]),
+                                np.concatenate([middle_values[below], hi_values[below]]))
+    
+    if not found:
+        return np.empty(0, dtype=np.int64), np.empty((0, 3)), np.empty((0, 3))
+    return tuple(np.concatenate(columns) for columns in zip(*found))
+
+
+def _refined_windows(evaluate, grid_start, offsets, series, elevation_deg, tolerance_seconds, visibilities,
+                     climb_times):
+    """
+    Turn the coarse elevation scans of one satellite from several locations into access
+    windows with sub-step event times.
+    
+    Culminations are searched around each coarse peak starting from the vertex of the
+    parabola through its samples (see _refine_maxima), and rise/set between the coarse
+    samples that straddle the threshold starting from a linear interpolation (see
+    _refine_crossings).
+    The steps either side of local maxima that stay below the threshold on the coarse
+    grid are searched too (see _find_hidden_passes), so short passes falling entirely
+    between two samples are not missed. A hidden pass must climb to the threshold and back
+    down within its step, so steps whose ends are further from the threshold than the
+    shortest possible climb and descent (see _climb_time) allow are skipped; this rules
+    out the many maxima far below the horizon. With a horizon mask (visibility), rise/set
+    and hidden passes follow the mask while culminations remain the true elevation maxima.
+    
+    The brackets of all locations are refined together, so every iteration is a single
+    propagation call however many locations there are.
+    
+    Args:
+        evaluate: Function mapping (offsets, location indices) to (elevation, azimuth)
+            arrays (see _altaz_evaluator)
+        series: (elevation, azimuth) arrays per location, or None for pairs ruled out
+        visibilities: Visibility function (see _horizon_visibility) or None per location
+        climb_times: Climb time bound (see _climb_time) per location
+    
+    Returns:
+        List of access windows per location (None for pairs ruled out)
+    """
+    last = offsets.size - 1
+    step = _grid_step(offsets)
+    
+    def effective_of(elevation, azimuth, locations):
+        effective = elevation.copy()
+        for index in np.unique(locations).tolist():
+            if visibilities[index]:
+                selected = locations == index
+                effective[selected] = visibilities[index](elevation[selected], azimuth[selected])
+        return effective
+    
+    def visible_evaluate(times, locations):
+        return (effective_of(*evaluate(times, locations), locations),)
+    
+    # Coarse segments, their peaks and hidden-pass intervals of every location, tagged with its index
+    starts, ends, peaks, intervals = [], [], [], []
+    elevations = np.full((len(series), offsets.size), np.nan)
+    effectives = np.full((len(series), offsets.size), np.nan)
+    candidate_count = 0
+    for index, (item, visibility, climb_time) in enumerate(zip(series, visibilities, climb_times)):
+        if item is None:
+            continue
+        elevation, azimuth = item
+        effective = visibility(elevation, azimuth) if visibility else elevation
+        elevations[index], effectives[index] = elevation, effective
+        location_starts, location_ends = _find_access_segments(effective >= elevation_deg)
+        # Coarse local maxima below the threshold that could hide a short pass
+        # (strict on the left so flat runs, such as pre-filtered samples, are not candidates)
+        inner = effective[1:-1]
+        location_hidden = np.flatnonzero((inner > effective[:-2]) & (inner >= effective[2:]) &
+                                         (inner < elevation_deg)) + 1
+        # Intervals either side of a candidate whose ends could climb to the threshold within them
+        # (pre-filtered samples, reported at -90 deg, are only known to be below the threshold)
+        climb = np.where(effective > -90.0, climb_time(effective), 0.0)
+        left = climb[location_hidden - 1] + climb[location_hidden] <= step
+        right = climb[location_hidden] + climb[location_hidden + 1] <= step
+        location_intervals = np.concatenate([location_hidden[left] - 1, location_hidden[right]])
+        candidate_count += int(np.count_nonzero(left | right))
+        for collected, indices in ((starts, location_starts), (ends, location_ends),
+                                   (peaks, _segment_peaks(elevation, location_starts, location_ends)),
+                                   (intervals, location_intervals)):
+            collected.append(np.stack([indices, np.full(indices.size, index)]).astype(np.int64))
+    if not starts:
+        return [None] * len(series)
+    (starts, start_locations), (ends, _), (peaks, peak_locations), (intervals, interval_locations) = (
+        np.concatenate(collected, axis=1) for collected in (starts, ends, peaks, intervals))
+    metrics.count('hidden_pass_candidates', candidate_count)
+    
+    def climb_of(values, locations):
+        climb = np.zeros(values.size)
+        for index in np.unique(locations).tolist():
+            selected = locations == index
+            climb[selected] = np.where(values[selected] > -90.0, climb_times[index](values[selected]), 0.0)
+        return climb
+    
+    found, times, values = _find_hidden_passes(
+        lambda times, found: visible_evaluate(times, interval_locations[found]),
+        lambda values, found: climb_of(values, interval_locations[found]),
+        offsets[intervals], offsets[intervals + 1],
+        effectives[interval_locations, intervals], effectives[interval_locations, intervals + 1],
+        elevation_deg,
+        tolerance_seconds
+    )
+    hidden_locations = interval_locations[found]
+    window_locations = np.concatenate([start_locations, hidden_locations])
+    
+    # Rise brackets: (last sample below, first sample above); windows open at the grid start stay clipped
+    rise_lo = np.concatenate([offsets[np.maximum(starts - 1, 0)], times[:, 0]])
+    rise_hi = np.concatenate([offsets[starts], times[:, 1]])
+    set_lo = np.concatenate([offsets[ends], times[:, 1]])
+    set_hi = np.concatenate([offsets[np.minimum(ends + 1, last)], times[:, 2]])
+    # Effective elevations at the bracket ends, known from the scan and the hidden-pass search
+    rise_lo_values = np.concatenate([effectives[start_locations, np.maximum(starts - 1, 0)], values[:, 0]])
+    rise_hi_values = np.concatenate([effectives[start_locations, starts], values[:, 1]])
+    set_lo_values = np.concatenate([effectives[start_locations, ends], values[:, 1]])
+    set_hi_values = np.concatenate([effectives[start_locations, np.minimum(ends + 1, last)], values[:, 2]])
+    crossing_locations = np.concatenate([window_locations, window_locations])
+    
+    crossings = _refine_crossings(
+        lambda times, brackets: visible_evaluate(times, crossing_locations[brackets]),
+        np.concatenate([rise_lo, set_lo]),
+        np.concatenate([rise_hi, set_hi]),
+        np.concatenate([np.zeros(rise_lo.size, dtype=bool), np.ones(set_lo.size, dtype=bool)]),
+        elevation_deg,
+        tolerance_seconds,
+        np.concatenate([rise_lo_values, set_lo_values]),
+        np.concatenate([rise_hi_values, set_hi_values])
+    )
+    rises = np.where(rise_lo == rise_hi, rise_lo, crossings[:rise_lo.size])
+    sets = np.where(set_lo == set_hi, set_lo, crossings[rise_lo.size:])
+    
+    # Culminations: around each coarse peak, or between the rise and set of a hidden pass
+    before, after = np.maximum(peaks - 1, 0), np.minimum(peaks + 1, last)
+    estimates = np.where((peaks > 0) & (peaks < last),
+                         _parabola_vertex(offsets[peaks], step, elevations[peak_locations, before],
+                                          elevations[peak_locations, peaks], elevations[peak_locations, after]),
+                         np.nan)
+    culminations = _refine_maxima(
+        lambda times, brackets: evaluate(times, window_locations[brackets]),
+        np.concatenate([offsets[before], rises[peaks.size:]]),
+        np.concatenate([offsets[after], sets[peaks.size:]]),
+        tolerance_seconds,
+        np.concatenate([estimates, np.full(found.size, np.nan)])
+    )
+    
+    # Millisecond resolution is well below the refinement tolerance
+    rises, culminations, sets = (np.round(x, 3) for x in (rises, culminations, sets))
+    event_elevation, event_azimuth = evaluate(np.concatenate([rises, culminations, sets]),
+                                              np.concatenate([window_locations] * 3))
+    count = rises.size
+    
+    windows = []
+    for index, item in enumerate(series):
+        if item is None:
+            windows.append(None)
+            continue
+        selected = np.flatnonzero(window_locations == index)
+        selected = selected[np.argsort(rises[selected], kind='stable')]
+        events = np.concatenate([selected, selected + count, selected + 2 * count])
+        windows.append(_build_access_windows(grid_start, rises[selected], culminations[selected], sets[selected],
+                                             event_elevation[events], event_azimuth[events]))
+    return windows
+
+
+def _satellite_windows(evaluate, grid_start, offsets, series, elevation_deg, refine, tolerance_seconds,
+                       visibilities, climb_times):
+    """
+    Detect access windows of one satellite for every location from its sampled series.
+    
+    Returns:
+        List of access windows per location (None for pairs ruled out by the pre-filter)
+    """
+    with metrics.stage('pass_detection'):
+        if refine:
+            windows = _refined_windows(evaluate, grid_start, offsets, series, elevation_deg, tolerance_seconds,
+                                       visibilities, climb_times)
+        else:
+            windows = [None if item is None else
+                       _windows_from_series(grid_start, offsets, item[0], item[1], elevation_deg, visibility)
+                       for item, visibility in zip(series, visibilities)]
+    for location_windows in windows:
+        if location_windows is not None:
+            metrics.count('pairs_evaluated')
+            metrics.count('access_windows', len(location_windows))
+    return windows
+
+
+def _events_from_windows(windows, satellite_id, location_id, location_type):
+    """Flatten access windows into InfluxDB-ready events tagged with satellite and location."""
+    events = []
+    
+    for window in windows:
+        window_duration = (window['access_end'] - window['access_start']).total_seconds() / 60.0
+        
+        for event in window['events']:
+            event_data = {
+                'time': event['time'],
+                'event_type': event['event_type'],
+                'satellite_id': str(satellite_id) if satellite_id is not None else None,
+                'location_id': str(location_id) if location_id is not None else None,
+                'location_type': location_type,
+                'elevation': event['elevation'],
+                'azimuth': event['azimuth']
+            }
+            
+            # Add window-level metadata to access_start events
+            if event['event_type'] == 'access_start':
+                event_data['window_duration_minutes'] = window_duration
+                event_data['max_elevation'] = window['max_elevation']
+            
+            events.append(event_data)
+    
+    return events
+
+
+def compute_access_windows(lat, lon, tle_lines, start_utc, end_utc, elevation_deg=10.0, step_seconds=30,
+                           refine=False, tolerance_seconds=1.0, prefilter=True, altitude_m=0.0, horizon_mask=None,
+                           use_cache=None):
     """
     Compute detailed access windows for a satellite over a ground location.
     
@@ -20,6 +747,18 @@ def compute_access_windows(lat, lon, tle_lines, start_utc, end_utc, elevation_de
         start_utc, end_utc: Start and end datetime (UTC, as datetime.datetime)
         elevation_deg: Minimum elevation angle in degrees (default: 10.0)
         step_seconds: Time step in seconds (default: 30)
+        refine: Treat step_seconds as a coarse scan and refine rise, culmination and
+            set times by root-finding instead of snapping them to the grid (default: False).
+            Steps of a few minutes are appropriate in this mode.
+        tolerance_seconds: Timing tolerance of the refined events (default: 1.0)
+        prefilter: Skip time blocks in which the satellite is geometrically out of range
+            (default: True); results are identical either way
+        altitude_m: Height of the ground location above the WGS84 ellipsoid in meters (default: 0)
+        horizon_mask: Azimuth-dependent minimum elevation as [[azimuth_deg, elevation_deg], ...],
+            interpolated linearly and wrapping at 360 deg; the higher of the mask and
+            elevation_deg applies (default: None, elevation_deg everywhere)
+        use_cache: Answer from and store into the Redis pass cache (see passcache.py)
+            when it is available (default: None, follow PASS_CACHE_ENABLED)
     
     Returns:
         List of dictionaries with access window events:
@@ -36,140 +775,77 @@ def compute_access_windows(lat, lon, tle_lines, start_utc, end_utc, elevation_de
         }]
     """
     try:
-        ts = load.timescale()
-        satellite = EarthSatellite(tle_lines[0], tle_lines[1], 'SAT', ts)
-        location = wgs84.latlon(lat, lon)
-        
-        # Generate time steps
-        time_list = []
-        t = start_utc
-        while t <= end_utc:
-            time_list.append(ts.utc(t.year, t.month, t.day, t.hour, t.minute, t.second))
-            t += timedelta(seconds=step_seconds)
-
-        if not time_list:
+        grid_start, offsets = _time_grid(start_utc, end_utc, step_seconds)
+        if not offsets.size:
             return []
-
-        # Compute positions and elevations for each time step
-        positions = []
-        for time_point in time_list:
-            # Calculate topocentric coordinates (satellite position as seen from ground station)
-            difference = satellite - location
-            topocentric = difference.at(time_point)
-            alt, az, distance = topocentric.altaz()
-            positions.append({
-                'time': time_point.utc_datetime().replace(tzinfo=None),
-                'elevation': alt.degrees,
-                'azimuth': az.degrees,
-                'distance': distance.km
-            })
-
-        # Find detailed access windows with events
-        access_windows = []
-        in_access = False
-        access_start_idx = None
         
-        for i, pos in enumerate(positions):
-            if pos['elevation'] >= elevation_deg:
-                if not in_access:
-                    # Start of access window
-                    in_access = True
-                    access_start_idx = i
-            else:
-                if in_access:
-                    # End of access window
-                    in_access = False
-                    access_end_idx = i - 1
-                    
-                    if access_start_idx is not None and access_end_idx >= access_start_idx:
-                        # Find culmination point (maximum elevation) within this window
-                        window_positions = positions[access_start_idx:access_end_idx+1]
-                        max_elevation_pos = max(window_positions, key=lambda p: p['elevation'])
-                        culmination_idx = access_start_idx + window_positions.index(max_elevation_pos)
-                        
-                        # Create detailed access window with events
-                        access_window = {
-                            'access_start': positions[access_start_idx]['time'],
-                            'access_end': positions[access_end_idx]['time'],
-                            'culmination': positions[culmination_idx]['time'],
-                            'max_elevation': max_elevation_pos['elevation'],
-                            'events': [
-                                {
-                                    'time': positions[access_start_idx]['time'],
-                                    'event_type': 'access_start',
-                                    'elevation': positions[access_start_idx]['elevation'],
-                                    'azimuth': positions[access_start_idx]['azimuth']
-                                },
-                                {
-                                    'time': positions[culmination_idx]['time'],
-                                    'event_type': 'culmination',
-                                    'elevation': positions[culmination_idx]['elevation'],
-                                    'azimuth': positions[culmination_idx]['azimuth']
-                                },
-                                {
-                                    'time': positions[access_end_idx]['time'],
-                                    'event_type': 'access_end',
-                                    'elevation': positions[access_end_idx]['elevation'],
-                                    'azimuth': positions[access_end_idx]['azimuth']
-                                }
-                            ]
-                        }
-                        access_windows.append(access_window)
-                    access_start_idx = None
-                    
-        # If still in access at the end of time period
-        if in_access and access_start_idx is not None:
-            access_end_idx = len(positions) - 1
-            
-            # Find culmination point within this window
-            window_positions = positions[access_start_idx:access_end_idx+1]
-            max_elevation_pos = max(window_positions, key=lambda p: p['elevation'])
-            culmination_idx = access_start_idx + window_positions.index(max_elevation_pos)
-            
-            access_window = {
-                'access_start': positions[access_start_idx]['time'],
-                'access_end': positions[access_end_idx]['time'],
-                'culmination': positions[culmination_idx]['time'],
-                'max_elevation': max_elevation_pos['elevation'],
-                'events': [
-                    {
-                        'time': positions[access_start_idx]['time'],
-                        'event_type': 'access_start',
-                        'elevation': positions[access_start_idx]['elevation'],
-                        'azimuth': positions[access_start_idx]['azimuth']
-                    },
-                    {
-                        'time': positions[culmination_idx]['time'],
-                        'event_type': 'culmination',
-                        'elevation': positions[culmination_idx]['elevation'],
-                        'azimuth': positions[culmination_idx]['azimuth']
-                    },
-                    {
-                        'time': positions[access_end_idx]['time'],
-                        'event_type': 'access_end',
-                        'elevation': positions[access_end_idx]['elevation'],
-                        'azimuth': positions[access_end_idx]['azimuth']
-                    }
-                ]
-            }
-            access_windows.append(access_window)
-                
-        return access_windows
+        if use_cache is None:
+            use_cache = PASS_CACHE_ENABLED
+        cache = get_pass_cache() if use_cache else None
+        if cache is not None:
+            param_hash = cache.param_hash(tle_lines, lat, lon, altitude_m, horizon_mask, elevation_deg,
+                                          step_seconds, refine, tolerance_seconds)
+            try:
+                with metrics.stage('redis_io'):
+                    windows = cache.get(param_hash, grid_start, offsets[-1], step_seconds)
+                if windows is not None:
+                    metrics.count('pass_cache_hits')
+                    return windows
+                metrics.count('pass_cache_misses')
+            except Exception as e:
+                print(f"Pass cache lookup failed: {e}", file=sys.stderr)
+        
+        windows = _compute_windows(lat, lon, tle_lines, grid_start, offsets, elevation_deg, refine,
+                                   tolerance_seconds, prefilter, altitude_m, horizon_mask)
+        
+        if cache is not None:
+            try:
+                with metrics.stage('redis_io'):
+                    cache.put(param_hash, grid_start, offsets[-1], windows)
+            except Exception as e:
+                print(f"Pass cache store failed: {e}", file=sys.stderr)
+        return windows
         
     except Exception as e:
         print(f"Error in access window calculation: {e}", file=sys.stderr)
         return []
 
 
-def compute_access_windows_legacy(lat, lon, tle_lines, start_utc, end_utc, elevation_deg=10.0, step_seconds=30):
+def _compute_windows(lat, lon, tle_lines, grid_start, offsets, elevation_deg, refine, tolerance_seconds, prefilter,
+                     altitude_m, horizon_mask):
+    """Access windows of one satellite/location pair over a prepared time grid (raises on failure)."""
+    ts = get_timescale()
+    with metrics.stage('tle_parse'):
+        satellite = load_satellite(tle_lines[0], tle_lines[1])
+    
+    # Topocentric elevation/azimuth for the whole grid in one array call
+    frames = [_location_frame(lat, lon, altitude_m)]
+    series = _location_series(ts, satellite, frames, grid_start, offsets, elevation_deg, prefilter)
+    if series[0] is None:
+        metrics.count('pairs_prefiltered')
+        return []
+    
+    climb_times = [_climb_time(satellite.model, elevation_deg, _mask_bounds(horizon_mask, elevation_deg))]
+    evaluate = _altaz_evaluator(ts, satellite, frames, grid_start)
+    return _satellite_windows(evaluate, grid_start, offsets, series, elevation_deg, refine, tolerance_seconds,
+                              [_horizon_visibility(horizon_mask, elevation_deg)], climb_times)[0]
+
+
+def compute_access_windows_legacy(lat, lon, tle_lines, start_utc, end_utc, elevation_deg=10.0, step_seconds=30,
+                                  refine=False, tolerance_seconds=1.0, prefilter=True, altitude_m=0.0,
+                                  horizon_mask=None, use_cache=None):
     """
     Legacy function that returns simple (start, end) tuples for backward compatibility.
     """
-    detailed_windows = compute_access_windows(lat, lon, tle_lines, start_utc, end_utc, elevation_deg, step_seconds)
+    detailed_windows = compute_access_windows(lat, lon, tle_lines, start_utc, end_utc, elevation_deg, step_seconds,
+                                              refine, tolerance_seconds, prefilter, altitude_m, horizon_mask,
+                                              use_cache)
     return [(window['access_start'], window['access_end']) for window in detailed_windows]
 
 
-def compute_access_events(lat, lon, tle_lines, start_utc, end_utc, satellite_id=None, location_id=None, location_type='ground_station', elevation_deg=10.0, step_seconds=30):
+def compute_access_events(lat, lon, tle_lines, start_utc, end_utc, satellite_id=None, location_id=None, location_type='ground_station', elevation_deg=10.0, step_seconds=30,
+                          refine=False, tolerance_seconds=1.0, prefilter=True, altitude_m=0.0, horizon_mask=None,
+                          use_cache=None):
     """
     Compute access window events for storage in InfluxDB with satellite and location metadata.
     
@@ -182,6 +858,11 @@ def compute_access_events(lat, lon, tle_lines, start_utc, end_utc, satellite_id=
         location_type: 'ground_station' or 'target' (for InfluxDB tagging)
         elevation_deg: Minimum elevation angle in degrees (default: 10.0)
         step_seconds: Time step in seconds (default: 30)
+        refine: Refine event times below the step size (see compute_access_windows)
+        tolerance_seconds: Timing tolerance of the refined events (default: 1.0)
+        prefilter: Skip geometrically impossible time blocks (see compute_access_windows)
+        altitude_m, horizon_mask: Location height and horizon mask (see compute_access_windows)
+        use_cache: Use the Redis pass cache (see compute_access_windows)
     
     Returns:
         List of event dictionaries suitable for InfluxDB storage:
@@ -198,103 +879,620 @@ def compute_access_events(lat, lon, tle_lines, start_utc, end_utc, satellite_id=
         }]
     """
     try:
-        detailed_windows = compute_access_windows(lat, lon, tle_lines, start_utc, end_utc, elevation_deg, step_seconds)
-        events = []
+        detailed_windows = compute_access_windows(lat, lon, tle_lines, start_utc, end_utc, elevation_deg, step_seconds,
+                                                  refine, tolerance_seconds, prefilter, altitude_m, horizon_mask,
+                                                  use_cache)
+        return _events_from_windows(detailed_windows, satellite_id, location_id, location_type)
+        
+    except Exception as e:
+        print(f"Error in access event calculation: {e}", file=sys.stderr)
+        return []
+
+
+def compute_access_events_batch(locations, satellites, start_utc, end_utc, elevation_deg=10.0, step_seconds=30,
+                                refine=False, tolerance_seconds=1.0, workers=1, prefilter=True):
+    """
+    Compute access events for every satellite/location pair in one pass.
+    
+    Each satellite is propagated once over the shared time grid and its ITRS positions
+    are reused for every location, so the cost of propagation does not grow with the
+    number of locations.
+    
+    Args:
+        locations: List of dictionaries with location_id, location_type, latitude, longitude and
+            optionally altitude (meters) and horizon_mask (see compute_access_windows), so
+            locations with different masks can share one batch
+        satellites: List of dictionaries with satellite_id, tle_1, tle_2
+        start_utc, end_utc: Start and end datetime (UTC, as datetime.datetime)
+        elevation_deg: Minimum elevation angle in degrees (default: 10.0)
+        step_seconds: Time step in seconds (default: 30)
+        refine: Refine event times below the step size (see compute_access_windows)
+        tolerance_seconds: Timing tolerance of the refined events (default: 1.0)
+        workers: Number of processes to shard the satellites across (default: 1, in-process)
+        prefilter: Skip geometrically impossible pairs and time blocks (see compute_access_windows)
+    
+    Returns:
+        List of event dictionaries in the format of compute_access_events, ordered by
+        satellite, then location, then time (independent of the worker count)
+    """
+    return [event for events in iter_access_events_batch(locations, satellites, start_utc, end_utc, elevation_deg,
+                                                         step_seconds, refine, tolerance_seconds, workers, prefilter)
+            for event in events]
+
+
+def iter_access_events_batch(locations, satellites, start_utc, end_utc, elevation_deg=10.0, step_seconds=30,
+                             refine=False, tolerance_seconds=1.0, workers=1, prefilter=True, failed=None):
+    """
+    Generator form of compute_access_events_batch.
+    
+    Yields one list of events per satellite (per shard when workers > 1) as soon as it is
+    computed, so callers can write results while later satellites are still propagating
+    and never hold the events of the whole fleet at once.
+    
+    A satellite whose computation fails contributes no events. If failed is a list, its
+    satellite_id is appended to it before the chunk that would have held its events is
+    yielded, so callers can tell an error from a satellite without passes.
+    """
+    if workers > 1:
+        from parallel import imap_shards
         
-        for window in detailed_windows:
-            window_duration = (window['access_end'] - window['access_start']).total_seconds() / 60.0
+        for events, shard_metrics, shard_failed in imap_shards(
+            functools.partial(_batch_shard_events, locations, start_utc=start_utc, end_utc=end_utc,
+                              elevation_deg=elevation_deg, step_seconds=step_seconds, refine=refine,
+                              tolerance_seconds=tolerance_seconds, prefilter=prefilter),
+            satellites,
+            workers
+        ):
+            metrics.merge(shard_metrics)
+            if failed is not None:
+                failed.extend(shard_failed)
+            yield events
+        return
+    
+    ts = get_timescale()
+    grid_start, offsets = _time_grid(start_utc, end_utc, step_seconds)
+    if not offsets.size:
+        return
+    
+    frames = []
+    visibilities = []
+    mask_bounds = []
+    for location in locations:
+        altitude_m, horizon_mask = _location_inputs(location)
+        frames.append(_location_frame(float(location['latitude']), float(location['longitude']), altitude_m))
+        visibilities.append(_horizon_visibility(horizon_mask, elevation_deg))
+        mask_bounds.append(_mask_bounds(horizon_mask, elevation_deg))
+    
+    for sat in satellites:
+        events = []
+        try:
+            with metrics.stage('tle_parse'):
+                satellite = load_satellite(sat['tle_1'], sat['tle_2'])
+            all_series = _location_series(ts, satellite, frames, grid_start, offsets, elevation_deg, prefilter)
             
-            for event in window['events']:
-                event_data = {
-                    'time': event['time'],
-                    'event_type': event['event_type'],
-                    'satellite_id': str(satellite_id) if satellite_id is not None else None,
-                    'location_id': str(location_id) if location_id is not None else None,
-                    'location_type': location_type,
-                    'elevation': event['elevation'],
-                    'azimuth': event['azimuth']
-                }
-                
-                # Add window-level metadata to access_start events
-                if event['event_type'] == 'access_start':
-                    event_data['window_duration_minutes'] = window_duration
-                    event_data['max_elevation'] = window['max_elevation']
+            climb_times = None
+            if refine:
+                # Locations without a mask share one bound
+                satellite_climb_times = {bounds: _climb_time(satellite.model, elevation_deg, bounds)
+                                         for bounds in set(mask_bounds)}
+                climb_times = [satellite_climb_times[bounds] for bounds in mask_bounds]
+            evaluate = _altaz_evaluator(ts, satellite, frames, grid_start)
+            all_windows = _satellite_windows(evaluate, grid_start, offsets, all_series, elevation_deg, refine,
+                                             tolerance_seconds, visibilities, climb_times)
+            
+            for location, windows in zip(locations, all_windows):
+                if windows is None:
+                    metrics.count('pairs_prefiltered')
+                    continue
+                events.extend(_events_from_windows(windows, sat['satellite_id'], location['location_id'],
+                                                   location.get('location_type', 'ground_station')))
                 
-                events.append(event_data)
+        except Exception as e:
+            print(f"Error in access event calculation for satellite {sat.get('satellite_id')}: {e}", file=sys.stderr)
+            events = []
+            if failed is not None:
+                failed.append(sat['satellite_id'])
         
-        return events
+        yield events
+
+
+def _batch_shard_events(locations, satellites, **options):
+    """
+    Process-pool entry point: events of one shard of satellites, with the metrics of
+    computing them and the satellite_ids that failed.
+    """
+    failed = []
+    with metrics.collect(detached=True) as shard_metrics:
+        events = [event for chunk in iter_access_events_batch(locations, satellites, failed=failed, **options)
+                  for event in chunk]
+    return events, shard_metrics, failed
+
+
+def pair_key(location, satellite_id):
+    """Key identifying a location/satellite pair in incremental state."""
+    return f"{location.get('location_type', 'ground_station')}:{location['location_id']}:{satellite_id}"
+
+
+def _pair_fingerprint(location, satellite, elevation_deg, step_seconds, refine):
+    """Digest of every input that affects a pair's events; a change forces a full recompute."""
+    inputs = [satellite['tle_1'].strip(), satellite['tle_2'].strip(), float(location['latitude']),
+              float(location['longitude']), *_location_inputs(location), float(elevation_deg),
+              float(step_seconds), bool(refine)]
+    return hashlib.sha1(json.dumps(inputs).encode('utf-8')).hexdigest()[:16]
+
+
+def _previous_sample(time, grid_start, step_seconds):
+    """Latest grid sample strictly before time."""
+    steps = np.ceil((time - grid_start).total_seconds() / step_seconds - 1.0)
+    return grid_start + timedelta(seconds=float(steps) * step_seconds)
+
+
+def compute_access_events_incremental(locations, satellites, start_utc, end_utc, state=None, elevation_deg=10.0,
+                                      step_seconds=30, refine=False, tolerance_seconds=1.0, workers=1,
+                                      prefilter=True, refresh_margin_seconds=None):
+    """
+    Compute access events for every pair, only over the part of the horizon not computed before.
+    
+    state maps pair_key() to {'computed_through': ISO time, 'fingerprint': str} from the
+    previous run. Pairs whose fingerprint (TLE, location incl. altitude and horizon mask,
+    elevation, step, refine)
+    is unchanged are computed from their watermark to end_utc; new or changed pairs are
+    recomputed over the whole [start_utc, end_utc] range. Pairs are grouped by range
+    start so the common case (nothing changed) is a single batch over the new slice.
+    
+    A pass still in progress at the end of a range is held back and its pair's watermark
+    is set to the last sample before the pass, so the next run computes it in full
+    instead of storing it as two truncated windows. Passes longer than a whole range
+    (e.g. geostationary satellites) are emitted per range as consecutive windows.
+    
+    With refresh_margin_seconds, unchanged pairs whose watermark is still within that
+    margin of end_utc are left alone, so frequent change-driven runs only compute pairs
+    whose TLE or location changed and extend the others in larger, rarer slices.
+    
+    Args:
+        locations, satellites, start_utc, end_utc, elevation_deg, step_seconds, refine,
+        tolerance_seconds, workers, prefilter: As for compute_access_events_batch
+        state: Incremental state returned by the previous run (default: none, full run)
+        refresh_margin_seconds: Only extend unchanged pairs computed through less than
+            end_utc minus this many seconds (default: extend every pair to end_utc)
+    
+    Returns:
+        Dictionary with 'events' (compute_access_events_batch format), the new 'state'
+        for every current pair, 'recomputed_pairs' (keys of new or changed pairs whose
+        previously stored events should be replaced) and 'pairs_computed'/'pairs_skipped'/
+        'pairs_failed' (pairs of satellites whose computation raised; their watermark
+        is not advanced)
+    """
+    chunks = iter_access_events_incremental(locations, satellites, start_utc, end_utc, state, elevation_deg,
+                                            step_seconds, refine, tolerance_seconds, workers, prefilter,
+                                            refresh_margin_seconds)
+    next(chunks)
+    events = []
+    while True:
+        try:
+            events.extend(next(chunks))
+        except StopIteration as stop:
+            return dict(stop.value, events=events)
+
+
+def iter_access_events_incremental(locations, satellites, start_utc, end_utc, state=None, elevation_deg=10.0,
+                                   step_seconds=30, refine=False, tolerance_seconds=1.0, workers=1,
+                                   prefilter=True, refresh_margin_seconds=None):
+    """
+    Generator form of compute_access_events_incremental.
+    
+    First yields the list of recomputed pair keys, which is known before anything is
+    propagated, so callers can drop the stored events of those pairs before writing new
+    ones. Then yields one list of events per satellite (per shard when workers > 1) as
+    soon as it is computed, and finally returns the result of
+    compute_access_events_incremental without 'events'.
+    
+    Pairs of a satellite whose computation fails keep their previous watermark, so the
+    next run retries their range instead of recording it as done.
+    """
+    state = state or {}
+    fresh_through = None
+    if refresh_margin_seconds is not None:
+        fresh_through = end_utc - timedelta(seconds=refresh_margin_seconds)
+    new_state = {}
+    recomputed_pairs = []
+    groups = {}
+    pairs_skipped = 0
+    pairs_failed = 0
+    
+    for sat in satellites:
+        ranges = {}
+        for index, location in enumerate(locations):
+            key = pair_key(location, sat['satellite_id'])
+            fingerprint = _pair_fingerprint(location, sat, elevation_deg, step_seconds, refine)
+            previous = state.get(key)
+            
+            if previous and previous.get('fingerprint') == fingerprint:
+                range_start = max(_parse_utc(previous['computed_through']), start_utc)
+                if fresh_through is not None and range_start >= fresh_through:
+                    new_state[key] = previous
+                    pairs_skipped += 1
+                    continue
+            else:
+                range_start = start_utc
+                recomputed_pairs.append(key)
+            
+            new_state[key] = {'computed_through': range_start.isoformat(), 'fingerprint': fingerprint}
+            if range_start + timedelta(seconds=step_seconds) > end_utc:
+                pairs_skipped += 1
+                continue
+            ranges.setdefault(range_start, []).append(index)
         
-    except Exception as e:
-        print(f"Error in access event calculation: {e}", file=sys.stderr)
-        return []
+        for range_start, indices in ranges.items():
+            groups.setdefault((range_start, tuple(indices)), []).append(sat)
+    
+    yield recomputed_pairs
+    
+    for (range_start, indices), group_satellites in groups.items():
+        group_locations = [locations[i] for i in indices]
+        grid_start, offsets = _time_grid(range_start, end_utc, step_seconds)
+        last_sample = grid_start + timedelta(seconds=float(offsets[-1]))
+        watermarks = {pair_key(location, sat['satellite_id']): last_sample
+                      for sat in group_satellites for location in group_locations}
+        failed = []
+        
+        for computed in iter_access_events_batch(group_locations, group_satellites, range_start, end_utc,
+                                                 elevation_deg, step_seconds, refine, tolerance_seconds, workers,
+                                                 prefilter, failed=failed):
+            events = []
+            # Each window contributes an access_start, culmination, access_end triple
+            for i in range(0, len(computed), 3):
+                window = computed[i:i + 3]
+                key = pair_key(window[0], window[0]['satellite_id'])
+                if window[2]['time'] >= last_sample and window[0]['time'] > grid_start:
+                    watermarks[key] = _previous_sample(window[0]['time'], grid_start, step_seconds)
+                    continue
+                events.extend(window)
+            yield events
+        
+        for satellite_id in failed:
+            for location in group_locations:
+                del watermarks[pair_key(location, satellite_id)]
+                pairs_failed += 1
+        
+        for key, watermark in watermarks.items():
+            new_state[key]['computed_through'] = watermark.isoformat()
+    
+    return {
+        'state': new_state,
+        'recomputed_pairs': recomputed_pairs,
+        'pairs_computed': len(new_state) - pairs_skipped - pairs_failed,
+        'pairs_skipped': pairs_skipped,
+        'pairs_failed': pairs_failed
+    }
+
+
+def _escape_tag(value):
+    """Escape a tag key or value for InfluxDB line protocol."""
+    return str(value).replace('\\', '\\\\').replace(',', '\\,').replace('=', '\\=').replace(' ', '\\ ')
+
+
+def _line_protocol_value(value):
+    """Format a field value for InfluxDB line protocol."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(float(value))
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def event_to_line_protocol(event, tags=None, fields=None):
+    """
+    Format one access event as an InfluxDB line-protocol record of the access_event measurement.
+    
+    Args:
+        event: Event dictionary from compute_access_events / compute_access_events_batch
+        tags: Extra tags to attach (e.g. satellite_name, location_name)
+        fields: Extra fields to attach (e.g. ground_station_lat)
+    
+    Returns:
+        Line-protocol string (without trailing newline), nanosecond timestamp
+    """
+    all_tags = {
+        'satellite_id': event['satellite_id'],
+        'location_id': event['location_id'],
+        'location_type': event['location_type'],
+        'event_type': event['event_type']
+    }
+    all_tags.update(tags or {})
+    all_fields = {'elevation': event['elevation'], 'azimuth': event['azimuth'], 'planned': True}
+    if event['event_type'] == 'access_start':
+        all_fields['window_duration_minutes'] = event['window_duration_minutes']
+        all_fields['max_elevation'] = event['max_elevation']
+    all_fields.update(fields or {})
+    
+    tag_text = ','.join(f"{_escape_tag(key)}={_escape_tag(value)}"
+                        for key, value in sorted(all_tags.items()) if value is not None and value != '')
+    field_text = ','.join(f"{_escape_tag(key)}={_line_protocol_value(value)}"
+                          for key, value in all_fields.items() if value is not None)
+    delta = event['time'] - datetime(1970, 1, 1)
+    timestamp = (delta.days * 86400 + delta.seconds) * 1000000000 + delta.microseconds * 1000
+    return f"access_event,{tag_text} {field_text} {timestamp}"
+
+
+def write_event_stream(event_chunks, output_format, stream=None, locations=None, satellites=None):
+    """
+    Write events as they are produced, one compact record per line, flushing after each chunk.
+    
+    Args:
+        event_chunks: Iterable of event lists (e.g. iter_access_events_batch)
+        output_format: 'ndjson' (one JSON event per line) or 'line_protocol' (InfluxDB)
+        stream: Output stream (default: sys.stdout)
+        locations, satellites: Batch entries; their optional 'tags' and 'fields'
+            dictionaries are added to the line-protocol records of matching events
+    
+    Returns:
+        Number of events written
+    """
+    stream = stream or sys.stdout
+    extras = {}
+    for kind, entries, id_key in (('location', locations or [], 'location_id'),
+                                  ('satellite', satellites or [], 'satellite_id')):
+        for entry in entries:
+            extras[(kind, str(entry[id_key]))] = (entry.get('tags', {}), entry.get('fields', {}))
+    
+    count = 0
+    for events in event_chunks:
+        lines = []
+        with metrics.stage('serialization'):
+            for event in events:
+                if output_format == 'line_protocol':
+                    tags, fields = {}, {}
+                    for extra_key in (('satellite', event['satellite_id']), ('location', event['location_id'])):
+                        extra_tags, extra_fields = extras.get(extra_key, ({}, {}))
+                        tags.update(extra_tags)
+                        fields.update(extra_fields)
+                    lines.append(event_to_line_protocol(event, tags, fields))
+                else:
+                    lines.append(json.dumps(dict(event, time=event['time'].isoformat()), separators=(',', ':')))
+        if lines:
+            stream.write('\n'.join(lines) + '\n')
+            stream.flush()
+        count += len(lines)
+    return count
+
+
+def _parse_utc(value):
+    """Parse an ISO timestamp string into a naive UTC datetime."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+def _stream_batch_events(**params):
+    """Worker method 'batch_events_stream': iter_access_events_batch as {'events': [...]} chunks."""
+    count = 0
+    for events in iter_access_events_batch(**params):
+        count += len(events)
+        yield {'events': events}
+    return {'event_count': count}
+
+
+def _stream_incremental_events(**params):
+    """
+    Worker method 'incremental_events_stream': iter_access_events_incremental as a
+    {'recomputed_pairs': [...]} chunk followed by {'events': [...]} chunks.
+    """
+    chunks = iter_access_events_incremental(**params)
+    yield {'recomputed_pairs': next(chunks)}
+    while True:
+        try:
+            events = next(chunks)
+        except StopIteration as stop:
+            return stop.value
+        yield {'events': events}
+
+
+def run_worker():
+    """
+    Serve access-window requests as JSON lines over stdin/stdout until stdin is closed.
+    
+    Methods 'windows', 'legacy', 'events', 'batch_events' and 'incremental_events' take
+    the keyword arguments of compute_access_windows, compute_access_windows_legacy,
+    compute_access_events, compute_access_events_batch and compute_access_events_incremental,
+    with start_utc/end_utc given as ISO strings. Method 'schedule' takes the keyword
+    arguments of scheduler.schedule_events and 'coverage' those of
+    coverage_stats.coverage_statistics (again with ISO start_utc/end_utc).
+    
+    'batch_events_stream' and 'incremental_events_stream' take the same arguments as
+    'batch_events' and 'incremental_events' but stream the events of each satellite as
+    soon as they are computed (see worker.py); the incremental stream starts with the
+    recomputed pair keys and its reply holds the rest of the incremental result.
+    """
+    from coverage_stats import coverage_statistics
+    from scheduler import schedule_events
+    from worker import serve
+    
+    def with_times(function):
+        def handler(start_utc, end_utc, **params):
+            return function(start_utc=_parse_utc(start_utc), end_utc=_parse_utc(end_utc), **params)
+        return handler
+    
+    get_timescale()
+    serve({
+        'windows': with_times(compute_access_windows),
+        'legacy': with_times(compute_access_windows_legacy),
+        'events': with_times(compute_access_events),
+        'batch_events': with_times(compute_access_events_batch),
+        'incremental_events': with_times(compute_access_events_incremental),
+        'batch_events_stream': with_times(_stream_batch_events),
+        'incremental_events_stream': with_times(_stream_incremental_events),
+        'schedule': schedule_events,
+        'coverage': with_times(coverage_statistics)
+    })
 
 
 def main():
     """Command-line interface for access window calculation."""
+    if sys.argv[1:] == ['--worker']:
+        run_worker()
+        return
+    
     parser = argparse.ArgumentParser(description='Calculate satellite access windows')
-    parser.add_argument('--lat', type=float, required=True, help='Latitude in degrees')
-    parser.add_argument('--lon', type=float, required=True, help='Longitude in degrees')
-    parser.add_argument('--tle1', type=str, required=True, help='First TLE line')
-    parser.add_argument('--tle2', type=str, required=True, help='Second TLE line')
+    parser.add_argument('--lat', type=float, help='Latitude in degrees')
+    parser.add_argument('--lon', type=float, help='Longitude in degrees')
+    parser.add_argument('--alt', type=float, default=0.0, help='Location altitude in meters above the WGS84 ellipsoid')
+    parser.add_argument('--horizon_mask', type=json.loads,
+                       help='Horizon mask as a JSON list of [azimuth_deg, min_elevation_deg] points')
+    parser.add_argument('--tle1', type=str, help='First TLE line')
+    parser.add_argument('--tle2', type=str, help='Second TLE line')
+    parser.add_argument('--batch-file', dest='batch_file', type=str,
+                       help='JSON file with "locations" and "satellites" lists; computes every pair and '
+                            'prints events (replaces --lat/--lon/--tle1/--tle2)')
+    parser.add_argument('--state-file', dest='state_file', type=str,
+                       help='With --batch-file: incremental state file; only the horizon not covered by the '
+                            'previous run is computed for unchanged pairs, and the file is updated')
+    parser.add_argument('--refresh_margin_seconds', type=float,
+                       help='With --state-file: leave unchanged pairs computed to within this many seconds of '
+                            '--end_utc alone')
     parser.add_argument('--start_utc', type=str, required=True, help='Start time in ISO format')
     parser.add_argument('--end_utc', type=str, required=True, help='End time in ISO format')
     parser.add_argument('--elevation_deg', type=float, default=10.0, help='Minimum elevation in degrees')
     parser.add_argument('--step_seconds', type=int, default=30, help='Time step in seconds')
-    parser.add_argument('--output_format', type=str, choices=['legacy', 'detailed', 'events'], default='legacy', 
-                       help='Output format: legacy (start->end), detailed (JSON), or events (for InfluxDB)')
+    parser.add_argument('--refine', action='store_true',
+                       help='Scan at step_seconds and refine event times by root-finding (use steps of a few minutes)')
+    parser.add_argument('--tolerance_seconds', type=float, default=1.0, help='Timing tolerance for --refine')
+    parser.add_argument('--no_prefilter', dest='prefilter', action='store_false',
+                       help='Evaluate every sample instead of skipping geometrically impossible time blocks')
+    parser.add_argument('--cache', dest='use_cache', action='store_true', default=None,
+                       help='Answer from and store into the Redis pass cache (default: $PASS_CACHE_ENABLED)')
+    parser.add_argument('--no_cache', dest='use_cache', action='store_false',
+                       help='Always recompute instead of using the Redis pass cache')
+    parser.add_argument('--workers', type=int,
+                       help='Processes to shard --batch-file satellites across (default: $SATELLITE_COMPUTE_WORKERS or the CPU count)')
+    parser.add_argument('--output_format', type=str,
+                       choices=['legacy', 'detailed', 'events', 'ndjson', 'line_protocol'], default='legacy',
+                       help='Output format: legacy (start->end), detailed (JSON), events (for InfluxDB), or '
+                            'streamed one event per line as passes are found: ndjson or line_protocol '
+                            '(InfluxDB access_event records); --batch-file prints events unless a streamed '
+                            'format is chosen')
     parser.add_argument('--satellite_id', type=str, help='Satellite ID (for events output)')
     parser.add_argument('--location_id', type=str, help='Location ID (for events output)')
     parser.add_argument('--location_type', type=str, choices=['ground_station', 'target'], default='ground_station',
                        help='Location type (for events output)')
+    parser.add_argument('--metrics', type=str, choices=['json', 'prometheus'],
+                       help='Print per-stage timings and counters to stderr when done (see metrics.py)')
     
     args = parser.parse_args()
+    if not args.batch_file and None in (args.lat, args.lon, args.tle1, args.tle2):
+        parser.error('--lat, --lon, --tle1 and --tle2 are required unless --batch-file is given')
     
-    try:
-        # Parse datetime strings
-        start_utc = datetime.fromisoformat(args.start_utc.replace('Z', '+00:00')).replace(tzinfo=None)
-        end_utc = datetime.fromisoformat(args.end_utc.replace('Z', '+00:00')).replace(tzinfo=None)
+    with metrics.profiled('accesswindow'):
+        try:
+            # Parse datetime strings
+            start_utc = _parse_utc(args.start_utc)
+            end_utc = _parse_utc(args.end_utc)
         
-        tle_lines = [args.tle1, args.tle2]
+            tle_lines = [args.tle1, args.tle2]
         
-        if args.output_format == 'legacy':
-            # Legacy output format for backward compatibility
-            windows = compute_access_windows_legacy(
-                args.lat, args.lon, tle_lines, start_utc, end_utc, 
-                args.elevation_deg, args.step_seconds
-            )
-            for start, end in windows:
-                print(f"{start.isoformat()} -> {end.isoformat()}")
+            if args.batch_file:
+                # All locations x all satellites, always in events format
+                from parallel import default_workers
+            
+                with open(args.batch_file, 'r') as f:
+                    batch = json.load(f)
+            
+                incremental = None
+                if args.state_file:
+                    state = {}
+                    if os.path.exists(args.state_file):
+                        with open(args.state_file, 'r') as f:
+                            state = json.load(f)
+                    incremental = iter_access_events_incremental(
+                        batch['locations'], batch['satellites'], start_utc, end_utc, state,
+                        args.elevation_deg, args.step_seconds, args.refine, args.tolerance_seconds,
+                        args.workers or default_workers(), args.prefilter, args.refresh_margin_seconds
+                    )
+                    next(incremental)
+                    result = {}
+                    
+                    def incremental_chunks():
+                        # Keep the generator's return value (the new state) once the events are out
+                        result.update((yield from incremental))
+                    event_chunks = incremental_chunks()
+                else:
+                    event_chunks = iter_access_events_batch(
+                        batch['locations'], batch['satellites'], start_utc, end_utc,
+                        args.elevation_deg, args.step_seconds, args.refine, args.tolerance_seconds,
+                        args.workers or default_workers(), args.prefilter
+                    )
+            
+                if args.output_format in STREAM_FORMATS:
+                    write_event_stream(event_chunks, args.output_format,
+                                       locations=batch['locations'], satellites=batch['satellites'])
+                else:
+                    events = [event for events in event_chunks for event in events]
+                    for event in events:
+                        event['time'] = event['time'].isoformat()
+                    print(json.dumps(events, indent=2))
                 
-        elif args.output_format == 'detailed':
-            # Detailed JSON output with all event information
-            windows = compute_access_windows(
-                args.lat, args.lon, tle_lines, start_utc, end_utc, 
-                args.elevation_deg, args.step_seconds
-            )
-            # Convert datetime objects to ISO strings for JSON serialization
-            for window in windows:
-                window['access_start'] = window['access_start'].isoformat()
-                window['access_end'] = window['access_end'].isoformat()
-                window['culmination'] = window['culmination'].isoformat()
-                for event in window['events']:
-                    event['time'] = event['time'].isoformat()
-            print(json.dumps(windows, indent=2))
+                if incremental is not None:
+                    # Advance the watermarks only once every event has been written
+                    with open(args.state_file, 'w') as f:
+                        json.dump(result['state'], f)
+                    print(f"Computed {result['pairs_computed']} pairs ({len(result['recomputed_pairs'])} in full), "
+                          f"skipped {result['pairs_skipped']}, failed {result['pairs_failed']}", file=sys.stderr)
             
-        elif args.output_format == 'events':
-            # Events format for InfluxDB storage
-            events = compute_access_events(
-                args.lat, args.lon, tle_lines, start_utc, end_utc,
-                args.satellite_id, args.location_id, args.location_type,
-                args.elevation_deg, args.step_seconds
-            )
-            # Convert datetime objects to ISO strings for JSON serialization
-            for event in events:
-                event['time'] = event['time'].isoformat()
-            print(json.dumps(events, indent=2))
+            elif args.output_format == 'legacy':
+                # Legacy output format for backward compatibility
+                windows = compute_access_windows_legacy(
+                    args.lat, args.lon, tle_lines, start_utc, end_utc, 
+                    args.elevation_deg, args.step_seconds, args.refine, args.tolerance_seconds, args.prefilter,
+                    args.alt, args.horizon_mask, args.use_cache
+                )
+                for start, end in windows:
+                    print(f"{start.isoformat()} -> {end.isoformat()}")
+                
+            elif args.output_format == 'detailed':
+                # Detailed JSON output with all event information
+                windows = compute_access_windows(
+                    args.lat, args.lon, tle_lines, start_utc, end_utc, 
+                    args.elevation_deg, args.step_seconds, args.refine, args.tolerance_seconds, args.prefilter,
+                    args.alt, args.horizon_mask, args.use_cache
+                )
+                # Convert datetime objects to ISO strings for JSON serialization
+                for window in windows:
+                    window['access_start'] = window['access_start'].isoformat()
+                    window['access_end'] = window['access_end'].isoformat()
+                    window['culmination'] = window['culmination'].isoformat()
+                    for event in window['events']:
+                        event['time'] = event['time'].isoformat()
+                print(json.dumps(windows, indent=2))
             
-    except Exception as e:
-        print(f"Error: {e}", file=sys.stderr)
-        sys.exit(1)
+            elif args.output_format in STREAM_FORMATS:
+                # Single pair, streamed one event per line
+                events = compute_access_events(
+                    args.lat, args.lon, tle_lines, start_utc, end_utc,
+                    args.satellite_id, args.location_id, args.location_type,
+                    args.elevation_deg, args.step_seconds, args.refine, args.tolerance_seconds, args.prefilter,
+                    args.alt, args.horizon_mask, args.use_cache
+                )
+                write_event_stream([events], args.output_format)
+            
+            elif args.output_format == 'events':
+                # Events format for InfluxDB storage
+                events = compute_access_events(
+                    args.lat, args.lon, tle_lines, start_utc, end_utc,
+                    args.satellite_id, args.location_id, args.location_type,
+                    args.elevation_deg, args.step_seconds, args.refine, args.tolerance_seconds, args.prefilter,
+                    args.alt, args.horizon_mask, args.use_cache
+                )
+                # Convert datetime objects to ISO strings for JSON serialization
+                for event in events:
+                    event['time'] = event['time'].isoformat()
+                print(json.dumps(events, indent=2))
+            
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    if args.metrics == 'prometheus':
+        print(metrics.get_metrics().prometheus_text(), end='', file=sys.stderr)
+    elif args.metrics == 'json':
+        print(json.dumps(metrics.get_metrics().summary()), file=sys.stderr)
 
 
 if __name__ == "__main__":
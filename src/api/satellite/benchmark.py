@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the satellite position and access window engines.
+
+Synthetic fleets (LEO element sets spread over inclinations, planes and phases,
+generated with a fixed seed) and ground station sets are run through each stage
+of the pipeline: batched and per-satellite propagation, Redis value encoding,
+pipelined fleet writes, the full refresh, and pass detection for single pairs and
+batches. Redis is replaced by an in-memory stand-in that counts round trips, so
+runs are reproducible without a server.
+
+Every benchmark reports the best wall time of --repeat runs, a throughput in its
+natural unit and the peak traced memory of one extra run. Startup benchmarks run
+the entry points in fresh interpreters, report their peak RSS instead and check
+the wall time against STARTUP_BUDGET_SECONDS. The report is JSON so
+runs can be diffed; --compare prints the time ratios against an earlier report.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# sgp4init epochs count days from 1949-12-31 00:00 UT
+SGP4_EPOCH_ORIGIN = datetime(1949, 12, 31)
+BENCHMARK_START = datetime(2024, 1, 1, 12, 0, 0)
+
+DEFAULT_FLEET_SIZES = (10, 100, 1000)
+DEFAULT_STATIONS = 10
+
+SCRIPT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Cold-start budgets (seconds, interpreter startup included) of the entry points
+STARTUP_BUDGET_SECONDS = {
+    'startup_python': None,
+    'startup_import_accesswindow': 0.5,
+    'startup_import_positions': 0.5,
+    'startup_timescale': 0.5,
+    'startup_accesswindow_cli': 2.0
+}
+
+
+class InMemoryRedis:
+    """Just enough of the redis-py client for the position writes, counting round trips."""
+
+    def __init__(self):
+        self.store = {}
+        self.round_trips = 0
+
+    def ping(self):
+        self.round_trips += 1
+        return True
+
+    def get(self, key):
+        self.round_trips += 1
+        return self.store.get(key)
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self.store.get(key) for key in keys]
+
+    def setex(self, key, ttl_seconds, value):
+        self.round_trips += 1
+        return self._set(key, value)
+
+    def set(self, key, value, ex=None):
+        self.round_trips += 1
+        return self._set(key, value)
+
+    def delete(self, *keys):
+        self.round_trips += 1
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+    def rename(self, source, destination):
+        self.round_trips += 1
+        self.store[destination] = self.store.pop(source)
+        return True
+
+    def hgetall(self, key):
+        self.round_trips += 1
+        return dict(self.store.get(key, {}))
+
+    def pipeline(self, transaction=True):
+        return _InMemoryPipeline(self)
+
+    def _set(self, key, value):
+        self.store[key] = value.encode('utf-8') if isinstance(value, str) else value
+        return True
+
+    def _hset(self, key, mapping):
+        fields = self.store.setdefault(key, {})
+        for field, value in mapping.items():
+            fields[field.encode('utf-8')] = value.encode('utf-8') if isinstance(value, str) else value
+        return len(mapping)
+
+    def _hdel(self, key, *fields):
+        stored = self.store.get(key, {})
+        return sum(stored.pop(field.encode('utf-8'), None) is not None for field in fields)
+
+
+class _InMemoryPipeline:
+    """Queued commands executed in one round trip."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def setex(self, key, ttl_seconds, value):
+        self.commands.append(lambda: self.client._set(key, value))
+        return self
+
+    def set(self, key, value, ex=None):
+        self.commands.append(lambda: self.client._set(key, value))
+        return self
+
+    def rename(self, source, destination):
+        self.commands.append(lambda: self.client.store.__setitem__(destination, self.client.store.pop(source)))
+        return self
+
+    def hset(self, key, mapping):
+        self.commands.append(lambda: self.client._hset(key, mapping))
+        return self
+
+    def hdel(self, key, *fields):
+        self.commands.append(lambda: self.client._hdel(key, *fields))
+        return self
+
+    def execute(self):
+        self.client.round_trips += 1
+        results = [command() for command in self.commands]
+        self.commands = []
+        return results
+
+
+def synthetic_fleet(count, seed=0):
+    """
+    Deterministic fleet of LEO satellites in the satellite dictionary format of the refresh.
+
+    Orbits span 400-1200 km altitude, 0-98 deg inclination and all planes and phases.
+    """
+    from sgp4.api import Satrec, WGS72
+    from sgp4.exporter import export_tle
+
+    rng = np.random.default_rng(seed)
+    epoch = (BENCHMARK_START - SGP4_EPOCH_ORIGIN).total_seconds() / 86400.0
+    fleet = []
+    for i in range(count):
+        altitude_km = rng.uniform(400.0, 1200.0)
+        semi_major_axis = 6378.135 + altitude_km
+        mean_motion = np.sqrt(398600.8 / semi_major_axis ** 3) * 60.0  # rad/min
+        satrec = Satrec()
+        satrec.sgp4init(WGS72, 'i', 70000 + i, epoch, rng.uniform(1e-5, 1e-4), 0.0, 0.0,
+                        rng.uniform(0.0001, 0.01), np.radians(rng.uniform(0.0, 360.0)),
+                        np.radians(rng.uniform(0.0, 98.0)), np.radians(rng.uniform(0.0, 360.0)),
+                        mean_motion, np.radians(rng.uniform(0.0, 360.0)))
+        tle_1, tle_2 = export_tle(satrec)
+        fleet.append({'satellite_id': i + 1, 'name': f'BENCH-{i + 1}', 'tle_1': tle_1, 'tle_2': tle_2})
+    return fleet
+
+
+def synthetic_stations(count, seed=0):
+    """Deterministic ground stations in the location dictionary format of the access engine."""
+    rng = np.random.default_rng(seed + 1)
+    return [{
+        'location_id': i + 1,
+        'location_type': 'ground_station',
+        'latitude': float(np.degrees(np.arcsin(rng.uniform(-0.95, 0.95)))),
+        'longitude': float(rng.uniform(-180.0, 180.0)),
+        'altitude': float(rng.uniform(0.0, 2000.0))
+    } for i in range(count)]
+
+
+def measure(function, repeat):
+    """
+    Run function repeat times plus once under tracemalloc.
+
+    Returns:
+        (best wall time in seconds, peak traced memory in bytes, result of the last run)
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+
+# Prepended to measured child code: reports the child's own peak RSS at exit (Linux /proc)
+_PEAK_RSS_REPORTER = """
+import atexit, sys
+def _report_peak_rss():
+    try:
+        with open('/proc/self/status') as f:
+            peak = next(line.split()[1] for line in f if line.startswith('VmHWM:'))
+        sys.stderr.write(f'\\npeak_rss_kb={peak}\\n')
+    except Exception:
+        pass
+atexit.register(_report_peak_rss)
+"""
+
+
+def measure_process(code, repeat):
+    """
+    Run Python code repeat times, each in a fresh interpreter.
+
+    Returns:
+        (best wall time in seconds, peak resident set size in bytes, 0 where unavailable)
+    """
+    best = float('inf')
+    peak = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        process = subprocess.run([sys.executable, '-c', _PEAK_RSS_REPORTER + code], cwd=SCRIPT_DIRECTORY,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        elapsed = time.perf_counter() - started
+        if process.returncode:
+            raise RuntimeError(f"Startup benchmark failed: {process.stderr}")
+        best = min(best, elapsed)
+        for line in process.stderr.splitlines():
+            if line.startswith('peak_rss_kb='):
+                peak = max(peak, int(line.split('=')[1]) * 1024)
+    return best, peak
+
+
+def _record(name, parameters, seconds, peak_bytes, work, unit, **extra):
+    record = {
+        'benchmark': name,
+        **parameters,
+        'seconds': round(seconds, 6),
+        'throughput': round(work / seconds, 3) if seconds > 0 else None,
+        'unit': unit,
+        'peak_memory_mb': round(peak_bytes / 2 ** 20, 3)
+    }
+    record.update(extra)
+    return record
+
+
+def position_benchmarks(fleet, duration_minutes, interval_seconds, repeat):
+    """Propagation, serialization, Redis writes and the full refresh for one fleet."""
+    from positions import SatellitePositionCalculator
+
+    calculator = SatellitePositionCalculator(redis_client=InMemoryRedis())
+    parameters = {'satellites': len(fleet), 'duration_minutes': duration_minutes,
+                  'interval_seconds': interval_seconds}
+    samples = len(fleet) * (duration_minutes * 60 // interval_seconds + 1)
+    records = []
+
+    def propagate():
+        fleet_arrays = calculator.propagate_fleet(fleet, BENCHMARK_START, duration_minutes, interval_seconds)
+        return [calculator.fleet_position_arrays(fleet_arrays, i) for i in range(len(fleet_arrays['satellites']))]
+
+    seconds, peak, arrays = measure(propagate, repeat)
+    records.append(_record('propagate_fleet', parameters, seconds, peak, samples, 'propagations/s'))
+
+    # The per-satellite path is much slower; cap it so large fleets stay practical
+    subset = fleet[:100]
+
+    def propagate_each():
+        return [calculator.calculate_position_arrays(
+            calculator.create_earth_satellite(sat['tle_1'], sat['tle_2'], sat['name']),
+            BENCHMARK_START, duration_minutes, interval_seconds) for sat in subset]
+
+    seconds, peak, _ = measure(propagate_each, repeat)
+    records.append(_record('calculate_position_arrays', dict(parameters, satellites=len(subset)), seconds, peak,
+                           samples * len(subset) // len(fleet), 'propagations/s'))
+
+    for storage_format in ('binary', 'json'):
+        calculator.storage_format = storage_format
+
+        def encode():
+            values = {}
+            for sat, sat_arrays in zip(fleet, arrays):
+                values.update(calculator.position_values(sat['satellite_id'], sat['name'], sat_arrays))
+            return values
+
+        seconds, peak, values = measure(encode, repeat)
+        size = sum(len(value) for value in values.values())
+        records.append(_record(f'serialize_{storage_format}', parameters, seconds, peak, len(fleet),
+                               'satellites/s', value_bytes=size))
+
+        def write():
+            calculator.redis_client = InMemoryRedis()
+            calculator.store_fleet_values_in_redis(values)
+            return calculator.redis_client.round_trips
+
+        seconds, peak, round_trips = measure(write, repeat)
+        records.append(_record(f'redis_write_{storage_format}', parameters, seconds, peak, len(values),
+                               'keys/s', round_trips=round_trips))
+    calculator.storage_format = 'binary'
+
+    def refresh():
+        calculator.redis_client = InMemoryRedis()
+        return calculator.calculate_and_store_satellite_positions(fleet, start_time=BENCHMARK_START)
+
+    seconds, peak, summary = measure(refresh, repeat)
+    stages = {stage: entry['total_seconds'] for stage, entry in summary['metrics']['stages'].items()}
+    records.append(_record('refresh', parameters, seconds, peak, len(fleet), 'satellites/s', stage_seconds=stages))
+
+    # Change-driven cycles after a full refresh: nothing changed, then a single TLE update
+    calculator.redis_client = InMemoryRedis()
+    calculator.refresh_changed_satellites(fleet, start_time=BENCHMARK_START)
+    record = dict(calculator.redis_client.store['satellite_ingest'])
+    cycle_time = BENCHMARK_START + timedelta(minutes=15)
+    changed = synthetic_fleet(1, seed=len(fleet))[0]
+    updated_fleet = [dict(fleet[0], tle_1=changed['tle_1'], tle_2=changed['tle_2'])] + fleet[1:]
+
+    for name, cycle_fleet in (('refresh_unchanged', fleet), ('refresh_one_changed', updated_fleet)):
+        def cycle():
+            # Every run starts from the record of the full refresh
+            calculator.redis_client.store['satellite_ingest'] = dict(record)
+            round_trips = calculator.redis_client.round_trips
+            summary = calculator.refresh_changed_satellites(cycle_fleet, start_time=cycle_time)
+            return summary['satellites_processed'], calculator.redis_client.round_trips - round_trips
+
+        seconds, peak, (processed, round_trips) = measure(cycle, repeat)
+        records.append(_record(name, parameters, seconds, peak, len(fleet), 'satellites/s',
+                               satellites_recomputed=processed, round_trips=round_trips))
+    return records
+
+
+def access_benchmarks(fleet, stations, hours, step_seconds, repeat):
+    """Pass detection for single pairs and for the batched engine over one fleet."""
+    from accesswindow import compute_access_events_batch, compute_access_windows
+
+    end = BENCHMARK_START + timedelta(hours=hours)
+    parameters = {'satellites': len(fleet), 'stations': len(stations), 'hours': hours, 'step_seconds': step_seconds}
+    records = []
+
+    # Single-pair calls, as made by the /api/accesswindow endpoints
+    pairs = [(station, sat) for sat in fleet[:10] for station in stations[:5]]
+
+    def single_pairs():
+        return sum(len(compute_access_windows(station['latitude'], station['longitude'], [sat['tle_1'], sat['tle_2']],
+                                              BENCHMARK_START, end, step_seconds=step_seconds,
+                                              altitude_m=station['altitude'], use_cache=False))
+                   for station, sat in pairs)
+
+    seconds, peak, windows = measure(single_pairs, repeat)
+    records.append(_record('compute_access_windows', dict(parameters, satellites=min(len(fleet), 10),
+                                                          stations=min(len(stations), 5)),
+                           seconds, peak, len(pairs), 'pairs/s', windows=windows))
+
+    for refine, step in ((False, step_seconds), (True, 120)):
+        def batch():
+            return compute_access_events_batch(stations, fleet, BENCHMARK_START, end, step_seconds=step,
+                                               refine=refine)
+
+        seconds, peak, events = measure(batch, repeat)
+        records.append(_record('compute_access_events_batch' + ('_refined' if refine else ''),
+                               dict(parameters, step_seconds=step), seconds, peak,
+                               len(fleet) * len(stations), 'pairs/s', events=len(events)))
+    return records
+
+
+def startup_benchmarks(repeat):
+    """Cold start of the entry points, each in a fresh interpreter; the pass cache is bypassed."""
+    sat = synthetic_fleet(1)[0]
+    station = synthetic_stations(1)[0]
+    cli_arguments = ['accesswindow.py', '--lat', str(station['latitude']), '--lon', str(station['longitude']),
+                     '--tle1', sat['tle_1'], '--tle2', sat['tle_2'], '--start_utc', BENCHMARK_START.isoformat(),
+                     '--end_utc', (BENCHMARK_START + timedelta(days=1)).isoformat(), '--no_cache']
+    commands = {
+        'startup_python': 'pass',
+        'startup_import_accesswindow': 'import accesswindow',
+        'startup_import_positions': 'import positions',
+        'startup_timescale': 'import tlecache; tlecache.get_timescale()',
+        'startup_accesswindow_cli': (f"import runpy, sys; sys.argv = {cli_arguments!r}; "
+                                     f"runpy.run_path('accesswindow.py', run_name='__main__')")
+    }
+    
+    records = []
+    for name, code in commands.items():
+        seconds, peak = measure_process(code, repeat)
+        budget = STARTUP_BUDGET_SECONDS[name]
+        records.append(_record(name, {}, seconds, peak, 1, 'starts/s', budget_seconds=budget,
+                               within_budget=None if budget is None else seconds <= budget))
+    return records
+
+
+def run_benchmarks(fleet_sizes=DEFAULT_FLEET_SIZES, stations=DEFAULT_STATIONS, duration_minutes=270,
+                   interval_seconds=60, access_hours=24, access_step_seconds=30, repeat=3, seed=0,
+                   include=('positions', 'access', 'startup')):
+    """
+    Run the benchmark suite.
+
+    Returns:
+        Report dictionary: {'environment': {...}, 'parameters': {...}, 'results': [...]}
+    """
+    import sgp4
+    import skyfield
+
+    station_set = synthetic_stations(stations, seed)
+    results = []
+    if 'startup' in include:
+        results.extend(startup_benchmarks(repeat))
+    for size in (fleet_sizes if {'positions', 'access'} & set(include) else ()):
+        fleet = synthetic_fleet(size, seed)
+        if 'positions' in include:
+            results.extend(position_benchmarks(fleet, duration_minutes, interval_seconds, repeat))
+        if 'access' in include:
+            results.extend(access_benchmarks(fleet, station_set, access_hours, access_step_seconds, repeat))
+        print(f"Benchmarked fleet of {size}", file=sys.stderr)
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'sgp4': sgp4.__version__,
+            'skyfield': skyfield.__version__,
+            'run_at': datetime.utcnow().isoformat()
+        },
+        'parameters': {
+            'fleet_sizes': list(fleet_sizes),
+            'stations': stations,
+            'duration_minutes': duration_minutes,
+            'interval_seconds': interval_seconds,
+            'access_hours': access_hours,
+            'access_step_seconds': access_step_seconds,
+            'repeat': repeat,
+            'seed': seed
+        },
+        'results': results
+    }
+
+
+def _result_key(record):
+    return tuple(sorted((key, value) for key, value in record.items()
+                        if key in ('benchmark', 'satellites', 'stations', 'step_seconds')))
+
+
+def compare_reports(baseline, report):
+    """Lines of 'benchmark parameters: old -> new seconds (ratio)' for results present in both reports."""
+    previous = {_result_key(record): record for record in baseline['results']}
+    lines = []
+    for record in report['results']:
+        old = previous.get(_result_key(record))
+        if old and old['seconds']:
+            label = ' '.join(f"{key}={value}" for key, value in _result_key(record) if key != 'benchmark')
+            lines.append(f"{record['benchmark']:<36} {label:<40} {old['seconds']:.4f}s -> {record['seconds']:.4f}s "
+                         f"({record['seconds'] / old['seconds']:.2f}x)")
+    return lines
+
+
+def main():
+    """Command-line interface for the benchmark suite."""
+    parser = argparse.ArgumentParser(description='Benchmark satellite propagation and access window computation')
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')],
+                        default=list(DEFAULT_FLEET_SIZES), help='Comma-separated fleet sizes (default: 10,100,1000)')
+    parser.add_argument('--stations', type=int, default=DEFAULT_STATIONS, help='Number of ground stations')
+    parser.add_argument('--duration_minutes', type=int, default=270, help='Position window in minutes')
+    parser.add_argument('--interval_seconds', type=int, default=60, help='Position sample interval')
+    parser.add_argument('--access_hours', type=float, default=24, help='Access window horizon in hours')
+    parser.add_argument('--access_step_seconds', type=int, default=30, help='Access window time step')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark (best is reported)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic fleet and stations')
+    parser.add_argument('--only', choices=['positions', 'access', 'startup'], help='Run one group of benchmarks')
+    parser.add_argument('--output', type=str, help='Write the JSON report to this file (default: stdout)')
+    parser.add_argument('--compare', type=str, help='Earlier JSON report to compare the timings against')
+    parser.add_argument('--log_level', type=str, default='WARNING',
+                        help='Log level of the benchmarked modules (default: WARNING, as per-satellite INFO '
+                             'logging would dominate small timings)')
+
+    args = parser.parse_args()
+    # Configured before positions.py is imported, so its basicConfig leaves the level alone
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(levelname)s - %(message)s')
+    report = run_benchmarks(args.sizes, args.stations, args.duration_minutes, args.interval_seconds,
+                            args.access_hours, args.access_step_seconds, max(1, args.repeat), args.seed,
+                            (args.only,) if args.only else ('positions', 'access', 'startup'))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        print('\n'.join(compare_reports(baseline, report)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
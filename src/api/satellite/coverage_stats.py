@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Coverage and revisit statistics from access events.
+
+Planners mostly look at aggregate numbers per target: how often it is seen, how
+long the gaps between accesses are and how much access time it gets per day. This
+module computes them directly from the events of the batched access engine instead
+of reading every event back out of InfluxDB.
+
+Passes are turned into flat NumPy arrays once. Overlapping passes of different
+satellites over the same location are merged into access intervals with a running
+maximum of the end times, with every group shifted onto its own stretch of the time
+axis so that one array operation handles all groups. Totals, gaps and revisit times
+are then reduced per group with bincount/reduceat.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+OUTPUT_FORMATS = ('table', 'json')
+
+_SECONDS_PER_DAY = 86400.0
+
+
+def _as_datetime(value):
+    """Accept datetimes or ISO strings (as returned by the worker protocol) as naive UTC datetimes."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+def _event_arrays(events, start_utc, by_satellite):
+    """
+    Group keys and pass start/end offsets (seconds from start_utc) of the access events.
+
+    The n-th access_start of a satellite/location pair belongs to its n-th access_end, so
+    both kinds are sorted by (pair, time) and matched positionally.
+    """
+    pair_ids = {}
+    kinds, pairs, offsets = [], [], []
+    for event in events:
+        if event['event_type'] not in ('access_start', 'access_end'):
+            continue
+        pair = (str(event['location_id']), event['location_type'], str(event['satellite_id']))
+        kinds.append(event['event_type'] == 'access_start')
+        pairs.append(pair_ids.setdefault(pair, len(pair_ids)))
+        offsets.append((_as_datetime(event['time']) - start_utc).total_seconds())
+
+    kinds = np.array(kinds, dtype=bool)
+    pairs = np.array(pairs, dtype=np.int64)
+    offsets = np.array(offsets, dtype=float)
+
+    starts = np.lexsort((offsets[kinds], pairs[kinds]))
+    ends = np.lexsort((offsets[~kinds], pairs[~kinds]))
+    if starts.size != ends.size:
+        raise ValueError('access_start and access_end events do not pair up')
+
+    pair_keys = list(pair_ids)
+    group_keys = [pair if by_satellite else pair[:2] for pair in pair_keys]
+    return pairs[kinds][starts], offsets[kinds][starts], offsets[~kinds][ends], pair_keys, group_keys
+
+
+def coverage_statistics(events, start_utc, end_utc, locations=None, satellites=None, by_satellite=False):
+    """
+    Compute coverage, gap and revisit statistics per location (or per location and satellite).
+
+    Args:
+        events: Access events as returned by compute_access_events(_batch); times may be
+            datetimes or ISO strings
+        start_utc, end_utc: Analysis horizon (UTC, as datetime.datetime); passes are clipped to it
+        locations: Optional location dictionaries (location_id, location_type) so that
+            locations without any access are reported too
+        satellites: Optional satellite dictionaries (satellite_id), used with by_satellite
+            to report pairs without any access
+        by_satellite: Report every satellite/location pair instead of the fleet per location
+
+    Returns:
+        List of dictionaries, one per location (and satellite), with:
+        passes, accesses (merged overlapping passes), total_access_minutes,
+        access_minutes_per_day, coverage_percent, first_access, time_to_first_access_minutes,
+        mean_gap_minutes, max_gap_minutes (no access at the horizon edges counts as a gap),
+        mean_revisit_minutes, max_revisit_minutes (between successive access starts; None
+        with fewer than two accesses)
+    """
+    span = (end_utc - start_utc).total_seconds()
+    pass_pairs, pass_starts, pass_ends, pair_keys, pair_groups = _event_arrays(events, start_utc, by_satellite)
+
+    # Group ids, seeded with every requested location (and satellite) in request order
+    group_ids = {}
+    for location in locations or []:
+        key = (str(location['location_id']), location.get('location_type', 'ground_station'))
+        if by_satellite:
+            for satellite in satellites or []:
+                group_ids.setdefault(key + (str(satellite['satellite_id']),), len(group_ids))
+        else:
+            group_ids.setdefault(key, len(group_ids))
+    pair_group = np.array([group_ids.setdefault(key, len(group_ids)) for key in pair_groups], dtype=np.int64)
+    group_count = len(group_ids)
+
+    pass_starts = np.clip(pass_starts, 0.0, span)
+    pass_ends = np.clip(pass_ends, 0.0, span)
+    inside = pass_ends > pass_starts
+    groups = pair_group[pass_pairs[inside]] if pair_group.size else np.zeros(0, dtype=np.int64)
+    pass_counts = np.bincount(groups, minlength=group_count)
+
+    # Shift each group onto its own stretch of the axis so intervals never merge across groups
+    width = span + 1.0
+    order = np.lexsort((pass_starts[inside], groups))
+    groups = groups[order]
+    shifted_starts = pass_starts[inside][order] + groups * width
+    shifted_ends = pass_ends[inside][order] + groups * width
+
+    if groups.size:
+        reach = np.maximum.accumulate(shifted_ends)
+        first = np.flatnonzero(np.concatenate([[True], shifted_starts[1:] > reach[:-1]]))
+        access_groups = groups[first]
+        access_starts = shifted_starts[first] - access_groups * width
+        access_ends = np.maximum.reduceat(shifted_ends, first) - access_groups * width
+    else:
+        access_groups = np.zeros(0, dtype=np.int64)
+        access_starts = access_ends = np.zeros(0)
+
+    access_counts = np.bincount(access_groups, minlength=group_count)
+    access_seconds = np.bincount(access_groups, weights=access_ends - access_starts, minlength=group_count)
+
+    # Gaps: between successive accesses of a group, plus the horizon edges without access
+    same = access_groups[1:] == access_groups[:-1]
+    revisits = (access_starts[1:] - access_starts[:-1])[same]
+    revisit_groups = access_groups[1:][same]
+    group_first = np.concatenate([[True], ~same]) if access_groups.size else np.zeros(0, dtype=bool)
+    group_last = np.concatenate([~same, [True]]) if access_groups.size else np.zeros(0, dtype=bool)
+    empty = np.flatnonzero(access_counts == 0)
+    gaps = np.concatenate([(access_starts[1:] - access_ends[:-1])[same], access_starts[group_first],
+                           span - access_ends[group_last], np.full(empty.size, span)])
+    gap_groups = np.concatenate([revisit_groups, access_groups[group_first], access_groups[group_last], empty])
+    gap_groups, gaps = gap_groups[gaps > 0], gaps[gaps > 0]
+
+    gap_counts = np.bincount(gap_groups, minlength=group_count)
+    gap_sums = np.bincount(gap_groups, weights=gaps, minlength=group_count)
+    max_gaps = np.zeros(group_count)
+    np.maximum.at(max_gaps, gap_groups, gaps)
+    revisit_counts = np.bincount(revisit_groups, minlength=group_count)
+    revisit_sums = np.bincount(revisit_groups, weights=revisits, minlength=group_count)
+    max_revisits = np.zeros(group_count)
+    np.maximum.at(max_revisits, revisit_groups, revisits)
+    first_starts = np.full(group_count, np.nan)
+    first_starts[access_groups[group_first]] = access_starts[group_first]
+
+    days = span / _SECONDS_PER_DAY if span > 0 else np.nan
+    statistics = []
+    for key, g in group_ids.items():
+        row = {'location_id': key[0], 'location_type': key[1]}
+        if by_satellite:
+            row['satellite_id'] = key[2]
+        has_first = not np.isnan(first_starts[g])
+        row.update({
+            'passes': int(pass_counts[g]),
+            'accesses': int(access_counts[g]),
+            'total_access_minutes': float(access_seconds[g] / 60.0),
+            'access_minutes_per_day': float(access_seconds[g] / 60.0 / days),
+            'coverage_percent': float(100.0 * access_seconds[g] / span) if span > 0 else 0.0,
+            'first_access': start_utc + timedelta(seconds=float(first_starts[g])) if has_first else None,
+            'time_to_first_access_minutes': float(first_starts[g] / 60.0) if has_first else None,
+            'mean_gap_minutes': float(gap_sums[g] / gap_counts[g] / 60.0) if gap_counts[g] else 0.0,
+            'max_gap_minutes': float(max_gaps[g] / 60.0),
+            'mean_revisit_minutes': float(revisit_sums[g] / revisit_counts[g] / 60.0) if revisit_counts[g] else None,
+            'max_revisit_minutes': float(max_revisits[g] / 60.0) if revisit_counts[g] else None
+        })
+        statistics.append(row)
+    return statistics
+
+
+def compute_coverage(locations, satellites, start_utc, end_utc, elevation_deg=10.0, step_seconds=30,
+                     by_satellite=False, workers=1):
+    """
+    Run the batched access engine for every pair and reduce its events to coverage statistics.
+
+    Args:
+        locations, satellites: As for compute_access_events_batch
+        start_utc, end_utc: Start and end datetime (UTC, as datetime.datetime)
+        elevation_deg: Minimum elevation angle in degrees (default: 10.0)
+        step_seconds: Time step in seconds (default: 30)
+        by_satellite: Report every satellite/location pair (see coverage_statistics)
+        workers: Number of processes to shard the satellites across (default: 1)
+
+    Returns:
+        Output of coverage_statistics
+    """
+    from accesswindow import compute_access_events_batch
+
+    events = compute_access_events_batch(locations, satellites, start_utc, end_utc, elevation_deg, step_seconds,
+                                         workers=workers)
+    return coverage_statistics(events, start_utc, end_utc, locations, satellites, by_satellite)
+
+
+def _format_minutes(value):
+    return '-' if value is None else f"{value:.1f}"
+
+
+def format_table(statistics):
+    """Render coverage statistics as a fixed-width text table."""
+    columns = [('location', 14), ('type', 14)]
+    if statistics and 'satellite_id' in statistics[0]:
+        columns.append(('satellite', 10))
+    columns += [('passes', 7), ('access/day', 11), ('coverage%', 10), ('first', 8),
+                ('gap mean', 9), ('gap max', 9), ('revisit', 9), ('rev max', 9)]
+    lines = [' '.join(name.rjust(width) for name, width in columns)]
+    for row in statistics:
+        values = [str(row['location_id']), row['location_type']]
+        if 'satellite_id' in row:
+            values.append(str(row['satellite_id']))
+        values += [str(row['passes']), f"{row['access_minutes_per_day']:.1f}", f"{row['coverage_percent']:.2f}",
+                   _format_minutes(row['time_to_first_access_minutes']), _format_minutes(row['mean_gap_minutes']),
+                   _format_minutes(row['max_gap_minutes']), _format_minutes(row['mean_revisit_minutes']),
+                   _format_minutes(row['max_revisit_minutes'])]
+        lines.append(' '.join(value.rjust(width) for value, (_, width) in zip(values, columns)))
+    return '\n'.join(lines)
+
+
+def main():
+    """Command-line interface for coverage statistics."""
+    parser = argparse.ArgumentParser(description='Compute coverage and revisit statistics per location')
+    parser.add_argument('--batch-file', dest='batch_file', type=str, required=True,
+                       help='accesswindow.py batch file with "locations" and "satellites"')
+    parser.add_argument('--events-file', dest='events_file', type=str,
+                       help='JSON events as printed by accesswindow.py --batch-file (default: compute them)')
+    parser.add_argument('--start_utc', type=str, required=True, help='Start time in ISO format')
+    parser.add_argument('--end_utc', type=str, required=True, help='End time in ISO format')
+    parser.add_argument('--elevation_deg', type=float, default=10.0, help='Minimum elevation in degrees')
+    parser.add_argument('--step_seconds', type=int, default=30, help='Time step in seconds')
+    parser.add_argument('--location_type', type=str, choices=['ground_station', 'target'],
+                       help='Only report locations of this type (default: all)')
+    parser.add_argument('--by-satellite', dest='by_satellite', action='store_true',
+                       help='Report every satellite/location pair instead of the whole fleet per location')
+    parser.add_argument('--workers', type=int,
+                       help='Processes to shard the satellites across (default: $SATELLITE_COMPUTE_WORKERS or the CPU count)')
+    parser.add_argument('--output_format', type=str, choices=OUTPUT_FORMATS, default='table',
+                       help='Output format: table (text) or json')
+
+    args = parser.parse_args()
+
+    try:
+        from accesswindow import _parse_utc
+        from parallel import default_workers
+
+        start_utc = _parse_utc(args.start_utc)
+        end_utc = _parse_utc(args.end_utc)
+        with open(args.batch_file, 'r') as f:
+            batch = json.load(f)
+        locations = [location for location in batch['locations']
+                     if args.location_type in (None, location.get('location_type'))]
+
+        if args.events_file:
+            with open(args.events_file, 'r') as f:
+                events = json.load(f)
+            statistics = coverage_statistics(events, start_utc, end_utc, locations, batch['satellites'],
+                                             args.by_satellite)
+        else:
+            statistics = compute_coverage(locations, batch['satellites'], start_utc, end_utc,
+                                          args.elevation_deg, args.step_seconds, args.by_satellite,
+                                          args.workers or default_workers())
+        if args.location_type:
+            statistics = [row for row in statistics if row['location_type'] == args.location_type]
+
+        if args.output_format == 'json':
+            for row in statistics:
+                if row['first_access'] is not None:
+                    row['first_access'] = row['first_access'].isoformat()
+            print(json.dumps(statistics, indent=2))
+        else:
+            print(format_table(statistics))
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Change-driven TLE ingestion for the position refresh.
+
+TLEs change a few times a day, so most refresh cycles have nothing to do. Each
+satellite's TLE pair is fingerprinted and the ingestion record keeps, per satellite,
+the fingerprint and epoch of the element set its stored products were computed
+from and when those products expire. A cycle then hands the engine only the
+satellites that are new, whose TLE changed or whose products expire within the
+refresh margin; satellites that disappeared from the input are reported as removed.
+
+Redis layout:
+    {INGEST_RECORD_KEY}  hash of satellite_id -> JSON {'fingerprint', 'epoch', 'computed_at', 'expires_at'}
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+INGEST_RECORD_KEY = 'satellite_ingest'
+
+# Reasons a satellite is recomputed, in the order they are checked
+REFRESH_REASONS = ('new', 'tle_changed', 'expiring')
+
+
+def tle_fingerprint(tle_line1, tle_line2):
+    """Digest of a TLE pair; any change to the element set changes it."""
+    return hashlib.sha1(f"{tle_line1.strip()}\n{tle_line2.strip()}".encode('utf-8')).hexdigest()[:16]
+
+
+def tle_epoch(tle_line1):
+    """
+    Epoch of a TLE as a naive UTC datetime.
+
+    Columns 19-32 of line 1 hold the two-digit year (57-99 -> 1900s) and the fractional day of year.
+    """
+    year = int(tle_line1[18:20])
+    year += 1900 if year >= 57 else 2000
+    return datetime(year, 1, 1) + timedelta(days=float(tle_line1[20:32]) - 1.0)
+
+
+def plan_refresh(satellites, record, now, margin_seconds, force=False):
+    """
+    Decide which satellites need their products recomputed.
+
+    Args:
+        satellites: Satellite dictionaries with satellite_id, tle_1, tle_2 (the current fleet)
+        record: Ingestion record, satellite_id (str) -> entry (see record_entry)
+        now: Current time (naive UTC)
+        margin_seconds: Recompute products expiring within this many seconds
+        force: Recompute every satellite
+
+    Returns:
+        Dictionary with 'refresh' (satellite dictionaries to recompute, input order),
+        'reasons' (satellite_id -> one of REFRESH_REASONS), 'unchanged' and 'removed'
+        (satellite IDs as strings)
+    """
+    refresh = []
+    reasons = {}
+    unchanged = []
+    current = set()
+
+    for sat in satellites:
+        satellite_id = str(sat['satellite_id'])
+        current.add(satellite_id)
+        entry = record.get(satellite_id)
+
+        if entry is None:
+            reason = 'new'
+        elif entry['fingerprint'] != tle_fingerprint(sat['tle_1'], sat['tle_2']):
+            reason = 'tle_changed'
+        elif force or datetime.fromisoformat(entry['expires_at']) - now <= timedelta(seconds=margin_seconds):
+            reason = 'expiring'
+        else:
+            unchanged.append(satellite_id)
+            continue
+
+        refresh.append(sat)
+        reasons[satellite_id] = reason
+
+    return {
+        'refresh': refresh,
+        'reasons': reasons,
+        'unchanged': unchanged,
+        'removed': sorted(satellite_id for satellite_id in record if satellite_id not in current)
+    }
+
+
+def record_entry(sat, computed_at, expires_at):
+    """Ingestion record entry for a satellite whose products were computed at computed_at."""
+    try:
+        epoch = tle_epoch(sat['tle_1']).isoformat()
+    except ValueError:
+        epoch = None
+    return {
+        'fingerprint': tle_fingerprint(sat['tle_1'], sat['tle_2']),
+        'epoch': epoch,
+        'computed_at': computed_at.isoformat(),
+        'expires_at': expires_at.isoformat()
+    }
+
+
+def load_record(redis_client, key=INGEST_RECORD_KEY):
+    """Read the ingestion record from Redis."""
+    return {(field.decode('utf-8') if isinstance(field, bytes) else field): json.loads(value)
+            for field, value in redis_client.hgetall(key).items()}
+
+
+def save_record(redis_client, entries, removed=(), key=INGEST_RECORD_KEY):
+    """Store updated entries and drop removed satellites in one pipelined round trip."""
+    pipeline = redis_client.pipeline(transaction=True)
+    if entries:
+        pipeline.hset(key, mapping={satellite_id: json.dumps(entry) for satellite_id, entry in entries.items()})
+    if removed:
+        pipeline.hdel(key, *removed)
+    pipeline.execute()
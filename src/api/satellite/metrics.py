@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing, counters and profiling shared by the satellite scripts.
+
+Pipeline code wraps each stage (TLE parse, propagation, subpoint/altaz, pass
+detection, serialization, Redis I/O) in stage(name) and counts work with
+count(name). Stage times are exclusive: time spent in a nested stage is charged
+to that stage only, so the stage totals of a call add up to its instrumented wall
+time and a regression shows up in the stage that caused it.
+
+Measurements go to the innermost collect() block (e.g. one position refresh,
+whose summary is returned to Node) and, when it ends, into the process-wide
+totals reported by the worker 'metrics' method, optionally as Prometheus text.
+
+Setting SATELLITE_PROFILE to a directory turns on a sampling profiler for
+profiled() blocks: the Python stack is sampled every SATELLITE_PROFILE_INTERVAL_MS
+milliseconds of CPU time (default 10) and written as collapsed stacks
+(<name>-<pid>-<time>.folded, one 'frame;frame;frame count' line per stack),
+ready for flamegraph tools.
+"""
+import contextlib
+import os
+import signal
+import threading
+import time
+from collections import Counter
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = 'satellite'
+
+
+class Metrics:
+    """Stage duration histograms and counters of one collection period."""
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = Counter()
+
+    def observe(self, stage, seconds):
+        """Record one run of a stage."""
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = {'count': 0, 'total': 0.0, 'max': 0.0,
+                                          'buckets': [0] * len(STAGE_BUCKETS)}
+        entry['count'] += 1
+        entry['total'] += seconds
+        entry['max'] = max(entry['max'], seconds)
+        for i, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                entry['buckets'][i] += 1
+                break
+
+    def merge(self, other):
+        """Add the measurements of another Metrics (e.g. from a worker process shard)."""
+        for stage, theirs in other.stages.items():
+            entry = self.stages.get(stage)
+            if entry is None:
+                self.stages[stage] = {'count': theirs['count'], 'total': theirs['total'], 'max': theirs['max'],
+                                      'buckets': list(theirs['buckets'])}
+                continue
+            entry['count'] += theirs['count']
+            entry['total'] += theirs['total']
+            entry['max'] = max(entry['max'], theirs['max'])
+            entry['buckets'] = [a + b for a, b in zip(entry['buckets'], theirs['buckets'])]
+        self.counters.update(other.counters)
+
+    def summary(self):
+        """
+        JSON-ready summary.
+
+        Returns:
+            {'stages': {stage: {'count', 'total_seconds', 'max_seconds'}}, 'counters': {name: value}}
+        """
+        return {
+            'stages': {stage: {'count': entry['count'],
+                               'total_seconds': round(entry['total'], 6),
+                               'max_seconds': round(entry['max'], 6)}
+                       for stage, entry in sorted(self.stages.items())},
+            'counters': dict(sorted(self.counters.items()))
+        }
+
+    def prometheus_text(self, labels=None):
+        """
+        Prometheus text exposition of the stage histograms and counters.
+
+        Args:
+            labels: Extra labels added to every sample (e.g. script and pid)
+        """
+        extra = ''.join(f',{key}="{value}"' for key, value in sorted((labels or {}).items()))
+        lines = [f'# HELP {METRIC_PREFIX}_stage_seconds Exclusive time spent in each pipeline stage',
+                 f'# TYPE {METRIC_PREFIX}_stage_seconds histogram']
+        for stage, entry in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, bucket in zip(STAGE_BUCKETS, entry['buckets']):
+                cumulative += bucket
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{bound}"{extra}}} '
+                             f'{cumulative}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_bucket{{stage="{stage}",le="+Inf"{extra}}} '
+                         f'{entry["count"]}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{stage}"{extra}}} {entry["total"]:.6f}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{stage}"{extra}}} {entry["count"]}')
+        counter_labels = f'{{{extra[1:]}}}' if extra else ''
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'# TYPE {METRIC_PREFIX}_{name}_total counter')
+            lines.append(f'{METRIC_PREFIX}_{name}_total{counter_labels} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# Collectors, innermost last; the first holds the totals of the process
+_collectors = [Metrics()]
+# Open stages, innermost last: [name, start time, time spent in nested stages]
+_open_stages = []
+# Whether a profiled() block is sampling
+_profiling = False
+
+
+def get_metrics():
+    """Return the process-wide totals."""
+    return _collectors[0]
+
+
+@contextlib.contextmanager
+def collect(detached=False):
+    """
+    Collect the measurements of a block into a fresh Metrics.
+
+    The yielded Metrics is complete when the block ends; its contents are then
+    also added to the enclosing collector, unless detached (for measurements that
+    are returned to a caller and merged there, e.g. by a process-pool shard).
+    """
+    metrics = Metrics()
+    _collectors.append(metrics)
+    try:
+        yield metrics
+    finally:
+        _collectors.pop()
+        if not detached:
+            _collectors[-1].merge(metrics)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time a block as one run of a pipeline stage (exclusive of nested stages)."""
+    entry = [name, time.perf_counter(), 0.0]
+    _open_stages.append(entry)
+    try:
+        yield
+    finally:
+        _open_stages.pop()
+        elapsed = time.perf_counter() - entry[1]
+        if _open_stages:
+            _open_stages[-1][2] += elapsed
+        _collectors[-1].observe(name, elapsed - entry[2])
+
+
+def count(name, value=1):
+    """Add value to a counter."""
+    _collectors[-1].counters[name] += value
+
+
+def merge(metrics):
+    """Add measurements taken elsewhere (e.g. returned by a worker process) to the current collector."""
+    _collectors[-1].merge(metrics)
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+@contextlib.contextmanager
+def profiled(name):
+    """
+    Sample the Python stack during a block when SATELLITE_PROFILE is set.
+
+    Does nothing when the variable is unset, sampling is unavailable (no
+    setitimer on this platform, or not on the main thread) or an enclosing
+    profiled() block is already sampling.
+    """
+    global _profiling
+    directory = os.environ.get('SATELLITE_PROFILE')
+    if (_profiling or not directory or not hasattr(signal, 'setitimer')
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    interval = float(os.environ.get('SATELLITE_PROFILE_INTERVAL_MS', '10')) / 1000.0
+    samples = Counter()
+
+    def sample(signum, frame):
+        stack = []
+        while frame is not None:
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+        samples[';'.join(reversed(stack))] += 1
+
+    previous = signal.signal(signal.SIGPROF, sample)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    _profiling = True
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+        _profiling = False
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}-{os.getpid()}-{int(time.time())}.folded")
+        with open(path, 'w') as f:
+            for stack, hits in samples.most_common():
+                f.write(f"{stack} {hits}\n")
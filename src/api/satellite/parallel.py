@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Process-pool helpers shared by the satellite scripts.
+
+Work is split into contiguous shards and results come back in shard order, so a
+parallel run produces exactly the same output ordering as a serial one.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def default_workers():
+    """Worker count from SATELLITE_COMPUTE_WORKERS, defaulting to the number of CPUs."""
+    workers = os.environ.get('SATELLITE_COMPUTE_WORKERS')
+    return max(1, int(workers) if workers else os.cpu_count() or 1)
+
+
+def shard(items, count):
+    """Split items into at most count contiguous shards of near-equal size."""
+    count = max(1, min(count, len(items)))
+    size, extra = divmod(len(items), count)
+    shards = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(items[start:end])
+        start = end
+    return shards
+
+
+def map_shards(function, items, workers):
+    """
+    Apply function to contiguous shards of items, one process per shard.
+
+    Args:
+        function: Picklable callable taking a list of items
+        items: List to split across workers
+        workers: Maximum number of worker processes; 1 runs in-process
+
+    Returns:
+        List of per-shard results in shard order
+    """
+    return list(imap_shards(function, items, workers))
+
+
+def imap_shards(function, items, workers):
+    """
+    Generator form of map_shards: yields each shard's result, in shard order, as soon as
+    it and every shard before it have finished.
+    """
+    shards = shard(items, workers)
+    if len(shards) == 1:
+        yield function(shards[0])
+        return
+
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        yield from executor.map(function, shards)
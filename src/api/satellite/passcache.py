@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Redis-backed cache of computed access windows.
+
+Planners keep reopening the same station views, so compute_access_windows results
+are stored under a content-addressed key: a hash of the TLE lines, location
+(lat/lon/altitude/horizon mask) and computation parameters, plus the sample grid
+of the requested range. A request whose grid lies inside a cached range (same
+step, aligned start) is answered from that entry by dropping the windows outside
+it, as long as no cached window straddles the requested range boundaries (a fresh
+computation would truncate those passes).
+
+Redis layout, all under PASS_CACHE_PREFIX:
+    {prefix}:{param_hash}:{start}:{last}  JSON list of windows for one computed range
+    {prefix}:ranges:{param_hash}          sorted set of 'start:last' ranges, scored by start
+    {prefix}:lru                          sorted set of entry keys, scored by last use
+
+The cache is opt-in: callers pass use_cache=True (--cache on the command line), or
+set PASS_CACHE_ENABLED=1 for every call that leaves use_cache unset, such as the
+worker processes of the API. Entries expire PASS_CACHE_TTL_SECONDS after their last
+use, and once more than PASS_CACHE_MAX_ENTRIES are stored the least recently used
+are evicted. Setting PASS_CACHE_TTL_SECONDS=0 disables the cache. Redis is reached
+through REDIS_HOST, REDIS_PORT and REDIS_DB; if it is unavailable the cache stays
+disabled for the rest of the process and results are simply recomputed.
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+PASS_CACHE_PREFIX = 'pass_cache'
+PASS_CACHE_ENABLED = os.environ.get('PASS_CACHE_ENABLED', '0') == '1'
+PASS_CACHE_TTL_SECONDS = int(os.environ.get('PASS_CACHE_TTL_SECONDS', '3600'))
+PASS_CACHE_MAX_ENTRIES = int(os.environ.get('PASS_CACHE_MAX_ENTRIES', '10000'))
+
+# Bump when the access window algorithm changes so old results are never served
+PASS_CACHE_VERSION = 2
+
+_EPOCH = datetime(1970, 1, 1)
+_UNSET = object()
+_pass_cache = _UNSET
+
+
+def _epoch_seconds(value):
+    return (value - _EPOCH).total_seconds()
+
+
+def _encode_windows(windows):
+    def encode(item):
+        if isinstance(item, datetime):
+            return item.isoformat()
+        raise TypeError(f"Cannot cache value of type {type(item).__name__}")
+    return json.dumps(windows, default=encode)
+
+
+def _decode_windows(value):
+    windows = json.loads(value)
+    for window in windows:
+        for key in ('access_start', 'access_end', 'culmination'):
+            window[key] = datetime.fromisoformat(window[key])
+        for event in window['events']:
+            event['time'] = datetime.fromisoformat(event['time'])
+    return windows
+
+
+class PassCache:
+    """Access window cache on top of a Redis client (see module docstring for the layout)."""
+
+    def __init__(self, redis_client, ttl_seconds=PASS_CACHE_TTL_SECONDS, max_entries=PASS_CACHE_MAX_ENTRIES,
+                 prefix=PASS_CACHE_PREFIX):
+        self.redis_client = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.prefix = prefix
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def param_hash(tle_lines, lat, lon, altitude_m, horizon_mask, elevation_deg, step_seconds, refine,
+                   tolerance_seconds):
+        """Hash of everything except the time range that determines the computed windows."""
+        params = [PASS_CACHE_VERSION, tle_lines[0].strip(), tle_lines[1].strip(), float(lat), float(lon),
+                  float(altitude_m), horizon_mask, float(elevation_deg), float(step_seconds), bool(refine),
+                  float(tolerance_seconds) if refine else None]
+        return hashlib.sha256(json.dumps(params).encode('utf-8')).hexdigest()
+
+    def _entry_key(self, param_hash, member):
+        return f"{self.prefix}:{param_hash}:{member}"
+
+    def _ranges_key(self, param_hash):
+        return f"{self.prefix}:ranges:{param_hash}"
+
+    @staticmethod
+    def _range_member(grid_start, last_offset):
+        start = _epoch_seconds(grid_start)
+        return f"{start!r}:{start + float(last_offset)!r}"
+
+    def get(self, param_hash, grid_start, last_offset, step_seconds):
+        """
+        Look up the windows for the grid starting at grid_start and ending last_offset seconds later.
+
+        Returns:
+            List of access windows, or None on a miss
+        """
+        member = self._range_member(grid_start, last_offset)
+        key = self._entry_key(param_hash, member)
+        value = self.redis_client.get(key)
+        if value is not None:
+            self._touch(key)
+            self.hits += 1
+            return _decode_windows(value)
+
+        windows = self._get_covering(param_hash, grid_start, last_offset, step_seconds)
+        if windows is None:
+            self.misses += 1
+        else:
+            self.partial_hits += 1
+        return windows
+
+    def _get_covering(self, param_hash, grid_start, last_offset, step_seconds):
+        """Windows cut from a cached range containing the requested grid, or None."""
+        start = _epoch_seconds(grid_start)
+        last = start + float(last_offset)
+        ranges_key = self._ranges_key(param_hash)
+        for member in self.redis_client.zrangebyscore(ranges_key, '-inf', start):
+            member = member.decode('utf-8') if isinstance(member, bytes) else member
+            cached_start, cached_last = (float(part) for part in member.split(':'))
+            phase = (start - cached_start) / step_seconds
+            if cached_last < last or abs(phase - round(phase)) > 1e-6:
+                continue
+
+            key = self._entry_key(param_hash, member)
+            value = self.redis_client.get(key)
+            if value is None:
+                # Expired entry; drop it from the range index
+                self.redis_client.zrem(ranges_key, member)
+                continue
+
+            windows = []
+            for window in _decode_windows(value):
+                window_start = _epoch_seconds(window['access_start'])
+                window_end = _epoch_seconds(window['access_end'])
+                if window_end < start or window_start > last:
+                    continue
+                if window_start < start or window_end > last:
+                    # Straddles a requested boundary; a fresh computation would truncate it
+                    windows = None
+                    break
+                windows.append(window)
+            if windows is not None:
+                self._touch(key)
+                return windows
+        return None
+
+    def _touch(self, key):
+        """Restart the TTL of a used entry and mark it as most recently used."""
+        pipeline = self.redis_client.pipeline(transaction=False)
+        pipeline.expire(key, self.ttl_seconds)
+        pipeline.zadd(f"{self.prefix}:lru", {key: time.time()})
+        pipeline.execute()
+
+    def put(self, param_hash, grid_start, last_offset, windows):
+        """Store the windows computed for a grid and evict beyond max_entries."""
+        member = self._range_member(grid_start, last_offset)
+        key = self._entry_key(param_hash, member)
+        ranges_key = self._ranges_key(param_hash)
+        lru_key = f"{self.prefix}:lru"
+        now = time.time()
+
+        pipeline = self.redis_client.pipeline(transaction=False)
+        pipeline.set(key, _encode_windows(windows), ex=self.ttl_seconds)
+        pipeline.zadd(ranges_key, {member: _epoch_seconds(grid_start)})
+        pipeline.expire(ranges_key, self.ttl_seconds)
+        pipeline.zadd(lru_key, {key: now})
+        # Entries unused for a full TTL have expired already
+        pipeline.zremrangebyscore(lru_key, '-inf', now - self.ttl_seconds)
+        pipeline.zcard(lru_key)
+        size = pipeline.execute()[-1]
+
+        if size > self.max_entries:
+            self._evict(self.redis_client.zpopmin(lru_key, size - self.max_entries))
+
+    def _evict(self, entries):
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for key, _ in entries:
+            key = key.decode('utf-8') if isinstance(key, bytes) else key
+            param_hash, member = key[len(self.prefix) + 1:].split(':', 1)
+            pipeline.delete(key)
+            pipeline.zrem(self._ranges_key(param_hash), member)
+        pipeline.execute()
+
+    def info(self):
+        """Hit/miss statistics of this process, for logging."""
+        return {'hits': self.hits, 'partial_hits': self.partial_hits, 'misses': self.misses}
+
+
+def get_pass_cache():
+    """
+    Return the process-wide PassCache, connecting to Redis on first use.
+
+    Returns None when the cache is disabled or Redis cannot be reached.
+    """
+    global _pass_cache
+    if _pass_cache is _UNSET:
+        _pass_cache = None
+        if PASS_CACHE_TTL_SECONDS > 0:
+            try:
+                import redis
+                client = redis.Redis(host=os.environ.get('REDIS_HOST', 'redis'),
+                                     port=int(os.environ.get('REDIS_PORT', '6379')),
+                                     db=int(os.environ.get('REDIS_DB', '0')),
+                                     socket_connect_timeout=1.0, socket_timeout=1.0)
+                client.ping()
+                _pass_cache = PassCache(client)
+            except Exception as e:
+                print(f"Pass cache disabled: {e}", file=sys.stderr)
+    return _pass_cache
@@ -4,13 +4,25 @@ Satellite position calculation using Skyfield library.
 Calculates satellite positions for specified time periods and stores in Redis.
 """
 
+import functools
 import json
-import redis
+import math
+import time
+import uuid
+import struct
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
-from skyfield.api import load, EarthSatellite, utc
-from skyfield.timelib import Time
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import numpy as np
+from sgp4.api import SatrecArray, SGP4_ERRORS, jday
+# Skyfield submodules directly: skyfield.api also imports star catalogs, ephemeris and download support
+from skyfield.framelib import itrs
+from skyfield.sgp4lib import EarthSatellite, TEME
+from skyfield.timelib import Time, utc
+from skyfield.toposlib import iers2010
+
+import metrics
+from tlecache import get_timescale, load_satellite, load_satrec, cache_info
 import sys
 import os
 
@@ -18,11 +30,361 @@ import os
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# IERS2010 ellipsoid, matching the geoid used by Skyfield's subpoint()
+IERS2010_RADIUS_KM = 6378.1366
+IERS2010_E2 = (2.0 - 1.0 / 298.25642) / 298.25642
+
+
+def geodetic_from_itrs(xyz_km: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convert ITRS cartesian coordinates to geodetic latitude, longitude and height.
+    
+    Uses the same fixed-iteration solution as Skyfield's Geoid so results match
+    EarthSatellite.at(t).subpoint() for arrays of any shape.
+    
+    Args:
+        xyz_km: Array of shape (3, ...) with ITRS x, y, z in kilometers
+        
+    Returns:
+        Tuple of (latitude degrees, longitude degrees, height km) arrays
+    """
+    x, y, z = xyz_km
+    R = np.sqrt(x * x + y * y)
+    lat = np.arctan2(z, R)
+    for _ in range(3):
+        sin_lat = np.sin(lat)
+        e2_sin_lat = IERS2010_E2 * sin_lat
+        aC = IERS2010_RADIUS_KM / np.sqrt(1.0 - e2_sin_lat * sin_lat)
+        hyp = z + aC * e2_sin_lat
+        lat = np.arctan2(hyp, R)
+    lon = (np.arctan2(y, x) - np.pi) % (2 * np.pi) - np.pi
+    height = np.sqrt(hyp * hyp + R * R) - aC
+    return np.degrees(lat), np.degrees(lon), height
+
+
+# Compact position encoding: fixed header, JSON metadata, then float32 latitude,
+# longitude and altitude columns sampled every step_seconds from start_epoch
+POSITIONS_MAGIC = b'SPOS'
+POSITIONS_FORMAT_VERSION = 1
+POSITIONS_HEADER = struct.Struct('<4sBBHIddI')  # magic, version, flags, reserved, count, start_epoch, step, metadata length
+STORAGE_FORMATS = ('binary', 'json')
+
+# Number of keys written per pipeline round trip during a fleet refresh
+DEFAULT_WRITE_BATCH_SIZE = 500
+
+# Long ground tracks are propagated and stored in blocks aligned to this many seconds
+TRACK_CHUNK_SECONDS = 3600
+
+# Spatial index of the fleet: latitude/longitude cells of this size per time slice of
+# this length (aligned to UTC multiples), stored as satellite_grid:{slice_epoch}
+GRID_CELL_DEG = 5.0
+GRID_SLICE_SECONDS = 600
+GRID_PAD_MARGIN_DEG = 0.1
+
+# Change-driven refresh (see ingest.py): stored positions stay usable until the end of
+# their window or their TTL, whichever comes first; products expiring within the
+# margin are recomputed
+POSITION_WINDOW_MINUTES = 270
+POSITION_TTL_SECONDS = 10800
+DEFAULT_REFRESH_MARGIN_MINUTES = 30
+
+
+def encode_positions(satellite_id: int, satellite_name: str, arrays: Dict[str, Any],
+                     calculated_at: Optional[str] = None) -> bytes:
+    """
+    Encode position arrays into the compact binary storage format.
+    
+    Args:
+        satellite_id: Database ID of the satellite
+        satellite_name: Name of the satellite
+        arrays: Output of calculate_position_arrays / fleet_position_arrays
+        calculated_at: ISO timestamp of the calculation (default: now)
+        
+    Returns:
+        Encoded bytes; failed samples are stored as NaN
+    """
+    count = len(arrays['offsets'])
+    start_epoch = arrays['start_time'].replace(tzinfo=timezone.utc).timestamp()
+    metadata = {
+        'satellite_id': satellite_id,
+        'satellite_name': satellite_name,
+        'calculated_at': calculated_at or datetime.utcnow().isoformat()
+    }
+    if arrays.get('errors'):
+        metadata['errors'] = {str(i): error for i, error in enumerate(arrays['errors']) if error}
+    metadata_bytes = json.dumps(metadata, default=str).encode('utf-8')
+    
+    columns = np.empty((3, count), dtype='<f4')
+    columns[0] = arrays['latitude']
+    columns[1] = arrays['longitude']
+    columns[2] = arrays['altitude_km']
+    if 'errors' in metadata:
+        columns[:, [int(i) for i in metadata['errors']]] = np.nan
+    
+    header = POSITIONS_HEADER.pack(POSITIONS_MAGIC, POSITIONS_FORMAT_VERSION, 0, 0, count,
+                                   start_epoch, float(arrays['interval_seconds']), len(metadata_bytes))
+    return header + metadata_bytes + columns.tobytes()
+
+
+def is_encoded_positions(data: bytes) -> bool:
+    """Check whether a stored value uses the binary position format."""
+    return isinstance(data, bytes) and data[:len(POSITIONS_MAGIC)] == POSITIONS_MAGIC
+
+
+def decode_positions(data: bytes) -> Dict[str, Any]:
+    """
+    Decode the binary storage format without copying the position columns.
+    
+    Returns:
+        Dictionary with the metadata fields plus start_epoch, step_seconds and
+        float32 latitude/longitude/altitude_km arrays
+    """
+    magic, version, _, _, count, start_epoch, step, metadata_length = POSITIONS_HEADER.unpack_from(data)
+    if magic != POSITIONS_MAGIC:
+        raise ValueError("Not an encoded positions value")
+    if version != POSITIONS_FORMAT_VERSION:
+        raise ValueError(f"Unsupported positions format version {version}")
+    
+    offset = POSITIONS_HEADER.size
+    decoded = json.loads(data[offset:offset + metadata_length])
+    columns = np.frombuffer(data, dtype='<f4', count=3 * count,
+                            offset=offset + metadata_length).reshape(3, count)
+    decoded.update({
+        'start_epoch': start_epoch,
+        'step_seconds': step,
+        'total_positions': count,
+        'latitude': columns[0],
+        'longitude': columns[1],
+        'altitude_km': columns[2]
+    })
+    return decoded
+
+
+def decoded_positions_to_records(decoded: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Materialize position dictionaries (the JSON storage layout) from decoded binary data."""
+    errors = decoded.get('errors', {})
+    positions = []
+    for i, (lat, lon, alt) in enumerate(zip(decoded['latitude'].tolist(), decoded['longitude'].tolist(),
+                                            decoded['altitude_km'].tolist())):
+        epoch = decoded['start_epoch'] + i * decoded['step_seconds']
+        valid = lat == lat
+        position = {
+            'timestamp': datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None).isoformat(),
+            'latitude': lat if valid else None,
+            'longitude': lon if valid else None,
+            'altitude_km': alt if valid else None,
+            'unix_timestamp': int(epoch)
+        }
+        if str(i) in errors:
+            position['error'] = errors[str(i)]
+        positions.append(position)
+    return positions
+
+
+def interpolate_position(decoded: Dict[str, Any], epoch_seconds: float) -> Optional[Dict[str, Any]]:
+    """
+    Position at an arbitrary time from decoded position arrays (see decode_positions).
+    
+    The bracketing samples are found by index arithmetic from start_epoch and step,
+    and interpolated along the great circle between them (normalized linear
+    interpolation of unit vectors) so longitude wrap-around and polar passes are
+    handled; altitude is interpolated linearly.
+    
+    Args:
+        decoded: Decoded position arrays
+        epoch_seconds: Requested time as a UTC Unix timestamp
+        
+    Returns:
+        Position dictionary in the stored record layout, or None when the time is outside
+        the cached window or a bracketing sample failed to propagate
+    """
+    count = decoded['total_positions']
+    step = decoded['step_seconds']
+    if count == 0:
+        return None
+    
+    position = (epoch_seconds - decoded['start_epoch']) / step if step else 0.0
+    if position < 0 or position > count - 1:
+        return None
+    index = min(int(position), max(count - 2, 0))
+    fraction = position - index
+    bracket = slice(index, index + 2)
+    
+    lat = np.radians(np.asarray(decoded['latitude'][bracket], dtype=float))
+    lon = np.radians(np.asarray(decoded['longitude'][bracket], dtype=float))
+    alt = np.asarray(decoded['altitude_km'][bracket], dtype=float)
+    if len(lat) == 1:
+        lat, lon, alt = np.repeat(lat, 2), np.repeat(lon, 2), np.repeat(alt, 2)
+    if np.isnan(lat).any():
+        return None
+    
+    vectors = np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=1)
+    x, y, z = vectors[0] + fraction * (vectors[1] - vectors[0])
+    
+    return {
+        'timestamp': datetime.fromtimestamp(epoch_seconds, timezone.utc).replace(tzinfo=None).isoformat(),
+        'latitude': float(np.degrees(np.arctan2(z, np.hypot(x, y)))),
+        'longitude': float(np.degrees(np.arctan2(y, x))),
+        'altitude_km': float(alt[0] + fraction * (alt[1] - alt[0])),
+        'unix_timestamp': int(epoch_seconds)
+    }
+
+
+def grid_cells(latitude: np.ndarray, longitude: np.ndarray, cell_deg: float) -> np.ndarray:
+    """Index of the latitude/longitude cell containing each point (row-major from -90/-180)."""
+    columns = int(round(360.0 / cell_deg))
+    rows = int(round(180.0 / cell_deg))
+    row = np.clip(np.floor((np.asarray(latitude, dtype=float) + 90.0) / cell_deg).astype(np.int64), 0, rows - 1)
+    column = np.floor((np.asarray(longitude, dtype=float) + 180.0) / cell_deg).astype(np.int64) % columns
+    return row * columns + column
+
+
+def region_cells(min_lat: float, max_lat: float, min_lon: float, max_lon: float, cell_deg: float,
+                 pad_deg: float = 0.0) -> np.ndarray:
+    """
+    Indices of the cells overlapping a latitude/longitude box grown by pad_deg of arc.
+    
+    The box may cross the antimeridian (min_lon > max_lon). Longitude padding is
+    widened towards the poles and covers every longitude once the padded box
+    reaches a pole.
+    """
+    columns = int(round(360.0 / cell_deg))
+    rows = int(round(180.0 / cell_deg))
+    min_lat, max_lat = max(min_lat - pad_deg, -90.0), min(max_lat + pad_deg, 90.0)
+    polar = max(abs(min_lat), abs(max_lat))
+    span = max_lon - min_lon if max_lon >= min_lon else max_lon - min_lon + 360.0
+    if polar >= 90.0 or span + 2.0 * pad_deg / math.cos(math.radians(polar)) >= 360.0:
+        column_indices = np.arange(columns)
+    else:
+        lon_pad = pad_deg / math.cos(math.radians(polar))
+        first = math.floor((min_lon - lon_pad + 180.0) / cell_deg)
+        last = math.floor((min_lon + span + lon_pad + 180.0) / cell_deg)
+        column_indices = np.unique(np.arange(first, last + 1) % columns)
+    row_indices = np.arange(max(math.floor((min_lat + 90.0) / cell_deg), 0),
+                            min(math.floor((max_lat + 90.0) / cell_deg), rows - 1) + 1)
+    return (row_indices[:, None] * columns + column_indices[None, :]).ravel()
+
+
+def point_region(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float, float]:
+    """Box (min_lat, max_lat, min_lon, max_lon) of a point plus the radius as padding in degrees of arc."""
+    return lat, lat, lon, lon, math.degrees(radius_km / IERS2010_RADIUS_KM)
+
+
+class SpatialGridIndex:
+    """
+    Which satellites pass through which latitude/longitude cell in each time slice.
+    
+    A satellite is listed in every cell one of its samples falls in during a slice
+    (the first sample of the next slice counts too, so the track between samples is
+    covered across slice boundaries). pad_deg is half the largest arc between
+    consecutive samples of any satellite: padding a query region by it makes the
+    result a superset of the satellites whose ground track enters the region.
+    """
+    
+    def __init__(self, cell_deg: float = GRID_CELL_DEG, slice_seconds: int = GRID_SLICE_SECONDS):
+        self.cell_deg = cell_deg
+        self.slice_seconds = slice_seconds
+        self.pad_deg = 0.0
+        self.slices: Dict[int, Dict[int, set]] = {}
+    
+    def add(self, satellite_id: int, arrays: Dict[str, Any]) -> None:
+        """Index the valid samples of one satellite (output of calculate_position_arrays)."""
+        latitude = np.asarray(arrays['latitude'], dtype=float)
+        longitude = np.asarray(arrays['longitude'], dtype=float)
+        valid = ~np.isnan(latitude)
+        if arrays.get('errors'):
+            valid &= np.array([not error for error in arrays['errors']])
+        if not valid.any():
+            return
+        
+        start_epoch = arrays['start_time'].replace(tzinfo=timezone.utc).timestamp()
+        epochs = start_epoch + np.asarray(arrays['offsets'], dtype=float)[valid]
+        latitude, longitude = latitude[valid], longitude[valid]
+        
+        lat, lon = np.radians(latitude), np.radians(longitude)
+        vectors = np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+        if epochs.size > 1:
+            arcs = np.degrees(np.arccos(np.clip((vectors[:, 1:] * vectors[:, :-1]).sum(axis=0), -1.0, 1.0)))
+            self.pad_deg = max(self.pad_deg, float(arcs.max()) / 2.0 + GRID_PAD_MARGIN_DEG)
+        
+        slices = (np.floor(epochs / self.slice_seconds) * self.slice_seconds).astype(np.int64)
+        cells = grid_cells(latitude, longitude, self.cell_deg)
+        # The first sample of each slice also bounds the end of the previous one
+        boundary = np.flatnonzero(slices[1:] != slices[:-1]) + 1
+        slices = np.concatenate([slices, slices[boundary - 1]])
+        cells = np.concatenate([cells, cells[boundary]])
+        
+        for slice_epoch, cell in np.unique(np.stack([slices, cells], axis=1), axis=0).tolist():
+            self.slices.setdefault(slice_epoch, {}).setdefault(cell, set()).add(satellite_id)
+    
+    def merge(self, other: 'SpatialGridIndex') -> None:
+        """Add the entries of an index built over another part of the fleet."""
+        self.pad_deg = max(self.pad_deg, other.pad_deg)
+        for slice_epoch, cells in other.slices.items():
+            target = self.slices.setdefault(slice_epoch, {})
+            for cell, satellite_ids in cells.items():
+                target.setdefault(cell, set()).update(satellite_ids)
+    
+    def merge_stored(self, stored: Dict[str, Any], replaced_ids: set) -> None:
+        """
+        Fold slices already stored in Redis into this index, for refreshes of part of the fleet.
+        
+        Entries of replaced_ids are dropped from the stored slices first, so satellites
+        recomputed into this index (or leaving the fleet) do not keep their old cells.
+        
+        Args:
+            stored: Dictionary mapping satellite_grid keys to stored values (None where missing)
+            replaced_ids: IDs (as strings) of the satellites whose stored entries are dropped
+        """
+        for value in stored.values():
+            if not value:
+                continue
+            document = json.loads(value)
+            self.pad_deg = max(self.pad_deg, document['pad_deg'])
+            target = self.slices.setdefault(document['slice_epoch'], {})
+            for cell, satellite_ids in document['cells'].items():
+                kept = [satellite_id for satellite_id in satellite_ids if str(satellite_id) not in replaced_ids]
+                if kept:
+                    target.setdefault(int(cell), set()).update(kept)
+    
+    def values(self) -> Dict[str, str]:
+        """Redis values (satellite_grid:{slice_epoch}, one JSON document per slice)."""
+        return {f"satellite_grid:{slice_epoch}": json.dumps({
+            'slice_epoch': slice_epoch,
+            'slice_seconds': self.slice_seconds,
+            'cell_deg': self.cell_deg,
+            'pad_deg': self.pad_deg,
+            'cells': {str(cell): sorted(satellite_ids) for cell, satellite_ids in cells.items()}
+        }) for slice_epoch, cells in self.slices.items()}
+
+
 class SatellitePositionCalculator:
-    def __init__(self, redis_host='redis', redis_port=6379, redis_db=0):
-        """Initialize the satellite position calculator with Redis connection."""
+    def __init__(self, redis_host='redis', redis_port=6379, redis_db=0, storage_format='binary',
+                 write_batch_size=DEFAULT_WRITE_BATCH_SIZE, redis_client=None):
+        """
+        Initialize the satellite position calculator with Redis connection.
+        
+        storage_format selects how satellite_positions:{id} is written: 'binary' (compact
+        columnar encoding, default) or 'json' (legacy layout, for compatibility).
+        write_batch_size is the number of keys sent per pipeline round trip when a
+        whole fleet is stored. redis_client replaces the connection to
+        redis_host/redis_port (used by benchmark.py); sharded refreshes still
+        connect to redis_host from their worker processes.
+        """
+        if storage_format not in STORAGE_FORMATS:
+            raise ValueError(f"Unknown storage format: {storage_format}")
+        self.redis_config = (redis_host, redis_port, redis_db)
+        self.storage_format = storage_format
+        self.write_batch_size = max(1, write_batch_size)
+        if redis_client is not None:
+            self.redis_client = redis_client
+            self.ts = get_timescale()
+            return
+        # redis pulls in asyncio; import it only when a connection is made
+        import redis
         try:
-            self.redis_client = redis.Redis(host=redis_host, port=redis_port, db=redis_db, decode_responses=True)
+            # Raw bytes: binary position values are not UTF-8; JSON values are decoded by json.loads
+            self.redis_client = redis.Redis(host=redis_host, port=redis_port, db=redis_db, decode_responses=False)
             # Test Redis connection
             self.redis_client.ping()
             logger.info(f"Connected to Redis at {redis_host}:{redis_port}")
@@ -31,21 +393,258 @@ class SatellitePositionCalculator:
             raise
             
         # Load timescale data for accurate time calculations
-        self.ts = load.timescale()
+        self.ts = get_timescale()
         logger.info("Skyfield timescale loaded successfully")
     
     def create_earth_satellite(self, tle_line1: str, tle_line2: str, name: str) -> EarthSatellite:
-        """Create an EarthSatellite object from TLE data."""
+        """Create an EarthSatellite object from TLE data, reusing the parsed object for an unchanged TLE."""
         try:
-            satellite = EarthSatellite(tle_line1, tle_line2, name, self.ts)
-            logger.info(f"Created EarthSatellite for {name}")
+            with metrics.stage('tle_parse'):
+                satellite = load_satellite(tle_line1, tle_line2, name)
+            logger.debug(f"Created EarthSatellite for {name}")
             return satellite
         except Exception as e:
             logger.error(f"Failed to create satellite {name}: {e}")
             raise
     
+    def build_time_grid(self, start_time: datetime, duration_minutes: int = 270,
+                        interval_seconds: int = 60) -> Tuple[Time, np.ndarray]:
+        """
+        Build a single Skyfield Time array covering the whole calculation window.
+        
+        Args:
+            start_time: Start time for calculations (naive UTC)
+            duration_minutes: Duration in minutes
+            interval_seconds: Time interval between samples
+            
+        Returns:
+            Tuple of (Time array, offsets in seconds from start_time)
+        """
+        offsets = np.arange(0, duration_minutes * 60 + 1, interval_seconds, dtype=np.int64)
+        return self._time_array(start_time, offsets), offsets
+    
+    def _time_array(self, start_time: datetime, offsets: np.ndarray) -> Time:
+        """Skyfield Time array for offsets (seconds) from start_time."""
+        return self.ts.utc(start_time.year, start_time.month, start_time.day,
+                           start_time.hour, start_time.minute,
+                           start_time.second + start_time.microsecond / 1e6 + offsets)
+    
+    def calculate_position_arrays(self, satellite: EarthSatellite, start_time: datetime,
+                                  duration_minutes: int = 270, interval_seconds: int = 60) -> Dict[str, Any]:
+        """
+        Propagate a satellite over the whole window in one batched SGP4 call.
+        
+        Args:
+            satellite: EarthSatellite object
+            start_time: Start time for calculations (naive UTC)
+            duration_minutes: Duration in minutes (default 270 = 4.5 hours)
+            interval_seconds: Time interval between calculations (default 60 seconds)
+            
+        Returns:
+            Dictionary of NumPy arrays (offsets, latitude, longitude, altitude_km) plus
+            a per-sample list of SGP4 error messages (None where propagation succeeded)
+        """
+        t, offsets = self.build_time_grid(start_time, duration_minutes, interval_seconds)
+        return self._position_arrays_at(satellite, start_time, interval_seconds, t, offsets)
+    
+    def _position_arrays_at(self, satellite: EarthSatellite, start_time: datetime, interval_seconds: int,
+                            t: Time, offsets: np.ndarray) -> Dict[str, Any]:
+        """Propagate a satellite at the sample times t (offsets from start_time)."""
+        with metrics.stage('propagation'):
+            geocentric = satellite.at(t)
+        with metrics.stage('subpoint'):
+            subpoint = iers2010.geographic_position_of(geocentric)
+        metrics.count('propagations', len(offsets))
+        
+        return {
+            'start_time': start_time,
+            'interval_seconds': interval_seconds,
+            'offsets': offsets,
+            'latitude': subpoint.latitude.degrees,
+            'longitude': subpoint.longitude.degrees,
+            'altitude_km': subpoint.elevation.km,
+            'errors': geocentric.message
+        }
+    
+    def iter_position_arrays(self, satellite: EarthSatellite, start_time: datetime,
+                             duration_minutes: int = 270, interval_seconds: int = 60,
+                             chunk_seconds: int = TRACK_CHUNK_SECONDS) -> Iterator[Dict[str, Any]]:
+        """
+        Propagate a satellite over a long window in fixed-size blocks.
+        
+        Blocks are aligned to multiples of chunk_seconds (UTC) and each one also holds
+        the first sample of the next block, so any time can be interpolated within a
+        single block. Only one block is in memory at a time, whatever the window length.
+        
+        Args:
+            satellite: EarthSatellite object
+            start_time: Start time for calculations (naive UTC)
+            duration_minutes: Duration in minutes
+            interval_seconds: Time interval between samples
+            chunk_seconds: Block length in seconds (default one hour)
+            
+        Yields:
+            Position arrays in the format of calculate_position_arrays, one per block
+        """
+        start_epoch = start_time.replace(tzinfo=timezone.utc).timestamp()
+        last_index = (duration_minutes * 60) // interval_seconds
+        index = 0
+        
+        while True:
+            boundary = (math.floor((start_epoch + index * interval_seconds) / chunk_seconds) + 1) * chunk_seconds
+            end_index = min(math.ceil((boundary - start_epoch) / interval_seconds), last_index)
+            
+            chunk_start = start_time + timedelta(seconds=index * interval_seconds)
+            offsets = np.arange(0, (end_index - index) * interval_seconds + 1, interval_seconds, dtype=np.int64)
+            yield self._position_arrays_at(satellite, chunk_start, interval_seconds,
+                                           self._time_array(chunk_start, offsets), offsets)
+            
+            if end_index >= last_index:
+                break
+            index = end_index
+    
+    def iter_positions(self, satellite: EarthSatellite, start_time: datetime,
+                       duration_minutes: int = 270, interval_seconds: int = 60,
+                       chunk_seconds: int = TRACK_CHUNK_SECONDS) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Generator form of calculate_positions: yields the positions block by block.
+        
+        Blocks follow iter_position_arrays, without the repeated boundary sample, so the
+        concatenated blocks equal calculate_positions for the same window.
+        """
+        blocks = self.iter_position_arrays(satellite, start_time, duration_minutes, interval_seconds, chunk_seconds)
+        previous = next(blocks)
+        for block in blocks:
+            yield self.position_arrays_to_records(previous)[:-1]
+            previous = block
+        yield self.position_arrays_to_records(previous)
+    
+    def position_arrays_to_records(self, arrays: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Materialize per-point position dictionaries from position arrays.
+        
+        Args:
+            arrays: Output of calculate_position_arrays
+            
+        Returns:
+            List of position dictionaries with timestamp, lat, lon, altitude
+        """
+        start_time = arrays['start_time']
+        base_unix = start_time.replace(tzinfo=timezone.utc).timestamp()
+        errors = arrays['errors']
+        latitudes = arrays['latitude'].tolist()
+        longitudes = arrays['longitude'].tolist()
+        altitudes = arrays['altitude_km'].tolist()
+        
+        positions = []
+        for i, offset in enumerate(arrays['offsets'].tolist()):
+            error = errors[i] if errors is not None else None
+            position = {
+                'timestamp': (start_time + timedelta(seconds=offset)).isoformat(),
+                'latitude': None if error else latitudes[i],
+                'longitude': None if error else longitudes[i],
+                'altitude_km': None if error else altitudes[i],
+                'unix_timestamp': int(base_unix + offset)
+            }
+            if error:
+                position['error'] = error
+            positions.append(position)
+        
+        return positions
+    
+    def propagate_fleet(self, satellite_data: List[Dict[str, Any]], start_time: datetime,
+                        duration_minutes: int = 270, interval_seconds: int = 60) -> Dict[str, Any]:
+        """
+        Propagate a whole fleet over a shared time grid as one (satellite x time) SGP4 batch.
+        
+        TLEs that fail to parse are reported in 'parse_errors' and left out of the batch,
+        so one bad element set never affects the rest of the fleet.
+        
+        Args:
+            satellite_data: List of satellite dictionaries with satellite_id, name, tle_1, tle_2
+            start_time: Start time for calculations (naive UTC)
+            duration_minutes: Duration in minutes (default 270 = 4.5 hours)
+            interval_seconds: Time interval between calculations (default 60 seconds)
+            
+        Returns:
+            Dictionary with the shared grid (start_time, interval_seconds, offsets), the
+            propagated 'satellites' in input order, 2-D latitude/longitude/altitude_km and
+            error_codes arrays indexed [satellite, time], and 'parse_errors'
+        """
+        t, offsets = self.build_time_grid(start_time, duration_minutes, interval_seconds)
+        
+        satellites = []
+        satrecs = []
+        parse_errors = []
+        with metrics.stage('tle_parse'):
+            for sat_data in satellite_data:
+                try:
+                    satrec = load_satrec(sat_data['tle_1'], sat_data['tle_2'])
+                    if satrec.error:
+                        raise ValueError(SGP4_ERRORS[satrec.error])
+                    satellites.append(sat_data)
+                    satrecs.append(satrec)
+                except Exception as e:
+                    parse_errors.append({'satellite': sat_data, 'error': str(e)})
+        
+        shape = (len(satrecs), len(offsets))
+        fleet = {
+            'start_time': start_time,
+            'interval_seconds': interval_seconds,
+            'offsets': offsets,
+            'satellites': satellites,
+            'latitude': np.empty(shape),
+            'longitude': np.empty(shape),
+            'altitude_km': np.empty(shape),
+            'error_codes': np.zeros(shape, dtype=np.uint8),
+            'parse_errors': parse_errors
+        }
+        if not satrecs:
+            return fleet
+        
+        with metrics.stage('propagation'):
+            # SGP4 takes UTC Julian dates (AIAA 2006-6753), split into whole and fraction
+            jd, fr = jday(start_time.year, start_time.month, start_time.day, start_time.hour,
+                          start_time.minute, start_time.second + start_time.microsecond / 1e6)
+            jd_array = np.full(len(offsets), jd)
+            fr_array = fr + offsets / 86400.0
+            error_codes, r_teme, _ = SatrecArray(satrecs).sgp4(jd_array, fr_array)
+            
+            # Rotate TEME -> GCRS -> ITRS once per time step, shared by every satellite
+            rotation = np.einsum('ikn,jkn->ijn', itrs.rotation_at(t), TEME.rotation_at(t))
+            r_itrs = np.einsum('ijn,snj->isn', rotation, r_teme)
+        
+        with metrics.stage('subpoint'):
+            fleet['latitude'], fleet['longitude'], fleet['altitude_km'] = geodetic_from_itrs(r_itrs)
+        fleet['error_codes'] = error_codes
+        metrics.count('propagations', error_codes.size)
+        return fleet
+    
+    def fleet_position_arrays(self, fleet: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """
+        Slice one satellite out of a propagate_fleet result.
+        
+        Returns:
+            Dictionary in the same shape as calculate_position_arrays
+        """
+        error_codes = fleet['error_codes'][index]
+        errors = None
+        if error_codes.any():
+            errors = [SGP4_ERRORS[code] if code else None for code in error_codes.tolist()]
+        
+        return {
+            'start_time': fleet['start_time'],
+            'interval_seconds': fleet['interval_seconds'],
+            'offsets': fleet['offsets'],
+            'latitude': fleet['latitude'][index],
+            'longitude': fleet['longitude'][index],
+            'altitude_km': fleet['altitude_km'][index],
+            'errors': errors
+        }
+    
     def calculate_positions(self, satellite: EarthSatellite, start_time: datetime, 
-                          duration_minutes: int = 270, interval_seconds: int = 60) -> List[Dict[str, Any]]:
+                          duration_minutes: int = 270, interval_seconds: int = 60,
+                          vectorized: bool = True) -> List[Dict[str, Any]]:
         """
         Calculate satellite positions over a specified time period.
         
@@ -54,10 +653,27 @@ class SatellitePositionCalculator:
             start_time: Start time for calculations
             duration_minutes: Duration in minutes (default 270 = 4.5 hours)
             interval_seconds: Time interval between calculations (default 60 seconds)
+            vectorized: Propagate the whole window as one Time array (default True);
+                set to False to fall back to the per-step loop
             
         Returns:
             List of position dictionaries with timestamp, lat, lon, altitude
         """
+        if not vectorized:
+            return self._calculate_positions_iterative(satellite, start_time, duration_minutes, interval_seconds)
+        
+        logger.info(f"Calculating positions for {satellite.name} from {start_time} "
+                    f"to {start_time + timedelta(minutes=duration_minutes)}")
+        
+        arrays = self.calculate_position_arrays(satellite, start_time, duration_minutes, interval_seconds)
+        positions = self.position_arrays_to_records(arrays)
+        
+        logger.info(f"Calculated {len(positions)} positions for {satellite.name}")
+        return positions
+    
+    def _calculate_positions_iterative(self, satellite: EarthSatellite, start_time: datetime,
+                                       duration_minutes: int = 270, interval_seconds: int = 60) -> List[Dict[str, Any]]:
+        """Calculate positions one time step at a time (reference implementation)."""
         positions = []
         end_time = start_time + timedelta(minutes=duration_minutes)
         current_time = start_time
@@ -81,7 +697,7 @@ class SatellitePositionCalculator:
                     'latitude': subpoint.latitude.degrees,
                     'longitude': subpoint.longitude.degrees,
                     'altitude_km': subpoint.elevation.km,
-                    'unix_timestamp': int(current_time.timestamp())
+                    'unix_timestamp': int(current_time.replace(tzinfo=timezone.utc).timestamp())
                 }
                 
                 positions.append(position)
@@ -94,7 +710,7 @@ class SatellitePositionCalculator:
                     'latitude': None,
                     'longitude': None,
                     'altitude_km': None,
-                    'unix_timestamp': int(current_time.timestamp()),
+                    'unix_timestamp': int(current_time.replace(tzinfo=timezone.utc).timestamp()),
                     'error': str(e)
                 })
             
@@ -115,38 +731,12 @@ class SatellitePositionCalculator:
             ttl_seconds: Time to live in seconds (default 10800 = 3 hours)
         """
         try:
-            redis_key = f"satellite_positions:{satellite_id}"
-            
-            # Store positions data
-            positions_data = {
-                'satellite_id': satellite_id,
-                'satellite_name': satellite_name,
-                'positions': positions,
-                'calculated_at': datetime.utcnow().isoformat(),
-                'total_positions': len(positions)
-            }
-            
-            # Convert to JSON and store in Redis
-            self.redis_client.setex(
-                redis_key, 
-                ttl_seconds, 
-                json.dumps(positions_data, default=str)
-            )
+            values = self._positions_json_value(satellite_id, satellite_name, positions)
             
             # Also store current position for quick access
-            current_position = self.get_current_position(positions)
-            if current_position:
-                current_key = f"satellite_current:{satellite_id}"
-                self.redis_client.setex(
-                    current_key,
-                    ttl_seconds,
-                    json.dumps({
-                        'satellite_id': satellite_id,
-                        'satellite_name': satellite_name,
-                        'position': current_position,
-                        'updated_at': datetime.utcnow().isoformat()
-                    }, default=str)
-                )
+            values.update(self._current_position_value(satellite_id, satellite_name,
+                                                       self.get_current_position(positions)))
+            self._write_values(values, ttl_seconds)
             
             logger.info(f"Stored {len(positions)} positions for satellite {satellite_name} (ID: {satellite_id}) in Redis")
             
@@ -154,36 +744,216 @@ class SatellitePositionCalculator:
             logger.error(f"Failed to store positions in Redis for satellite {satellite_name}: {e}")
             raise
     
+    def store_position_arrays_in_redis(self, satellite_id: int, satellite_name: str,
+                                       arrays: Dict[str, Any], ttl_seconds: int = 10800) -> None:
+        """
+        Store position arrays in Redis using the calculator's storage format.
+        
+        Args:
+            satellite_id: Database ID of the satellite
+            satellite_name: Name of the satellite
+            arrays: Output of calculate_position_arrays / fleet_position_arrays
+            ttl_seconds: Time to live in seconds (default 10800 = 3 hours)
+        """
+        try:
+            self._write_values(self.position_values(satellite_id, satellite_name, arrays), ttl_seconds)
+            logger.info(f"Stored {len(arrays['offsets'])} positions for satellite {satellite_name} (ID: {satellite_id}) in Redis")
+            
+        except Exception as e:
+            logger.error(f"Failed to store positions in Redis for satellite {satellite_name}: {e}")
+            raise
+    
+    def position_values(self, satellite_id: int, satellite_name: str,
+                        arrays: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the Redis values (satellite_positions and satellite_current) for one satellite.
+        
+        The binary format is encoded straight from the arrays, so no per-point
+        records are built; the JSON format materializes the legacy layout.
+        
+        Returns:
+            Dictionary mapping Redis keys to values
+        """
+        with metrics.stage('serialization'):
+            if self.storage_format == 'json':
+                positions = self.position_arrays_to_records(arrays)
+                values = self._positions_json_value(satellite_id, satellite_name, positions)
+                current_position = self.get_current_position(positions)
+            else:
+                values = {f"satellite_positions:{satellite_id}": encode_positions(satellite_id, satellite_name,
+                                                                                  arrays)}
+                current_position = self.get_current_position_from_arrays(arrays)
+            
+            values.update(self._current_position_value(satellite_id, satellite_name, current_position))
+        return values
+    
+    def _positions_json_value(self, satellite_id: int, satellite_name: str,
+                              positions: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Build the legacy JSON satellite_positions:{id} value."""
+        return {f"satellite_positions:{satellite_id}": json.dumps({
+            'satellite_id': satellite_id,
+            'satellite_name': satellite_name,
+            'positions': positions,
+            'calculated_at': datetime.utcnow().isoformat(),
+            'total_positions': len(positions)
+        }, default=str)}
+    
+    def _current_position_value(self, satellite_id: int, satellite_name: str,
+                                current_position: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Build the current-position snapshot used by the map under satellite_current:{id}."""
+        if not current_position:
+            return {}
+        return {f"satellite_current:{satellite_id}": json.dumps({
+            'satellite_id': satellite_id,
+            'satellite_name': satellite_name,
+            'position': current_position,
+            'updated_at': datetime.utcnow().isoformat()
+        }, default=str)}
+    
+    def _write_values(self, values: Dict[str, Any], ttl_seconds: int) -> None:
+        """Write a few keys in a single pipelined round trip."""
+        with metrics.stage('redis_io'):
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for key, value in values.items():
+                pipeline.setex(key, ttl_seconds, value)
+            pipeline.execute()
+        metrics.count('redis_keys_written', len(values))
+        metrics.count('redis_round_trips')
+    
+    def store_fleet_values_in_redis(self, values: Dict[str, Any], ttl_seconds: int = 10800) -> None:
+        """
+        Store the values for a whole fleet so readers switch from the old to the new data at once.
+        
+        Values are first written under per-refresh staging keys in pipelined batches of
+        write_batch_size, then renamed over the live keys in a single MULTI/EXEC
+        transaction. Readers therefore see either the previous refresh or the new one,
+        never a mix; a failed refresh leaves the live keys untouched.
+        
+        Args:
+            values: Dictionary mapping Redis keys to values (see position_values)
+            ttl_seconds: Time to live in seconds (default 10800 = 3 hours)
+        """
+        staging_prefix = f"staging:{uuid.uuid4().hex}:"
+        keys = list(values)
+        
+        batches = -(-len(keys) // self.write_batch_size)
+        
+        try:
+            with metrics.stage('redis_io'):
+                for batch_start in range(0, len(keys), self.write_batch_size):
+                    pipeline = self.redis_client.pipeline(transaction=False)
+                    for key in keys[batch_start:batch_start + self.write_batch_size]:
+                        pipeline.setex(staging_prefix + key, ttl_seconds, values[key])
+                    pipeline.execute()
+                
+                # RENAME keeps the staged TTL
+                swap = self.redis_client.pipeline(transaction=True)
+                for key in keys:
+                    swap.rename(staging_prefix + key, key)
+                swap.execute()
+            
+        except Exception:
+            for batch_start in range(0, len(keys), self.write_batch_size):
+                self.redis_client.delete(*[staging_prefix + key
+                                           for key in keys[batch_start:batch_start + self.write_batch_size]])
+            raise
+        
+        metrics.count('redis_keys_written', len(keys))
+        metrics.count('redis_round_trips', batches + 1)
+        logger.info(f"Stored {len(keys)} position keys in Redis ({batches} pipelined batches, one atomic swap)")
+    
+    def get_current_position_from_arrays(self, arrays: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get the valid position closest to current time from position arrays."""
+        now_offset = (datetime.utcnow() - arrays['start_time']).total_seconds()
+        distance = np.abs(arrays['offsets'] - now_offset).astype(float)
+        distance[np.isnan(arrays['latitude'])] = np.inf
+        if arrays.get('errors'):
+            distance[[i for i, error in enumerate(arrays['errors']) if error]] = np.inf
+        if not distance.size or np.isinf(distance.min()):
+            return None
+        
+        index = int(np.argmin(distance))
+        single = {key: (value[index:index + 1] if key in ('offsets', 'latitude', 'longitude', 'altitude_km', 'errors')
+                        and value is not None else value)
+                  for key, value in arrays.items()}
+        return self.position_arrays_to_records(single)[0]
+    
     def get_current_position(self, positions: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-        """Get the position closest to current time."""
+        """
+        Get the valid position closest to current time.
+        
+        Positions are evenly spaced, so the nearest sample is found from the first
+        two timestamps instead of parsing and scanning every entry.
+        """
         if not positions:
             return None
-            
-        current_time = datetime.utcnow()
-        closest_position = None
-        min_time_diff = float('inf')
         
-        for pos in positions:
-            try:
-                pos_time = datetime.fromisoformat(pos['timestamp'].replace('Z', ''))
-                time_diff = abs((current_time - pos_time).total_seconds())
-                
-                if time_diff < min_time_diff and pos.get('latitude') is not None:
-                    min_time_diff = time_diff
-                    closest_position = pos
-            except Exception as e:
-                logger.warning(f"Error processing position timestamp: {e}")
-                continue
+        try:
+            first_time = datetime.fromisoformat(positions[0]['timestamp'].replace('Z', ''))
+            step = ((datetime.fromisoformat(positions[1]['timestamp'].replace('Z', '')) - first_time).total_seconds()
+                    if len(positions) > 1 else 0.0)
+        except Exception as e:
+            logger.warning(f"Error processing position timestamp: {e}")
+            return None
         
-        return closest_position
+        elapsed = (datetime.utcnow() - first_time).total_seconds()
+        nearest = min(max(int(round(elapsed / step)) if step > 0 else 0, 0), len(positions) - 1)
+        
+        # Walk outwards from the nearest sample to the closest one that propagated
+        for distance in range(len(positions)):
+            for index in (nearest - distance, nearest + distance):
+                if 0 <= index < len(positions) and positions[index].get('latitude') is not None:
+                    return positions[index]
+        return None
+    
+    def get_position_arrays_from_redis(self, satellite_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve cached positions as arrays (see decode_positions) without building per-point records.
+        
+        Values stored in the JSON format are converted on read.
+        """
+        try:
+            data = self.redis_client.get(f"satellite_positions:{satellite_id}")
+            if not data:
+                logger.info(f"No cached positions found for satellite {satellite_id}")
+                return None
+            if is_encoded_positions(data):
+                return decode_positions(data)
+            
+            legacy = json.loads(data)
+            positions = legacy.pop('positions')
+            column = lambda key: np.array([np.nan if p[key] is None else p[key] for p in positions], dtype='<f4')
+            epoch = lambda p: datetime.fromisoformat(p['timestamp']).replace(tzinfo=timezone.utc).timestamp()
+            legacy.update({
+                'start_epoch': epoch(positions[0]) if positions else 0.0,
+                'step_seconds': epoch(positions[1]) - epoch(positions[0]) if len(positions) > 1 else 0.0,
+                'total_positions': len(positions),
+                'latitude': column('latitude'),
+                'longitude': column('longitude'),
+                'altitude_km': column('altitude_km')
+            })
+            return legacy
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve positions from Redis for satellite {satellite_id}: {e}")
+            return None
     
     def get_positions_from_redis(self, satellite_id: int) -> Optional[Dict[str, Any]]:
-        """Retrieve satellite positions from Redis."""
+        """Retrieve satellite positions from Redis in the JSON layout, whichever format they were stored in."""
         try:
             redis_key = f"satellite_positions:{satellite_id}"
             data = self.redis_client.get(redis_key)
             
-            if data:
+            if data and is_encoded_positions(data):
+                decoded = decode_positions(data)
+                return {
+                    'satellite_id': decoded['satellite_id'],
+                    'satellite_name': decoded['satellite_name'],
+                    'positions': decoded_positions_to_records(decoded),
+                    'calculated_at': decoded['calculated_at'],
+                    'total_positions': decoded['total_positions']
+                }
+            elif data:
                 return json.loads(data)
             else:
                 logger.info(f"No cached positions found for satellite {satellite_id}")
@@ -193,9 +963,42 @@ class SatellitePositionCalculator:
             logger.error(f"Failed to retrieve positions from Redis for satellite {satellite_id}: {e}")
             return None
     
+    def get_position_at_from_redis(self, satellite_id: int,
+                                   when: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Interpolate a satellite's position at any time inside its cached window.
+        
+        Args:
+            satellite_id: Database ID of the satellite
+            when: Naive UTC time to evaluate (default: now)
+            
+        Returns:
+            Position dictionary, or None when nothing usable is cached for that time
+        """
+        decoded = self.get_position_arrays_from_redis(satellite_id)
+        if decoded is None:
+            return None
+        when = when or datetime.utcnow()
+        return interpolate_position(decoded, when.replace(tzinfo=timezone.utc).timestamp())
+    
     def get_current_position_from_redis(self, satellite_id: int) -> Optional[Dict[str, Any]]:
-        """Retrieve current satellite position from Redis."""
+        """
+        Retrieve current satellite position from Redis.
+        
+        The position is interpolated from the cached positions at the time of the call;
+        the satellite_current snapshot written at refresh time is only a fallback.
+        """
         try:
+            decoded = self.get_position_arrays_from_redis(satellite_id)
+            position = decoded and interpolate_position(decoded, datetime.now(timezone.utc).timestamp())
+            if position:
+                return {
+                    'satellite_id': decoded['satellite_id'],
+                    'satellite_name': decoded['satellite_name'],
+                    'position': position,
+                    'updated_at': position['timestamp']
+                }
+            
             current_key = f"satellite_current:{satellite_id}"
             data = self.redis_client.get(current_key)
             
@@ -209,17 +1012,356 @@ class SatellitePositionCalculator:
             logger.error(f"Failed to retrieve current position from Redis for satellite {satellite_id}: {e}")
             return None
     
-    def calculate_and_store_satellite_positions(self, satellite_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def store_position_track(self, satellite_id: int, satellite_name: str, satellite: EarthSatellite,
+                             start_time: datetime, duration_minutes: int, interval_seconds: int = 60,
+                             chunk_seconds: int = TRACK_CHUNK_SECONDS,
+                             ttl_seconds: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Propagate and store a long ground track block by block, so peak memory does not
+        depend on the horizon.
+        
+        Each block is written, in the binary position format, to
+        satellite_track:{id}:{block epoch} as soon as it is computed, where the block
+        epoch is the UTC Unix time of the chunk_seconds boundary the block starts in.
+        The track description (window, step, block length) goes to satellite_track:{id}
+        once every block is stored.
+        
+        Args:
+            satellite_id: Database ID of the satellite
+            satellite_name: Name of the satellite
+            satellite: EarthSatellite object
+            start_time: Start of the track (naive UTC)
+            duration_minutes: Track length in minutes
+            interval_seconds: Time interval between samples (default 60 seconds)
+            chunk_seconds: Block length in seconds (default one hour)
+            ttl_seconds: Time to live (default: track length plus one hour)
+            
+        Returns:
+            The stored track description
+        """
+        ttl_seconds = ttl_seconds or duration_minutes * 60 + 3600
+        blocks = 0
+        positions = 0
+        
+        for arrays in self.iter_position_arrays(satellite, start_time, duration_minutes, interval_seconds,
+                                                chunk_seconds):
+            block_start = arrays['start_time'].replace(tzinfo=timezone.utc).timestamp()
+            block_epoch = int(block_start // chunk_seconds * chunk_seconds)
+            self.redis_client.setex(f"satellite_track:{satellite_id}:{block_epoch}", ttl_seconds,
+                                    encode_positions(satellite_id, satellite_name, arrays))
+            blocks += 1
+            positions += len(arrays['offsets']) - 1
+        
+        track = {
+            'satellite_id': satellite_id,
+            'satellite_name': satellite_name,
+            'start': start_time.isoformat(),
+            'end': (start_time + timedelta(seconds=(duration_minutes * 60) // interval_seconds
+                                           * interval_seconds)).isoformat(),
+            'interval_seconds': interval_seconds,
+            'chunk_seconds': chunk_seconds,
+            'total_positions': positions + 1,
+            'blocks': blocks,
+            'calculated_at': datetime.utcnow().isoformat()
+        }
+        self.redis_client.setex(f"satellite_track:{satellite_id}", ttl_seconds, json.dumps(track))
+        
+        logger.info(f"Stored {track['total_positions']} track positions in {blocks} blocks for satellite "
+                    f"{satellite_name} (ID: {satellite_id}) in Redis")
+        return track
+    
+    def _track_blocks_from_redis(self, satellite_id: int, start: datetime,
+                                 end: datetime) -> Iterator[Dict[str, Any]]:
+        """Decoded track blocks overlapping [start, end], fetched one at a time."""
+        data = self.redis_client.get(f"satellite_track:{satellite_id}")
+        if not data:
+            return
+        track = json.loads(data)
+        chunk_seconds = track['chunk_seconds']
+        
+        # A block starts at its first sample after the boundary, so times just past a
+        # boundary still belong to the previous block
+        first_epoch = start.replace(tzinfo=timezone.utc).timestamp() - track['interval_seconds']
+        block_epoch = int(first_epoch // chunk_seconds * chunk_seconds)
+        end_epoch = end.replace(tzinfo=timezone.utc).timestamp()
+        while block_epoch <= end_epoch:
+            block = self.redis_client.get(f"satellite_track:{satellite_id}:{block_epoch}")
+            if block:
+                yield decode_positions(block)
+            block_epoch += chunk_seconds
+    
+    def iter_track_positions_from_redis(self, satellite_id: int, start: datetime,
+                                        end: datetime) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Read stored track positions in [start, end] block by block.
+        
+        Yields:
+            Lists of position dictionaries in time order, one per stored block
+        """
+        start_epoch = start.replace(tzinfo=timezone.utc).timestamp()
+        end_epoch = end.replace(tzinfo=timezone.utc).timestamp()
+        next_epoch = start_epoch
+        
+        for block in self._track_blocks_from_redis(satellite_id, start, end):
+            # Sample indices from the block's start epoch and step; skips the boundary sample
+            # already returned at the end of the previous block
+            step = block['step_seconds']
+            first = max(0, math.ceil((next_epoch - block['start_epoch']) / step - 1e-9))
+            last = min(block['total_positions'] - 1, math.floor((end_epoch - block['start_epoch']) / step + 1e-9))
+            if first > last:
+                continue
+            next_epoch = block['start_epoch'] + (last + 1) * step
+            yield decoded_positions_to_records(block)[first:last + 1]
+    
+    def get_track_position_at_from_redis(self, satellite_id: int, when: datetime) -> Optional[Dict[str, Any]]:
+        """Interpolate a stored track at any time it covers, reading a single block."""
+        for block in self._track_blocks_from_redis(satellite_id, when, when):
+            position = interpolate_position(block, when.replace(tzinfo=timezone.utc).timestamp())
+            if position:
+                return position
+        return None
+
+    def get_satellites_in_region_from_redis(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float,
+                                            start: datetime, end: Optional[datetime] = None,
+                                            pad_deg: float = 0.0) -> List[int]:
+        """
+        Candidate satellites whose ground track may enter a region between start and end.
+
+        Only the grid slices overlapping the time range are read (one GET per slice), so
+        the cost does not depend on the fleet size. The result is a superset: callers
+        needing exact geometry check the candidates' positions.
+
+        Args:
+            min_lat, max_lat, min_lon, max_lon: Region in degrees (min_lon > max_lon crosses the antimeridian)
+            start, end: Time range (naive UTC; end defaults to start)
+            pad_deg: Extra margin around the region in degrees of arc
+
+        Returns:
+            Sorted satellite IDs
+        """
+        start_epoch = start.replace(tzinfo=timezone.utc).timestamp()
+        end_epoch = (end or start).replace(tzinfo=timezone.utc).timestamp()
+        first_slice = math.floor(start_epoch / GRID_SLICE_SECONDS) * GRID_SLICE_SECONDS
+        keys = [f"satellite_grid:{slice_epoch}"
+                for slice_epoch in range(first_slice, int(end_epoch) + 1, GRID_SLICE_SECONDS)]
+
+        satellite_ids = set()
+        for value in self.redis_client.mget(keys):
+            if not value:
+                continue
+            grid = json.loads(value)
+            cells = grid['cells']
+            for cell in region_cells(min_lat, max_lat, min_lon, max_lon, grid['cell_deg'],
+                                     grid['pad_deg'] + pad_deg).tolist():
+                satellite_ids.update(cells.get(str(cell), ()))
+        return sorted(satellite_ids)
+
+    def get_satellites_near_point_from_redis(self, lat: float, lon: float, radius_km: float, start: datetime,
+                                             end: Optional[datetime] = None) -> List[int]:
+        """Candidate satellites whose sub-satellite point may come within radius_km of a point (see above)."""
+        min_lat, max_lat, min_lon, max_lon, pad_deg = point_region(lat, lon, radius_km)
+        return self.get_satellites_in_region_from_redis(min_lat, max_lat, min_lon, max_lon, start, end, pad_deg)
+
+    def calculate_and_store_satellite_positions(self, satellite_data: List[Dict[str, Any]],
+                                                batched: bool = True, workers: int = 1,
+                                                start_time: Optional[datetime] = None,
+                                                merge_grid: bool = False, retired_ids: Iterable[Any] = ()
+                                                ) -> Dict[str, Any]:
         """
         Calculate and store positions for multiple satellites.
         
+        All satellites are computed first and then written together with
+        store_fleet_values_in_redis, so readers never see a half-refreshed fleet.
+        The spatial grid index (see SpatialGridIndex) is built from the same
+        arrays and stored in the same swap. The summary includes 'metrics', the
+        per-stage timings and counters of this refresh (see metrics.py).
+        
         Args:
             satellite_data: List of satellite dictionaries with id, name, tle_1, tle_2
+            batched: Propagate the whole fleet in one SGP4 batch (default True);
+                set to False to process satellites one after another
+            workers: Number of processes to shard the calculation across (default 1, in-process).
+                Shards return their encoded values and this process writes them.
+            start_time: Start of the position window (default: now)
+            merge_grid: satellite_data is only part of the fleet: merge the stored grid
+                slices instead of replacing them (see SpatialGridIndex.merge_stored)
+            retired_ids: With merge_grid, satellites that left the fleet; their entries
+                are dropped from the merged slices
+            
+        Returns:
+            Summary of the operation, including 'stored_satellite_ids' (as strings) of the
+            satellites whose new positions were stored
+        """
+        start_time = start_time or datetime.utcnow()
+        started = time.perf_counter()
+        
+        with metrics.collect() as refresh_metrics:
+            if workers > 1:
+                logger.info(f"Starting position calculations for {len(satellite_data)} satellites "
+                            f"on {workers} workers")
+                results, values, grid = self._calculate_values_parallel(satellite_data, batched, workers,
+                                                                        start_time)
+            else:
+                logger.info(f"Starting position calculations for {len(satellite_data)} satellites")
+                grid = SpatialGridIndex()
+                results, values = self.calculate_position_values(satellite_data, batched, start_time, grid)
+            
+            results['stored_satellite_ids'] = []
+            if values:
+                try:
+                    if merge_grid:
+                        grid_keys = list(grid.values())
+                        with metrics.stage('redis_io'):
+                            stored = dict(zip(grid_keys, self.redis_client.mget(grid_keys))) if grid_keys else {}
+                        grid.merge_stored(stored, {str(satellite_id) for satellite_id in retired_ids}
+                                          | {str(sat['satellite_id']) for sat in satellite_data})
+                    # The spatial index is swapped in together with the positions it was built from
+                    with metrics.stage('serialization'):
+                        values.update(grid.values())
+                    self.store_fleet_values_in_redis(values)
+                    results['stored_satellite_ids'] = sorted(key.split(':', 1)[1] for key in values
+                                                             if key.startswith('satellite_positions:'))
+                except Exception as e:
+                    error_msg = f"Failed to store positions in Redis: {str(e)}"
+                    logger.error(error_msg)
+                    results['errors'].append(error_msg)
+                    results['satellites_failed'] += results['satellites_processed']
+                    results['satellites_processed'] = 0
+            
+            metrics.count('satellites_processed', results['satellites_processed'])
+            metrics.count('satellites_failed', results['satellites_failed'])
+        
+        results['completed_at'] = datetime.utcnow().isoformat()
+        results['duration_seconds'] = time.perf_counter() - started
+        results['metrics'] = refresh_metrics.summary()
+        
+        logger.info(f"Position calculation completed. Processed: {results['satellites_processed']}, "
+                   f"Failed: {results['satellites_failed']}, "
+                   f"Total positions: {results['total_positions_calculated']}")
+        logger.debug(f"TLE cache: {cache_info()}")
+        
+        return results
+    
+    def refresh_changed_satellites(self, satellite_data: List[Dict[str, Any]],
+                                   margin_minutes: float = DEFAULT_REFRESH_MARGIN_MINUTES, workers: int = 1,
+                                   force: bool = False, start_time: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Recompute positions only for satellites that are new, changed or about to expire.
+        
+        The ingestion record (see ingest.py) is compared with the current fleet; the
+        satellites it selects are recomputed with calculate_and_store_satellite_positions
+        (merging the grid index), satellites no longer in the fleet are removed with
+        delete_retired_satellites (also when nothing is recomputed), and the record is
+        updated once the new positions are stored. When
+        nothing changed this costs one HGETALL.
+        
+        Args:
+            satellite_data: The whole fleet, as for calculate_and_store_satellite_positions
+            margin_minutes: Recompute positions expiring within this many minutes (default 30);
+                should exceed the interval between refresh cycles
+            workers: Number of processes to shard the recomputation across
+            force: Recompute every satellite (the record is still updated)
+            start_time: Current time (default: now)
+            
+        Returns:
+            Summary of calculate_and_store_satellite_positions (zero counts when nothing
+            was recomputed) plus 'satellites_skipped', 'satellites_removed' and
+            'refresh_reasons' (satellite_id -> 'new', 'tle_changed' or 'expiring')
+        """
+        from ingest import load_record, plan_refresh, record_entry, save_record
+        
+        now = start_time or datetime.utcnow()
+        with metrics.stage('redis_io'):
+            record = load_record(self.redis_client)
+        plan = plan_refresh(satellite_data, record, now, margin_minutes * 60, force)
+        
+        if plan['refresh']:
+            results = self.calculate_and_store_satellite_positions(
+                plan['refresh'], workers=workers, start_time=now,
+                merge_grid=len(plan['refresh']) < len(satellite_data), retired_ids=plan['removed'])
+        else:
+            results = {
+                'started_at': now.isoformat(),
+                'satellites_processed': 0,
+                'satellites_failed': 0,
+                'total_positions_calculated': 0,
+                'errors': [],
+                'stored_satellite_ids': [],
+                'completed_at': datetime.utcnow().isoformat(),
+                'duration_seconds': 0.0
+            }
+        
+        # Satellites that failed keep their old entry (or none), so the next cycle retries them
+        stored = set(results['stored_satellite_ids'])
+        expires_at = now + min(timedelta(minutes=POSITION_WINDOW_MINUTES), timedelta(seconds=POSITION_TTL_SECONDS))
+        entries = {str(sat['satellite_id']): record_entry(sat, now, expires_at)
+                   for sat in plan['refresh'] if str(sat['satellite_id']) in stored}
+        
+        if plan['removed']:
+            self.delete_retired_satellites(plan['removed'], now)
+        if entries or plan['removed']:
+            with metrics.stage('redis_io'):
+                save_record(self.redis_client, entries, plan['removed'])
+        
+        results['satellites_skipped'] = len(plan['unchanged'])
+        results['satellites_removed'] = len(plan['removed'])
+        results['refresh_reasons'] = plan['reasons']
+        logger.info(f"Change-driven refresh: {len(plan['refresh'])} recomputed, {len(plan['unchanged'])} "
+                    f"unchanged, {len(plan['removed'])} removed")
+        return results
+    
+    def delete_retired_satellites(self, satellite_ids: Iterable[Any], now: datetime) -> None:
+        """
+        Remove everything stored for satellites that left the fleet.
+        
+        Their position, current position and track keys are deleted, and they are
+        dropped from every grid slice a refresh of the last POSITION_TTL_SECONDS may
+        have stored. Pruned slices keep their TTL, so they still expire with the
+        positions they were built from.
+        
+        Args:
+            satellite_ids: IDs of the retired satellites
+            now: Current time (naive UTC)
+        """
+        retired = {str(satellite_id) for satellite_id in satellite_ids}
+        now_epoch = now.replace(tzinfo=timezone.utc).timestamp()
+        first_slice = math.floor((now_epoch - POSITION_TTL_SECONDS) / GRID_SLICE_SECONDS) * GRID_SLICE_SECONDS
+        grid_keys = [f"satellite_grid:{slice_epoch}" for slice_epoch in
+                     range(first_slice, int(now_epoch) + POSITION_WINDOW_MINUTES * 60 + 1, GRID_SLICE_SECONDS)]
+        
+        with metrics.stage('redis_io'):
+            keys = []
+            for satellite_id in retired:
+                keys += [f"satellite_positions:{satellite_id}", f"satellite_current:{satellite_id}",
+                         f"satellite_track:{satellite_id}"]
+                keys += self.redis_client.scan_iter(match=f"satellite_track:{satellite_id}:*", count=1000)
             
+            pipeline = self.redis_client.pipeline(transaction=True)
+            pipeline.delete(*keys)
+            for key, value in zip(grid_keys, self.redis_client.mget(grid_keys)):
+                if not value:
+                    continue
+                document = json.loads(value)
+                cells = {cell: [satellite_id for satellite_id in ids if str(satellite_id) not in retired]
+                         for cell, ids in document['cells'].items()}
+                cells = {cell: ids for cell, ids in cells.items() if ids}
+                if cells != document['cells']:
+                    document['cells'] = cells
+                    pipeline.set(key, json.dumps(document), keepttl=True)
+            pipeline.execute()
+        logger.info(f"Deleted stored data of {len(retired)} retired satellites")
+    
+    def calculate_position_values(self, satellite_data: List[Dict[str, Any]], batched: bool,
+                                  start_time: datetime,
+                                  grid: Optional[SpatialGridIndex] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Calculate positions and build their Redis values without writing them.
+        
+        Every satellite's arrays are also added to grid when one is given.
+        
         Returns:
-            Summary of the operation
+            Tuple of (summary, dictionary mapping Redis keys to values)
         """
-        start_time = datetime.utcnow()
         results = {
             'started_at': start_time.isoformat(),
             'satellites_processed': 0,
@@ -227,47 +1369,146 @@ class SatellitePositionCalculator:
             'total_positions_calculated': 0,
             'errors': []
         }
+        values = {}
         
-        logger.info(f"Starting position calculations for {len(satellite_data)} satellites")
-        
-        for sat_data in satellite_data:
-            try:
-                satellite_id = sat_data['satellite_id']
-                satellite_name = sat_data['name']
-                tle_line1 = sat_data['tle_1']
-                tle_line2 = sat_data['tle_2']
+        if batched:
+            self._calculate_fleet_values(satellite_data, start_time, results, values, grid)
+        else:
+            for sat_data in satellite_data:
+                try:
+                    satellite_id = sat_data['satellite_id']
+                    satellite_name = sat_data['name']
+                    tle_line1 = sat_data['tle_1']
+                    tle_line2 = sat_data['tle_2']
+                
+                    logger.debug(f"Processing satellite: {satellite_name} (ID: {satellite_id})")
+                
+                    # Create EarthSatellite object
+                    satellite = self.create_earth_satellite(tle_line1, tle_line2, satellite_name)
                 
-                logger.info(f"Processing satellite: {satellite_name} (ID: {satellite_id})")
+                    # Calculate positions
+                    arrays = self.calculate_position_arrays(satellite, start_time)
                 
-                # Create EarthSatellite object
-                satellite = self.create_earth_satellite(tle_line1, tle_line2, satellite_name)
+                    # Encode for Redis
+                    values.update(self.position_values(satellite_id, satellite_name, arrays))
+                    if grid is not None:
+                        with metrics.stage('grid_index'):
+                            grid.add(satellite_id, arrays)
                 
-                # Calculate positions
-                positions = self.calculate_positions(satellite, start_time)
+                    results['satellites_processed'] += 1
+                    results['total_positions_calculated'] += len(arrays['offsets'])
                 
-                # Store in Redis
-                self.store_positions_in_redis(satellite_id, satellite_name, positions)
+                except Exception as e:
+                    error_msg = f"Failed to process satellite {sat_data.get('name', 'Unknown')}: {str(e)}"
+                    logger.error(error_msg)
+                    results['errors'].append(error_msg)
+                    results['satellites_failed'] += 1
+        
+        return results, values
+
+    def _calculate_values_parallel(self, satellite_data: List[Dict[str, Any]], batched: bool, workers: int,
+                                   start_time: datetime) -> Tuple[Dict[str, Any], Dict[str, Any], SpatialGridIndex]:
+        """Shard satellites across worker processes and merge their summaries, values, grids and metrics in shard order."""
+        from parallel import map_shards
+        
+        shard_results = map_shards(
+            functools.partial(_calculate_shard_values, self.redis_config, self.storage_format, batched,
+                              start_time),
+            satellite_data,
+            workers
+        )
+        
+        results = {
+            'started_at': start_time.isoformat(),
+            'satellites_processed': sum(r['satellites_processed'] for r, _, _, _ in shard_results),
+            'satellites_failed': sum(r['satellites_failed'] for r, _, _, _ in shard_results),
+            'total_positions_calculated': sum(r['total_positions_calculated'] for r, _, _, _ in shard_results),
+            'errors': [error for r, _, _, _ in shard_results for error in r['errors']]
+        }
+        values = {}
+        grid = SpatialGridIndex()
+        for _, shard_values, shard_grid, shard_metrics in shard_results:
+            values.update(shard_values)
+            grid.merge(shard_grid)
+            metrics.merge(shard_metrics)
+        
+        return results, values, grid
+    
+    def _calculate_fleet_values(self, satellite_data: List[Dict[str, Any]], start_time: datetime,
+                                results: Dict[str, Any], values: Dict[str, Any],
+                                grid: Optional[SpatialGridIndex] = None) -> None:
+        """Propagate the fleet as one batch and encode each satellite, isolating failures."""
+        fleet = self.propagate_fleet(satellite_data, start_time)
+        
+        for failure in fleet['parse_errors']:
+            error_msg = (f"Failed to process satellite {failure['satellite'].get('name', 'Unknown')}: "
+                         f"{failure['error']}")
+            logger.error(error_msg)
+            results['errors'].append(error_msg)
+            results['satellites_failed'] += 1
+        
+        for index, sat_data in enumerate(fleet['satellites']):
+            try:
+                arrays = self.fleet_position_arrays(fleet, index)
+                values.update(self.position_values(sat_data['satellite_id'], sat_data['name'], arrays))
+                if grid is not None:
+                    with metrics.stage('grid_index'):
+                        grid.add(sat_data['satellite_id'], arrays)
                 
                 results['satellites_processed'] += 1
-                results['total_positions_calculated'] += len(positions)
+                results['total_positions_calculated'] += len(arrays['offsets'])
                 
             except Exception as e:
                 error_msg = f"Failed to process satellite {sat_data.get('name', 'Unknown')}: {str(e)}"
                 logger.error(error_msg)
                 results['errors'].append(error_msg)
                 results['satellites_failed'] += 1
-        
-        results['completed_at'] = datetime.utcnow().isoformat()
-        results['duration_seconds'] = (datetime.utcnow() - start_time).total_seconds()
-        
-        logger.info(f"Position calculation completed. Processed: {results['satellites_processed']}, "
-                   f"Failed: {results['satellites_failed']}, "
-                   f"Total positions: {results['total_positions_calculated']}")
-        
-        return results
+
+def _calculate_shard_values(redis_config: Tuple[str, int, int], storage_format: str, batched: bool,
+                            start_time: datetime,
+                            satellite_data: List[Dict[str, Any]]
+                            ) -> Tuple[Dict[str, Any], Dict[str, Any], SpatialGridIndex, metrics.Metrics]:
+    """Process-pool entry point: calculate one shard of satellites and return its summary, Redis values, grid and metrics."""
+    with metrics.collect(detached=True) as shard_metrics:
+        calculator = SatellitePositionCalculator(*redis_config, storage_format=storage_format)
+        grid = SpatialGridIndex()
+        results, values = calculator.calculate_position_values(satellite_data, batched, start_time, grid)
+    return results, values, grid, shard_metrics
+
+def run_worker():
+    """
+    Serve position refresh requests as JSON lines over stdin/stdout until stdin is closed.
+    
+    Method 'calculate' takes 'satellites', a list of satellite dictionaries, and returns
+    the summary of calculate_and_store_satellite_positions. Method 'refresh' takes the
+    whole fleet as 'satellites' and the keyword arguments of refresh_changed_satellites
+    and recomputes only what changed. Method 'track' takes one
+    'satellite' dictionary, an optional ISO 'start_time' and the keyword arguments of
+    store_position_track, and returns the stored track description. The Redis
+    connection and timescale are set up once for the lifetime of the worker.
+    """
+    from worker import serve
+    
+    calculator = SatellitePositionCalculator(
+        storage_format=os.environ.get('POSITION_STORAGE_FORMAT', 'binary'),
+        write_batch_size=int(os.environ.get('POSITION_WRITE_BATCH_SIZE', DEFAULT_WRITE_BATCH_SIZE))
+    )
+    serve({
+        'calculate': lambda satellites, **options: calculator.calculate_and_store_satellite_positions(
+            satellites, **options),
+        'refresh': lambda satellites, **options: calculator.refresh_changed_satellites(satellites, **options),
+        'track': lambda satellite, start_time=None, **options: calculator.store_position_track(
+            satellite['satellite_id'], satellite['name'],
+            calculator.create_earth_satellite(satellite['tle_1'], satellite['tle_2'], satellite['name']),
+            datetime.fromisoformat(start_time.replace('Z', '')) if start_time else datetime.utcnow(), **options)
+    })
 
 def main():
     """Main function for calculating satellite positions from database data."""
+    if sys.argv[1:] == ['--worker']:
+        run_worker()
+        return
+    
     try:
         # Check for command line argument (satellite data file)
         if len(sys.argv) != 2:
@@ -290,10 +1531,16 @@ def main():
             
             logger.info(f"Loaded {len(satellite_data)} satellites from file")
         
-        calculator = SatellitePositionCalculator()
+        from parallel import default_workers
+        
+        calculator = SatellitePositionCalculator(
+            storage_format=os.environ.get('POSITION_STORAGE_FORMAT', 'binary'),
+            write_batch_size=int(os.environ.get('POSITION_WRITE_BATCH_SIZE', DEFAULT_WRITE_BATCH_SIZE))
+        )
         
         # Calculate and store positions
-        results = calculator.calculate_and_store_satellite_positions(satellite_data)
+        with metrics.profiled('positions'):
+            results = calculator.calculate_and_store_satellite_positions(satellite_data, workers=default_workers())
         
         # Output results as JSON for Node.js to parse
         print(json.dumps(results, default=str))
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Conflict-free pass scheduling on top of access events.
+
+Given the passes of many satellites over many locations, this module chooses which
+of them are actually used so that no resource is double-booked:
+
+- a ground station has one antenna, so its scheduled passes may not overlap
+  (plus an optional turnaround time between passes);
+- a satellite observes one target at a time, so its scheduled target passes may
+  not overlap.
+
+Each pass is worth the product of its satellite and location priority weights
+(a per-pass 'priority' overrides both). Resources are independent, so the plan is
+built per resource, either optimally by weighted interval scheduling (sort by end
+time, find each pass's last compatible predecessor with a binary search over the
+end times, dynamic programming over the passes) or greedily (highest weight
+first, conflicts checked against the resource's booked intervals kept sorted by
+start time). Both are O(n log n) in the number of passes.
+"""
+import argparse
+import bisect
+import json
+import sys
+from datetime import datetime
+
+import numpy as np
+
+PRIORITY_WEIGHTS = {'high': 4.0, 'medium': 2.0, 'low': 1.0}
+SCHEDULING_METHODS = ('weighted', 'greedy')
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _as_datetime(value):
+    """Accept datetimes or ISO strings (as returned by the worker protocol) as naive UTC datetimes."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+def priority_weight(priority):
+    """Weight of a priority given as 'high'/'medium'/'low' or a number (default: 1.0)."""
+    if priority is None:
+        return 1.0
+    if isinstance(priority, str):
+        return PRIORITY_WEIGHTS.get(priority.lower(), 1.0)
+    return float(priority)
+
+
+def passes_from_events(events):
+    """
+    Pair access_start and access_end events into passes.
+
+    Args:
+        events: Event dictionaries as returned by compute_access_events(_batch), in time
+            order per satellite/location pair; times may be datetimes or ISO strings
+
+    Returns:
+        List of passes: [{'satellite_id', 'location_id', 'location_type', 'start', 'end', 'max_elevation'}]
+    """
+    open_passes = {}
+    passes = []
+    for event in events:
+        key = (event['satellite_id'], event['location_id'], event['location_type'])
+        if event['event_type'] == 'access_start':
+            open_passes[key] = event
+        elif event['event_type'] == 'access_end' and key in open_passes:
+            start = open_passes.pop(key)
+            passes.append({
+                'satellite_id': key[0],
+                'location_id': key[1],
+                'location_type': key[2],
+                'start': _as_datetime(start['time']),
+                'end': _as_datetime(event['time']),
+                'max_elevation': start.get('max_elevation')
+            })
+    return passes
+
+
+def _resource(scheduled_pass):
+    """The resource a pass occupies: the station antenna, or the satellite for target passes."""
+    if scheduled_pass['location_type'] == 'target':
+        return ('satellite', scheduled_pass['satellite_id'])
+    return ('ground_station', scheduled_pass['location_id'])
+
+
+def _weighted_selection(starts, ends, weights, turnaround_seconds):
+    """
+    Indices of a maximum-weight set of non-overlapping intervals.
+
+    Intervals i and j are compatible if one ends at least turnaround_seconds before the other starts.
+    """
+    order = np.argsort(ends, kind='stable')
+    starts, ends, weights = starts[order], ends[order], weights[order]
+    # Number of intervals ending early enough to precede each one = index of its predecessor + 1
+    predecessors = np.searchsorted(ends, starts - turnaround_seconds, side='right')
+
+    weights, predecessors = weights.tolist(), predecessors.tolist()
+    best = [0.0] * (len(order) + 1)
+    for j in range(len(order)):
+        best[j + 1] = max(best[j], weights[j] + best[predecessors[j]])
+
+    chosen = []
+    j = len(order)
+    while j > 0:
+        if weights[j - 1] + best[predecessors[j - 1]] >= best[j - 1]:
+            chosen.append(int(order[j - 1]))
+            j = predecessors[j - 1]
+        else:
+            j -= 1
+    return chosen
+
+
+def _greedy_selection(starts, ends, weights, turnaround_seconds):
+    """Indices chosen by booking intervals in order of decreasing weight, then earliest start."""
+    booked_starts = []
+    booked_ends = []
+    chosen = []
+    for i in np.lexsort((starts, -weights)).tolist():
+        position = bisect.bisect_left(booked_starts, starts[i])
+        if position > 0 and booked_ends[position - 1] + turnaround_seconds > starts[i]:
+            continue
+        if position < len(booked_starts) and ends[i] + turnaround_seconds > booked_starts[position]:
+            continue
+        booked_starts.insert(position, starts[i])
+        booked_ends.insert(position, ends[i])
+        chosen.append(i)
+    return chosen
+
+
+def schedule_passes(passes, satellite_priorities=None, location_priorities=None, turnaround_seconds=0.0,
+                    method='weighted'):
+    """
+    Choose a conflict-free subset of passes.
+
+    Args:
+        passes: Pass dictionaries as returned by passes_from_events; an optional 'priority'
+            key overrides the satellite and location priorities of that pass
+        satellite_priorities: Dictionary mapping satellite_id to a priority (see priority_weight)
+        location_priorities: Dictionary mapping location_id to a priority
+        turnaround_seconds: Minimum idle time between two passes on the same resource (default: 0)
+        method: 'weighted' for the maximum total weight, or 'greedy' to book passes
+            in order of decreasing weight (default: 'weighted')
+
+    Returns:
+        {
+            'scheduled': passes in the plan, ordered by start, each with 'weight' added,
+            'rejected': the remaining passes, ordered by start,
+            'total_weight': float,
+            'resources': number of stations and satellites scheduled independently
+        }
+    """
+    if method not in SCHEDULING_METHODS:
+        raise ValueError(f"Unknown scheduling method: {method}")
+    satellite_priorities = satellite_priorities or {}
+    location_priorities = location_priorities or {}
+    select = _weighted_selection if method == 'weighted' else _greedy_selection
+
+    passes = [dict(p, start=_as_datetime(p['start']), end=_as_datetime(p['end'])) for p in passes]
+    for p in passes:
+        if p.get('priority') is not None:
+            p['weight'] = priority_weight(p['priority'])
+        else:
+            p['weight'] = (priority_weight(satellite_priorities.get(p['satellite_id'])) *
+                           priority_weight(location_priorities.get(p['location_id'])))
+
+    starts = np.array([(p['start'] - _EPOCH).total_seconds() for p in passes])
+    ends = np.array([(p['end'] - _EPOCH).total_seconds() for p in passes])
+    weights = np.array([p['weight'] for p in passes])
+
+    # Group the passes by resource and schedule every resource on its own
+    resource_ids = {}
+    resource_index = np.array([resource_ids.setdefault(_resource(p), len(resource_ids)) for p in passes],
+                              dtype=np.int64)
+    order = np.argsort(resource_index, kind='stable')
+    bounds = np.flatnonzero(np.diff(resource_index[order])) + 1
+
+    selected = np.zeros(len(passes), dtype=bool)
+    for group in np.split(order, bounds):
+        if group.size:
+            chosen = select(starts[group], ends[group], weights[group], turnaround_seconds)
+            selected[group[np.array(chosen, dtype=np.int64)]] = True
+
+    by_start = np.argsort(starts, kind='stable').tolist()
+    return {
+        'scheduled': [passes[i] for i in by_start if selected[i]],
+        'rejected': [passes[i] for i in by_start if not selected[i]],
+        'total_weight': float(weights[selected].sum()),
+        'resources': len(resource_ids)
+    }
+
+
+def schedule_events(events, satellite_priorities=None, location_priorities=None, turnaround_seconds=0.0,
+                    method='weighted'):
+    """schedule_passes for raw access events (see passes_from_events)."""
+    return schedule_passes(passes_from_events(events), satellite_priorities, location_priorities,
+                           turnaround_seconds, method)
+
+
+def _batch_priorities(batch):
+    """Satellite and location priorities carried by a --batch-file's entries."""
+    satellite_priorities = {str(s['satellite_id']): s.get('priority') for s in batch.get('satellites', [])}
+    location_priorities = {str(l['location_id']): l.get('priority') for l in batch.get('locations', [])}
+    return satellite_priorities, location_priorities
+
+
+def main():
+    """Command-line interface for pass scheduling."""
+    parser = argparse.ArgumentParser(description='Build a conflict-free pass plan from access events')
+    parser.add_argument('--batch-file', dest='batch_file', type=str, required=True,
+                       help='accesswindow.py batch file; satellites and locations may carry a "priority"')
+    parser.add_argument('--events-file', dest='events_file', type=str,
+                       help='JSON events as printed by accesswindow.py --batch-file (default: compute them '
+                            'for --start_utc/--end_utc)')
+    parser.add_argument('--start_utc', type=str, help='Start time in ISO format (without --events-file)')
+    parser.add_argument('--end_utc', type=str, help='End time in ISO format (without --events-file)')
+    parser.add_argument('--elevation_deg', type=float, default=10.0, help='Minimum elevation in degrees')
+    parser.add_argument('--step_seconds', type=int, default=30, help='Time step in seconds')
+    parser.add_argument('--turnaround_seconds', type=float, default=0.0,
+                       help='Minimum idle time between passes on the same antenna or satellite')
+    parser.add_argument('--method', type=str, choices=SCHEDULING_METHODS, default='weighted',
+                       help='weighted (maximum total priority) or greedy (highest priority first)')
+
+    args = parser.parse_args()
+    if not args.events_file and None in (args.start_utc, args.end_utc):
+        parser.error('--start_utc and --end_utc are required unless --events-file is given')
+
+    try:
+        with open(args.batch_file, 'r') as f:
+            batch = json.load(f)
+
+        if args.events_file:
+            with open(args.events_file, 'r') as f:
+                events = json.load(f)
+        else:
+            from accesswindow import _parse_utc, compute_access_events_batch
+            from parallel import default_workers
+            events = compute_access_events_batch(
+                batch['locations'], batch['satellites'], _parse_utc(args.start_utc), _parse_utc(args.end_utc),
+                args.elevation_deg, args.step_seconds, workers=default_workers()
+            )
+
+        satellite_priorities, location_priorities = _batch_priorities(batch)
+        plan = schedule_events(events, satellite_priorities, location_priorities,
+                               args.turnaround_seconds, args.method)
+
+        print(f"Scheduled {len(plan['scheduled'])} of {len(plan['scheduled']) + len(plan['rejected'])} passes "
+              f"on {plan['resources']} resources, total weight {plan['total_weight']:.1f}", file=sys.stderr)
+        for scheduled_pass in plan['scheduled']:
+            scheduled_pass['start'] = scheduled_pass['start'].isoformat()
+            scheduled_pass['end'] = scheduled_pass['end'].isoformat()
+        print(json.dumps(plan['scheduled'], indent=2))
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Process-wide caches shared by the satellite scripts.
+
+Loading the Skyfield timescale and parsing TLEs are pure setup work. Long-running
+callers (the --worker processes, batch runs) see the same element sets on every
+request, so both are done once per process: the timescale is loaded on first use
+and parsed satellites are kept in an LRU cache keyed by the TLE line pair,
+bounded by TLE_CACHE_SIZE entries (least recently used entries are evicted).
+
+The timescale (Delta T and leap-second tables) is read from SATELLITE_TIMESCALE_FILE
+(default: timescale.npz next to this file), written beforehand with
+`python tlecache.py --export-timescale`, so loading it never touches the network or
+checks file freshness. Without that file Skyfield's bundled tables are used. SGP4
+and Skyfield are imported on first use, from their submodules rather than
+skyfield.api, so entry points that never propagate (e.g. pass cache hits) skip them.
+"""
+import argparse
+import functools
+import os
+
+TLE_CACHE_SIZE = int(os.environ.get('TLE_CACHE_SIZE', '1024'))
+TIMESCALE_FILE = os.environ.get('SATELLITE_TIMESCALE_FILE',
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'timescale.npz'))
+
+_timescale = None
+
+
+def _load_timescale_file(path):
+    """Build a Skyfield timescale from tables written by export_timescale."""
+    import numpy as np
+    from skyfield.timelib import Timescale
+
+    with np.load(path) as tables:
+        return Timescale((tables['delta_t_tt'], tables['delta_t_seconds']), tables['leap_dates'],
+                         tables['leap_offsets'])
+
+
+def get_timescale():
+    """Return the process-wide Skyfield timescale, loading it on first use."""
+    global _timescale
+    if _timescale is None:
+        if os.path.exists(TIMESCALE_FILE):
+            _timescale = _load_timescale_file(TIMESCALE_FILE)
+        else:
+            from skyfield.iokit import Loader
+            _timescale = Loader(os.path.dirname(TIMESCALE_FILE), verbose=False).timescale(builtin=True)
+    return _timescale
+
+
+def export_timescale(path, finals_directory=None):
+    """
+    Write the timescale tables to path (NumPy .npz) for get_timescale.
+
+    Args:
+        path: Output file
+        finals_directory: Directory holding an IERS finals2000A.all to build the tables
+            from (default: Skyfield's bundled tables)
+    """
+    import numpy as np
+    from skyfield.iokit import Loader
+
+    if finals_directory:
+        timescale = Loader(finals_directory, verbose=False).timescale(builtin=False)
+    else:
+        timescale = Loader(os.path.dirname(os.path.abspath(path)), verbose=False).timescale(builtin=True)
+    delta_t_tt, delta_t_seconds = timescale.delta_t_table
+    with open(path, 'wb') as f:
+        np.savez(f, delta_t_tt=delta_t_tt, delta_t_seconds=delta_t_seconds,
+                 leap_dates=timescale.leap_dates, leap_offsets=timescale.leap_offsets)
+
+
+@functools.lru_cache(maxsize=TLE_CACHE_SIZE)
+def load_satellite(tle_line1, tle_line2, name='SAT'):
+    """
+    Parse a TLE pair into an EarthSatellite once per process.
+
+    The returned object is shared between callers and must not be modified.
+    """
+    from skyfield.sgp4lib import EarthSatellite
+
+    return EarthSatellite(tle_line1, tle_line2, name, get_timescale())
+
+
+@functools.lru_cache(maxsize=TLE_CACHE_SIZE)
+def load_satrec(tle_line1, tle_line2):
+    """
+    Parse a TLE pair into a bare SGP4 Satrec once per process (used for batch propagation).
+
+    Parse problems are reported through the returned object's error attribute, as
+    with Satrec.twoline2rv. The returned object is shared and must not be modified.
+    """
+    from sgp4.api import Satrec
+
+    return Satrec.twoline2rv(tle_line1, tle_line2)
+
+
+def cache_info():
+    """Hit/miss statistics of the TLE caches, for logging."""
+    return {
+        'satellites': load_satellite.cache_info()._asdict(),
+        'satrecs': load_satrec.cache_info()._asdict()
+    }
+
+
+def main():
+    """Command-line interface: write the timescale file read by get_timescale."""
+    parser = argparse.ArgumentParser(description='Pre-serialize the Skyfield timescale for fast startup')
+    parser.add_argument('--export-timescale', dest='path', type=str, default=TIMESCALE_FILE,
+                        help=f'Output file (default: {TIMESCALE_FILE})')
+    parser.add_argument('--finals_dir', type=str,
+                        help='Directory with a current IERS finals2000A.all to build the tables from '
+                             '(default: the tables bundled with Skyfield)')
+    args = parser.parse_args()
+    export_timescale(args.path, args.finals_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+JSON-lines request loop shared by the --worker mode of the satellite scripts.
+
+Each stdin line is one request {"id": ..., "method": ..., "params": {...}} and each
+reply is written as one stdout line, {"id": ..., "result": ...} on success or
+{"id": ..., "error": "..."} on failure. Keeping the process alive lets callers skip
+interpreter startup, Skyfield imports and timescale loading on every request.
+
+A handler may also return a generator to stream its result: every item it yields is
+written as its own {"id": ..., "chunk": ...} line as soon as it is produced, followed by
+the usual reply carrying the generator's return value. Callers can then process large
+results piece by piece instead of waiting for, and holding, one huge reply.
+
+Every worker also answers method 'metrics' with the stage timings and counters of
+all requests served so far (see metrics.py). Each request runs under
+metrics.profiled, so SATELLITE_PROFILE captures one profile per request.
+"""
+import json
+import os
+import sys
+import types
+from datetime import datetime
+
+import metrics
+
+
+def _json_default(value):
+    """Serialize datetimes as ISO strings and anything else NumPy-ish as a string."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _metrics_handler(format='json'):
+    """Process-wide metrics: the JSON summary, or Prometheus text with format='prometheus'."""
+    totals = metrics.get_metrics()
+    if format == 'prometheus':
+        script = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+        return {'text': totals.prometheus_text({'script': script, 'pid': os.getpid()})}
+    return totals.summary()
+
+
+def _write_chunks(generator, request_id, stdout):
+    """Write every item of a streamed result as a chunk line and return the generator's return value."""
+    while True:
+        try:
+            chunk = next(generator)
+        except StopIteration as stop:
+            return stop.value
+        stdout.write(json.dumps({'id': request_id, 'chunk': chunk}, default=_json_default) + '\n')
+        stdout.flush()
+
+
+def serve(handlers, stdin=None, stdout=None):
+    """
+    Answer requests from stdin until it is closed.
+
+    Args:
+        handlers: Dictionary mapping method names to callables taking the request params as keyword
+            arguments; a callable returning a generator streams its items as chunks
+        stdin, stdout: Streams to read requests from and write replies to (default: sys.stdin/sys.stdout)
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    handlers = {'metrics': _metrics_handler, **handlers}
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            handler = handlers.get(request.get('method'))
+            if handler is None:
+                raise ValueError(f"Unknown method: {request.get('method')}")
+            with metrics.profiled(f"worker-{request.get('method')}"):
+                result = handler(**request.get('params', {}))
+                if isinstance(result, types.GeneratorType):
+                    result = _write_chunks(result, request_id, stdout)
+            response = {'id': request_id, 'result': result}
+        except Exception as e:
+            response = {'id': request_id, 'error': str(e)}
+
+        stdout.write(json.dumps(response, default=_json_default) + '\n')
+        stdout.flush()
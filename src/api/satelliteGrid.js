@@ -0,0 +1,109 @@
+// Satellite Grid for Mission Planner API
+// Reads the satellite_grid:{slice_epoch} spatial index written by satellite/positions.py
+// (see SpatialGridIndex there) to find candidate satellites for a region and time range
+
+// Must match GRID_SLICE_SECONDS in positions.py
+const GRID_SLICE_SECONDS = 600;
+const EARTH_RADIUS_KM = 6378.1366;
+
+/**
+ * Indices of the grid cells overlapping a latitude/longitude box grown by padDeg degrees of arc
+ * (mirrors region_cells in positions.py)
+ * @param {Object} region - { minLat, maxLat, minLon, maxLon }; minLon > maxLon crosses the antimeridian
+ * @param {number} cellDeg - Cell size in degrees
+ * @param {number} padDeg - Margin in degrees of arc
+ * @returns {number[]} Cell indices
+ */
+function regionCells({ minLat, maxLat, minLon, maxLon }, cellDeg, padDeg = 0) {
+  const columns = Math.round(360 / cellDeg);
+  const rows = Math.round(180 / cellDeg);
+  const lowLat = Math.max(minLat - padDeg, -90);
+  const highLat = Math.min(maxLat + padDeg, 90);
+  const polar = Math.max(Math.abs(lowLat), Math.abs(highLat));
+  const span = maxLon >= minLon ? maxLon - minLon : maxLon - minLon + 360;
+
+  let columnIndices;
+  const lonPad = polar >= 90 ? Infinity : padDeg / Math.cos(polar * Math.PI / 180);
+  if (span + 2 * lonPad >= 360) {
+    columnIndices = Array.from({ length: columns }, (_, i) => i);
+  } else {
+    const first = Math.floor((minLon - lonPad + 180) / cellDeg);
+    const last = Math.floor((minLon + span + lonPad + 180) / cellDeg);
+    const unique = new Set();
+    for (let column = first; column <= last; column++) {
+      unique.add(((column % columns) + columns) % columns);
+    }
+    columnIndices = [...unique];
+  }
+
+  const cells = [];
+  const firstRow = Math.max(Math.floor((lowLat + 90) / cellDeg), 0);
+  const lastRow = Math.min(Math.floor((highLat + 90) / cellDeg), rows - 1);
+  for (let row = firstRow; row <= lastRow; row++) {
+    for (const column of columnIndices) {
+      cells.push(row * columns + column);
+    }
+  }
+  return cells;
+}
+
+/**
+ * Box and padding of a point with a radius
+ * @param {number} lat - Latitude in degrees
+ * @param {number} lon - Longitude in degrees
+ * @param {number} radiusKm - Radius in kilometers
+ * @returns {Object} { region, padDeg }
+ */
+function pointRegion(lat, lon, radiusKm) {
+  return {
+    region: { minLat: lat, maxLat: lat, minLon: lon, maxLon: lon },
+    padDeg: (radiusKm / EARTH_RADIUS_KM) * 180 / Math.PI
+  };
+}
+
+/**
+ * Candidate satellites whose ground track may enter a region in a time range, read from the
+ * grid slices overlapping the range (one MGET, independent of fleet size). The result is a superset
+ * @param {Object} redisClient - Connected node-redis client
+ * @param {Object} region - { minLat, maxLat, minLon, maxLon }
+ * @param {Date} start - Start of the time range
+ * @param {Date} [end] - End of the time range (default: start)
+ * @param {number} [padDeg] - Extra margin in degrees of arc
+ * @returns {Promise<Object>} { satellite_ids, slices } where slices counts the grid slices found
+ */
+async function querySatelliteGrid(redisClient, region, start, end = start, padDeg = 0) {
+  const startEpoch = start.getTime() / 1000;
+  const endEpoch = end.getTime() / 1000;
+  const keys = [];
+  for (let slice = Math.floor(startEpoch / GRID_SLICE_SECONDS) * GRID_SLICE_SECONDS; slice <= endEpoch;
+    slice += GRID_SLICE_SECONDS) {
+    keys.push(`satellite_grid:${slice}`);
+  }
+
+  const satelliteIds = new Set();
+  let slices = 0;
+  for (const value of await redisClient.mGet(keys)) {
+    if (!value) {
+      continue;
+    }
+    slices++;
+    const grid = JSON.parse(value);
+    for (const cell of regionCells(region, grid.cell_deg, grid.pad_deg + padDeg)) {
+      for (const satelliteId of grid.cells[cell] || []) {
+        satelliteIds.add(satelliteId);
+      }
+    }
+  }
+
+  return {
+    satellite_ids: [...satelliteIds].sort((a, b) => a - b),
+    slices
+  };
+}
+
+module.exports = {
+  GRID_SLICE_SECONDS,
+  regionCells,
+  pointRegion,
+  querySatelliteGrid
+};
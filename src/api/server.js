@@ -2,8 +2,6 @@
 const express = require('express');
 const cors = require('cors');
 const { Client } = require('pg');
-const { spawn } = require('child_process');
-const path = require('path');
 const jwt = require('jsonwebtoken');
 const bcrypt = require('bcryptjs');
 const satellite = require('satellite.js');
@@ -24,6 +22,9 @@ const {
 } = require('./eventsCompat');
 const { startBackgroundJobs, stopBackgroundJobs } = require('./backgroundJobs');
 const { initializeWebSocket } = require('./websocketManager');
+const { getAccessWindowPool, getPositionsPool, getWorkerMetricsText, closeWorkerPools, COMPUTE_WORKERS } = require('./pythonWorkerPool');
+const { decodePositions, positionArrays, positionAt, interpolatePosition } = require('./positionCodec');
+const { pointRegion, querySatelliteGrid } = require('./satelliteGrid');
 require('dotenv').config();
 
 const app = express();
@@ -434,7 +435,9 @@ app.post('/api/accesswindow', async (req, res) => {
     start_utc,
     end_utc,
     elevation_deg = 10.0,
-    step_seconds = 30
+    step_seconds = 30,
+    alt = 0.0,
+    horizon_mask = null
   } = req.body;
 
   if (
@@ -443,50 +446,28 @@ app.post('/api/accesswindow', async (req, res) => {
     !Array.isArray(tle_lines) ||
     tle_lines.length !== 2 ||
     typeof start_utc !== 'string' ||
-    typeof end_utc !== 'string'
+    typeof end_utc !== 'string' ||
+    (horizon_mask !== null && !Array.isArray(horizon_mask))
   ) {
     return res.status(400).json({ error: 'Invalid or missing parameters' });
   }
 
-  const scriptPath = path.join(__dirname, 'satellite', 'accesswindow.py');
-  const args = [
-    '--lat', lat,
-    '--lon', lon,
-    '--tle1', tle_lines[0],
-    '--tle2', tle_lines[1],
-    '--start_utc', start_utc,
-    '--end_utc', end_utc,
-    '--elevation_deg', elevation_deg,
-    '--step_seconds', step_seconds
-  ].map(String);
-
-  const py = spawn('python3', [scriptPath, ...args]);
-
-  let output = '';
-  let errorOutput = '';
-
-  py.stdout.on('data', (data) => {
-    output += data.toString();
-  });
-
-  py.stderr.on('data', (data) => {
-    errorOutput += data.toString();
-  });
-
-  py.on('close', (code) => {
-    if (code !== 0) {
-      return res.status(500).json({ error: 'Python script error', details: errorOutput });
-    }
-    // Parse output: each line is "start -> end"
-    const windows = output
-      .split('\n')
-      .filter(line => line.includes('->'))
-      .map(line => {
-        const [start, end] = line.split('->').map(s => s.trim());
-        return { start, end };
-      });
-    res.json({ access_windows: windows });
-  });
+  try {
+    const windows = await getAccessWindowPool().request('legacy', {
+      lat,
+      lon,
+      tle_lines,
+      start_utc,
+      end_utc,
+      elevation_deg: Number(elevation_deg),
+      step_seconds: Number(step_seconds),
+      altitude_m: Number(alt),
+      horizon_mask
+    });
+    res.json({ access_windows: windows.map(([start, end]) => ({ start, end })) });
+  } catch (error) {
+    res.status(500).json({ error: 'Python script error', details: error.message });
+  }
 });
 
 // Database connection test endpoint
@@ -628,6 +609,20 @@ app.get('/api/satellites', async (req, res) => {
   }
 });
 
+// Per-stage timings and counters of the satellite workers, in Prometheus text format
+// (registered before /api/satellites/:id, which would otherwise match it)
+app.get('/api/satellites/metrics', async (req, res) => {
+  try {
+    res.type('text/plain; version=0.0.4').send(await getWorkerMetricsText());
+  } catch (error) {
+    console.error('Error retrieving worker metrics:', error);
+    res.status(500).json({ 
+      error: 'Failed to retrieve worker metrics', 
+      details: error.message 
+    });
+  }
+});
+
 // Get specific satellite by ID
 app.get('/api/satellites/:id', async (req, res) => {
   const { id } = req.params;
@@ -749,6 +744,7 @@ app.post('/api/satellites', authenticateToken, authorizeRole(['admin']), async (
     `, [name, mission, colour, mission_start_time, tle_1, tle_2]);
     
     res.status(201).json(result.rows[0]);
+    ingestTleChange();
   } catch (error) {
     console.error('Error creating satellite:', error);
     res.status(500).json({ 
@@ -831,6 +827,9 @@ app.put('/api/satellites/:id', authenticateToken, authorizeRole(['admin']), asyn
     }
     
     res.json(result.rows[0]);
+    if (tle_1 || tle_2) {
+      ingestTleChange();
+    }
   } catch (error) {
     console.error('Error updating satellite:', error);
     res.status(500).json({ 
@@ -1736,10 +1735,11 @@ app.get('/api/satellites/:id/positions', async (req, res) => {
   
   try {
     const redisKey = `satellite_positions:${id}`;
-    const cachedData = await redisClient.get(redisKey);
+    // Raw buffer: positions may be stored in the binary format (see positionCodec.js)
+    const cachedData = await redisClient.get(redis.commandOptions({ returnBuffers: true }), redisKey);
     
     if (cachedData) {
-      const positionsData = JSON.parse(cachedData);
+      const positionsData = decodePositions(cachedData);
       res.json(positionsData);
     } else {
       res.status(404).json({ 
@@ -1756,6 +1756,64 @@ app.get('/api/satellites/:id/positions', async (req, res) => {
   }
 });
 
+/**
+ * Interpolate a satellite's position from its cached positions
+ * @param {Buffer|null} cachedData - Raw satellite_positions value
+ * @param {Date} when - Requested time
+ * @returns {Object|null} { satellite_id, satellite_name, position, updated_at } or null
+ */
+function interpolateCachedPosition(cachedData, when) {
+  if (!cachedData) {
+    return null;
+  }
+  const arrays = positionArrays(cachedData);
+  const position = interpolatePosition(arrays, when);
+  if (!position) {
+    return null;
+  }
+  return {
+    satellite_id: arrays.satellite_id,
+    satellite_name: arrays.satellite_name,
+    position,
+    updated_at: position.timestamp
+  };
+}
+
+// Get position for a specific satellite at any time inside the cached window (?time=ISO, default now)
+app.get('/api/satellites/:id/position', async (req, res) => {
+  const { id } = req.params;
+  
+  if (!/^\d+$/.test(id)) {
+    return res.status(400).json({ error: 'Invalid satellite ID' });
+  }
+  
+  const when = req.query.time ? new Date(req.query.time) : new Date();
+  if (Number.isNaN(when.getTime())) {
+    return res.status(400).json({ error: 'Invalid time' });
+  }
+  
+  try {
+    const cachedData = await redisClient.get(redis.commandOptions({ returnBuffers: true }), `satellite_positions:${id}`);
+    const positionData = interpolateCachedPosition(cachedData, when);
+    
+    if (positionData) {
+      res.json(positionData);
+    } else {
+      res.status(404).json({ 
+        error: 'No cached position data covers the requested time',
+        satellite_id: parseInt(id),
+        time: when.toISOString()
+      });
+    }
+  } catch (error) {
+    console.error('Error interpolating satellite position from Redis:', error);
+    res.status(500).json({ 
+      error: 'Failed to retrieve satellite position', 
+      details: error.message 
+    });
+  }
+});
+
 // Get current position for a specific satellite
 app.get('/api/satellites/:id/position/current', async (req, res) => {
   const { id } = req.params;
@@ -1765,10 +1823,15 @@ app.get('/api/satellites/:id/position/current', async (req, res) => {
   }
   
   try {
+    // Interpolate from the cached positions; the refresh-time snapshot is only a fallback
+    const cachedPositions = await redisClient.get(redis.commandOptions({ returnBuffers: true }), `satellite_positions:${id}`);
+    const interpolated = interpolateCachedPosition(cachedPositions, new Date());
     const redisKey = `satellite_current:${id}`;
-    const cachedData = await redisClient.get(redisKey);
+    const cachedData = interpolated ? null : await redisClient.get(redisKey);
     
-    if (cachedData) {
+    if (interpolated) {
+      res.json(interpolated);
+    } else if (cachedData) {
       const currentPosition = JSON.parse(cachedData);
       res.json(currentPosition);
     } else {
@@ -1796,10 +1859,11 @@ app.get('/api/satellites/:id/trajectory', async (req, res) => {
   
   try {
     const redisKey = `satellite_positions:${id}`;
-    const cachedData = await redisClient.get(redisKey);
+    // Raw buffer: positions may be stored in the binary format (see positionCodec.js)
+    const cachedData = await redisClient.get(redis.commandOptions({ returnBuffers: true }), redisKey);
     
     if (cachedData) {
-      const positionsData = JSON.parse(cachedData);
+      const positionsData = decodePositions(cachedData);
       const now = new Date();
       const threeHoursFromNow = new Date(now.getTime() + (3 * 60 * 60 * 1000));
       
@@ -1834,6 +1898,152 @@ app.get('/api/satellites/:id/trajectory', async (req, res) => {
   }
 });
 
+// Longest ground track and finest step served by /api/satellites/:id/track
+const TRACK_MAX_HOURS = 7 * 24;
+const TRACK_MIN_STEP_SECONDS = 10;
+
+// Get a long ground track (?hours=24&step=60), computed block by block by positions.py and
+// streamed to the client one stored block at a time
+app.get('/api/satellites/:id/track', async (req, res) => {
+  const { id } = req.params;
+  
+  if (!/^\d+$/.test(id)) {
+    return res.status(400).json({ error: 'Invalid satellite ID' });
+  }
+  
+  const hours = parseFloat(req.query.hours || '24');
+  const step = parseInt(req.query.step || '60', 10);
+  if (!(hours > 0 && hours <= TRACK_MAX_HOURS) || !(step >= TRACK_MIN_STEP_SECONDS)) {
+    return res.status(400).json({ 
+      error: `hours must be in (0, ${TRACK_MAX_HOURS}] and step at least ${TRACK_MIN_STEP_SECONDS} seconds`
+    });
+  }
+  
+  try {
+    const start = new Date();
+    const end = new Date(start.getTime() + hours * 3600 * 1000);
+    
+    // Reuse the stored track when it covers the requested window at the requested step
+    const cachedTrack = await redisClient.get(`satellite_track:${id}`);
+    let track = cachedTrack ? JSON.parse(cachedTrack) : null;
+    const covers = track && track.interval_seconds === step &&
+      Date.parse(`${track.start}Z`) <= start.getTime() && Date.parse(`${track.end}Z`) >= end.getTime();
+    
+    if (!covers) {
+      const client = new Client(dbConfig);
+      await client.connect();
+      const result = await client.query(
+        'SELECT satellite_id, name, tle_1, tle_2 FROM satellite WHERE satellite_id = $1', [id]
+      );
+      await client.end();
+      
+      if (result.rows.length === 0) {
+        return res.status(404).json({ error: 'Satellite not found', satellite_id: parseInt(id) });
+      }
+      track = await getPositionsPool().request('track', {
+        satellite: result.rows[0],
+        start_time: start.toISOString(),
+        duration_minutes: Math.ceil(hours * 60),
+        interval_seconds: step
+      });
+    }
+    
+    res.type('application/json');
+    res.write(`{"satellite_id":${parseInt(id)},"satellite_name":${JSON.stringify(track.satellite_name)},` +
+      `"interval_seconds":${step},"time_range":${JSON.stringify({ start: start.toISOString(), end: end.toISOString() })},` +
+      '"track_positions":[');
+    
+    // Blocks are keyed by the chunk boundary they start after; the boundary sample is
+    // repeated at the start of the next block and skipped here
+    const startEpoch = start.getTime() / 1000;
+    const endEpoch = end.getTime() / 1000;
+    let nextEpoch = startEpoch;
+    let written = 0;
+    for (let blockEpoch = Math.floor((startEpoch - step) / track.chunk_seconds) * track.chunk_seconds;
+      blockEpoch <= endEpoch; blockEpoch += track.chunk_seconds) {
+      const block = await redisClient.get(redis.commandOptions({ returnBuffers: true }), `satellite_track:${id}:${blockEpoch}`);
+      if (!block) {
+        continue;
+      }
+      const arrays = positionArrays(block);
+      const records = [];
+      for (let i = 0; i < arrays.count; i++) {
+        const epoch = arrays.startEpoch + i * arrays.stepSeconds;
+        if (epoch >= nextEpoch - 1e-6 && epoch <= endEpoch) {
+          records.push(JSON.stringify(positionAt(arrays, i)));
+          nextEpoch = epoch + arrays.stepSeconds;
+        }
+      }
+      if (records.length > 0) {
+        res.write((written > 0 ? ',' : '') + records.join(','));
+        written += records.length;
+      }
+    }
+    
+    res.end(`],"total_positions":${written}}`);
+    
+  } catch (error) {
+    console.error('Error retrieving satellite track:', error);
+    if (res.headersSent) {
+      res.end();
+    } else {
+      res.status(500).json({ 
+        error: 'Failed to retrieve satellite track', 
+        details: error.message 
+      });
+    }
+  }
+});
+
+// Longest look-ahead served by /api/satellites/region/candidates
+const REGION_QUERY_MAX_MINUTES = 270;
+
+// Candidate satellites over a region now or in the next minutes, from the spatial grid built by
+// the position refresh: ?lat=&lon=&radius_km= or ?min_lat=&max_lat=&min_lon=&max_lon=, plus &minutes=
+app.get('/api/satellites/region/candidates', async (req, res) => {
+  const number = (name) => (req.query[name] === undefined ? NaN : parseFloat(req.query[name]));
+  const minutes = req.query.minutes === undefined ? 0 : parseFloat(req.query.minutes);
+  
+  let region;
+  let padDeg = 0;
+  if (!Number.isNaN(number('lat')) && !Number.isNaN(number('lon')) && number('radius_km') >= 0) {
+    ({ region, padDeg } = pointRegion(number('lat'), number('lon'), number('radius_km')));
+  } else if (['min_lat', 'max_lat', 'min_lon', 'max_lon'].every((name) => !Number.isNaN(number(name)))) {
+    region = {
+      minLat: number('min_lat'),
+      maxLat: number('max_lat'),
+      minLon: number('min_lon'),
+      maxLon: number('max_lon')
+    };
+  }
+  
+  if (!region || !(minutes >= 0 && minutes <= REGION_QUERY_MAX_MINUTES)) {
+    return res.status(400).json({ 
+      error: 'Provide lat, lon and radius_km or min_lat, max_lat, min_lon and max_lon; ' +
+        `minutes must be in [0, ${REGION_QUERY_MAX_MINUTES}]`
+    });
+  }
+  
+  try {
+    const start = new Date();
+    const end = new Date(start.getTime() + minutes * 60 * 1000);
+    const result = await querySatelliteGrid(redisClient, region, start, end, padDeg);
+    
+    res.json({
+      ...result,
+      count: result.satellite_ids.length,
+      time_range: { start: start.toISOString(), end: end.toISOString() }
+    });
+    
+  } catch (error) {
+    console.error('Error querying satellite grid:', error);
+    res.status(500).json({ 
+      error: 'Failed to query satellites in region', 
+      details: error.message 
+    });
+  }
+});
+
 // Get current positions for all satellites (optimized for map display)
 app.get('/api/satellites/positions/current', async (req, res) => {
   let client;
@@ -1848,15 +2058,27 @@ app.get('/api/satellites/positions/current', async (req, res) => {
     
     const satellites = satellitesResult.rows;
     const currentPositions = [];
+    const now = new Date();
+    
+    // Fetch every satellite's cached positions in one round trip and interpolate them to now
+    const cachedPositions = satellites.length
+      ? await redisClient.mGet(
+        redis.commandOptions({ returnBuffers: true }),
+        satellites.map(sat => `satellite_positions:${sat.satellite_id}`)
+      )
+      : [];
     
-    // Fetch current position for each satellite from Redis
-    for (const sat of satellites) {
+    for (const [index, sat] of satellites.entries()) {
       try {
-        const redisKey = `satellite_current:${sat.satellite_id}`;
-        const cachedData = await redisClient.get(redisKey);
+        let positionData = interpolateCachedPosition(cachedPositions[index], now);
+        
+        if (!positionData) {
+          // Fall back to the snapshot written at refresh time
+          const cachedData = await redisClient.get(`satellite_current:${sat.satellite_id}`);
+          positionData = cachedData ? JSON.parse(cachedData) : null;
+        }
         
-        if (cachedData) {
-          const positionData = JSON.parse(cachedData);
+        if (positionData) {
           currentPositions.push({
             satellite_id: sat.satellite_id,
             name: sat.name,
@@ -1908,8 +2130,8 @@ app.get('/api/satellites/positions/current', async (req, res) => {
 // Manually trigger position calculation for all satellites (admin only)
 app.post('/api/satellites/positions/calculate', authenticateToken, authorizeRole(['admin']), async (req, res) => {
   try {
-    // Spawn Python script to calculate positions
-    const result = await calculateSatellitePositions();
+    // Recompute every satellite, not only those with changed or expiring positions
+    const result = await refreshSatellitePositions({ force: true });
     res.json(result);
   } catch (error) {
     console.error('Error triggering position calculation:', error);
@@ -1972,9 +2194,9 @@ app.post('/api/accesswindow/satellite/:satelliteId/groundstation/:gsId', async (
       return res.status(404).json({ error: 'Satellite not found' });
     }
     
-    // Get ground station coordinates
+    // Get ground station coordinates and horizon mask
     const gsResult = await client.query(`
-      SELECT name, latitude, longitude FROM ground_station WHERE gs_id = $1
+      SELECT name, latitude, longitude, altitude, horizon_mask FROM ground_station WHERE gs_id = $1
     `, [gsId]);
     
     if (gsResult.rows.length === 0) {
@@ -1985,49 +2207,22 @@ app.post('/api/accesswindow/satellite/:satelliteId/groundstation/:gsId', async (
     const groundStation = gsResult.rows[0];
     
     // Call the existing access window endpoint logic
-    const scriptPath = path.join(__dirname, 'satellite', 'accesswindow.py');
-    const args = [
-      '--lat', groundStation.latitude,
-      '--lon', groundStation.longitude,
-      '--tle1', satellite.tle_1,
-      '--tle2', satellite.tle_2,
-      '--start_utc', start_utc,
-      '--end_utc', end_utc,
-      '--elevation_deg', elevation_deg,
-      '--step_seconds', step_seconds
-    ].map(String);
-
-    const py = spawn('python3', [scriptPath, ...args]);
-
-    let output = '';
-    let errorOutput = '';
-
-    py.stdout.on('data', (data) => {
-      output += data.toString();
-    });
-
-    py.stderr.on('data', (data) => {
-      errorOutput += data.toString();
+    const windows = await getAccessWindowPool().request('legacy', {
+      lat: parseFloat(groundStation.latitude),
+      lon: parseFloat(groundStation.longitude),
+      tle_lines: [satellite.tle_1, satellite.tle_2],
+      start_utc,
+      end_utc,
+      elevation_deg: Number(elevation_deg),
+      step_seconds: Number(step_seconds),
+      altitude_m: parseFloat(groundStation.altitude) || 0.0,
+      horizon_mask: groundStation.horizon_mask
     });
-
-    py.on('close', (code) => {
-      if (code !== 0) {
-        return res.status(500).json({ error: 'Python script error', details: errorOutput });
-      }
-      
-      const windows = output
-        .split('\n')
-        .filter(line => line.includes('->'))
-        .map(line => {
-          const [start, end] = line.split('->').map(s => s.trim());
-          return { start, end };
-        });
-        
-      res.json({ 
-        satellite_name: satellite.name,
-        ground_station_name: groundStation.name,
-        access_windows: windows 
-      });
+    
+    res.json({ 
+      satellite_name: satellite.name,
+      ground_station_name: groundStation.name,
+      access_windows: windows.map(([start, end]) => ({ start, end }))
     });
     
   } catch (error) {
@@ -2228,7 +2423,45 @@ app.use((err, req, res, next) => {
 
 // SATELLITE POSITION CALCULATION FUNCTIONS
 
-async function calculateSatellitePositions() {
+// Change-driven refresh cycle: each cycle only recomputes satellites whose TLE changed or whose
+// stored positions expire within the margin (which must exceed the interval)
+const POSITION_REFRESH_INTERVAL_MINUTES = parseFloat(process.env.POSITION_REFRESH_INTERVAL_MINUTES || '15');
+const POSITION_REFRESH_MARGIN_MINUTES = parseFloat(process.env.POSITION_REFRESH_MARGIN_MINUTES || '30');
+
+let positionRefreshQueue = Promise.resolve();
+
+/**
+ * Run a position refresh after any refresh already in progress, so a TLE change made during a
+ * run is picked up by the next one instead of being read by neither
+ * @param {Object} [options] - See calculateSatellitePositions
+ */
+function refreshSatellitePositions(options) {
+  const run = positionRefreshQueue.catch(() => {}).then(() => calculateSatellitePositions(options));
+  positionRefreshQueue = run;
+  return run;
+}
+
+/**
+ * Recompute what depends on the satellite TLEs after one was created or changed: positions of
+ * the changed satellites and the access windows of their pairs (everything else is left alone)
+ */
+function ingestTleChange() {
+  refreshSatellitePositions()
+    .then(results => console.log(`TLE change: positions recomputed for ${results.satellites_processed} satellites, ` +
+      `${results.satellites_skipped} unchanged`))
+    .catch(error => console.error('Position refresh after TLE change failed:', error));
+  calculateAndStoreAccessWindows({ incremental: true, changedOnly: true })
+    .catch(error => console.error('Access window refresh after TLE change failed:', error));
+}
+
+/**
+ * Refresh the stored satellite positions through the positions.py worker
+ * @param {Object} [options]
+ * @param {boolean} [options.force=false] - Recompute every satellite instead of only those that are
+ *   new, have a changed TLE or positions expiring within POSITION_REFRESH_MARGIN_MINUTES
+ * @returns {Promise<Object>} Summary of the refresh
+ */
+async function calculateSatellitePositions({ force = false } = {}) {
   return new Promise(async (resolve, reject) => {
     try {
       // Get satellite data from database
@@ -2245,7 +2478,9 @@ async function calculateSatellitePositions() {
         resolve({
           status: 'completed',
           message: 'No satellites found in database',
-          satellites_processed: 0
+          satellites_processed: 0,
+          satellites_skipped: 0,
+          satellites_removed: 0
         });
         return;
       }
@@ -2257,61 +2492,35 @@ async function calculateSatellitePositions() {
         satellites_total: result.rows.length
       }));
       
-      // Write satellite data to temporary file for Python script
-      const tempData = JSON.stringify(result.rows);
-      const fs = require('fs');
-      const tempFile = '/tmp/satellite_data.json';
-      fs.writeFileSync(tempFile, tempData);
-      
-      // Spawn Python script
-      const pythonScript = path.join(__dirname, 'satellite', 'positions.py');
-      const python = spawn('/opt/venv/bin/python', [pythonScript, tempFile]);
-      
-      let output = '';
-      let errorOutput = '';
-      
-      python.stdout.on('data', (data) => {
-        output += data.toString();
-      });
-      
-      python.stderr.on('data', (data) => {
-        errorOutput += data.toString();
-      });
-      
-      python.on('close', async (code) => {
-        try {
-          // Clean up temp file
-          fs.unlinkSync(tempFile);
-          
-          if (code === 0) {
-            const results = JSON.parse(output.trim());
-            
-            // Update calculation status
-            await redisClient.setEx('position_calculation_status', 3600, JSON.stringify({
-              status: 'completed',
-              completed_at: new Date().toISOString(),
-              results: results
-            }));
-            
-            resolve(results);
-          } else {
-            const error = {
-              status: 'failed',
-              error: 'Python script failed',
-              code: code,
-              stderr: errorOutput,
-              stdout: output
-            };
-            
-            // Update calculation status
-            await redisClient.setEx('position_calculation_status', 3600, JSON.stringify(error));
-            
-            reject(new Error(errorOutput || 'Python script failed'));
-          }
-        } catch (err) {
-          reject(err);
-        }
-      });
+      // Hand satellite data to the warm positions.py worker
+      try {
+        const results = await getPositionsPool().request('refresh', {
+          satellites: result.rows,
+          workers: COMPUTE_WORKERS,
+          margin_minutes: POSITION_REFRESH_MARGIN_MINUTES,
+          force
+        });
+        
+        // Update calculation status
+        await redisClient.setEx('position_calculation_status', 3600, JSON.stringify({
+          status: 'completed',
+          completed_at: new Date().toISOString(),
+          results: results
+        }));
+        
+        resolve(results);
+      } catch (workerError) {
+        const error = {
+          status: 'failed',
+          error: 'Python script failed',
+          stderr: workerError.message
+        };
+        
+        // Update calculation status
+        await redisClient.setEx('position_calculation_status', 3600, JSON.stringify(error));
+        
+        reject(workerError);
+      }
       
     } catch (error) {
       // Update calculation status
@@ -2335,19 +2544,21 @@ async function initializePositionSystem() {
     
     // Calculate initial positions
     console.log('Calculating initial satellite positions...');
-    const results = await calculateSatellitePositions();
+    const results = await refreshSatellitePositions();
     console.log('Initial position calculation completed:', results);
     
-    // Set up periodic recalculation (every 180 minutes)
+    // Set up periodic change-driven refresh; unchanged satellites cost nothing until they near expiry
     setInterval(async () => {
       try {
-        console.log('Starting periodic position recalculation...');
-        await calculateSatellitePositions();
-        console.log('Periodic position recalculation completed');
+        const results = await refreshSatellitePositions();
+        if (results.satellites_processed > 0 || results.satellites_removed > 0) {
+          console.log(`Periodic position refresh: ${results.satellites_processed} recomputed, ` +
+            `${results.satellites_skipped} unchanged, ${results.satellites_removed} removed`);
+        }
       } catch (error) {
         console.error('Periodic position calculation failed:', error);
       }
-    }, 180 * 60 * 1000); // 180 minutes in milliseconds
+    }, POSITION_REFRESH_INTERVAL_MINUTES * 60 * 1000);
     
   } catch (error) {
     console.error('Failed to initialize position system:', error);
@@ -2358,7 +2569,7 @@ async function initializePositionSystem() {
 async function initializeAccessWindows() {
   try {
     console.log('Initializing access window calculations...');
-    const results = await calculateAndStoreAccessWindows();
+    const results = await calculateAndStoreAccessWindows({ incremental: true });
     console.log('Access window initialization completed:', results);
   } catch (error) {
     console.error('Failed to initialize access windows:', error);
@@ -2397,6 +2608,7 @@ process.on('SIGTERM', () => {
   if (backgroundJobs) {
     stopBackgroundJobs(backgroundJobs);
   }
+  closeWorkerPools();
   process.exit(0);
 });
 
@@ -2405,5 +2617,6 @@ process.on('SIGINT', () => {
   if (backgroundJobs) {
     stopBackgroundJobs(backgroundJobs);
   }
+  closeWorkerPools();
   process.exit(0);
 });
\ No newline at end of file
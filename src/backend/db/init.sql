@@ -77,6 +77,7 @@ CREATE TABLE ground_station (
     latitude DECIMAL(8,6) NOT NULL CHECK (latitude >= -90 AND latitude <= 90),
     longitude DECIMAL(9,6) NOT NULL CHECK (longitude >= -180 AND longitude <= 180),
     altitude DECIMAL(8,2) NOT NULL,
+    horizon_mask JSONB, -- Terrain mask: [[azimuth_deg, min_elevation_deg], ...], NULL for none
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );